@@ -21,6 +21,7 @@ import (
 	_ "net/http/pprof"
 	"os"
 	"os/signal"
+	"runtime"
 	"strings"
 	"syscall"
 	"time"
@@ -120,6 +121,8 @@ func initialGlobal(dbName string, onProperties func()) {
 	}
 
 	addr := globalProps.GetString(prop.DebugPprof, prop.DebugPprofDefault)
+	runtime.SetMutexProfileFraction(globalProps.GetInt(prop.DebugPprofMutexFraction, prop.DebugPprofMutexFractionDefault))
+	runtime.SetBlockProfileRate(globalProps.GetInt(prop.DebugPprofBlockRate, prop.DebugPprofBlockRateDefault))
 	go func() {
 		http.ListenAndServe(addr, nil)
 	}()
@@ -0,0 +1,52 @@
+"""
+Shared benchmark harness for the go-ycsb/memkv experiment drivers.
+
+A driver typically looks like
+
+    parser = argparse.ArgumentParser(description="...")
+    harness.add_common_args(parser)
+    global_args = parser.parse_args()
+
+    def main():
+        harness.init(global_args)
+        harness.prebuild()
+        harness.start_memkv_multiserver([[0, 1]])
+        a = harness.goycsb_bench(64, 10, 128, 0.95, 0.05, range(40, 80),
+                                 props={'memkv.coord': harness.coord_addr()})
+        ...
+"""
+from .proc import (
+    goycsbdir, gokvdir, add_common_args, init, outpath, run_command,
+    start_command, stop_proc, cleanup_procs, corelist_str, many_cores, one_core,
+)
+from .build import tags, cache_dir, binary, prebuild
+from .ready import redis_ping, probe, wait_ready, wait_all_ready
+from .series import Series, load_series, new_series_path, new_sample_path
+from .samples import sample_props, read_samples, op_names
+from .steady import mean_ci, SteadyState
+from .search import PeakSearch, find_peak
+from .topology import (
+    parse_cpulist, cpulist_str, cpu_node, cpu_siblings, with_siblings, online_cpus, physical_core, cpu_package,
+)
+from .multiclient import split_cores, merge_reports, goycsb_bench_multi
+from .cpustat import read_stat, CpuSampler
+from .counters import PerfStat, parse_stat
+from .index import Index, index, point_key
+from .point import bench_point, point_thruput
+from .usl import USL
+from .spec import SpecError, parse_cores, expand, load_spec
+from .alloc import AllocError, Allocator, port_free
+from .placement import server_cpus, client_cpus, describe
+from .netns import EmulatedNet
+from .remote import RemoteProc, LocalExecutor, SshExecutor, executor, fan_out
+from .profile import Profiler, read_folded, write_folded, diff_folded, diff_profiles
+from .experiment import run_experiment, run_specs, next_wave, check_interference
+from .cluster import (
+    coord_port, shard_base_port, coord_addr, start_memkv_coord,
+    start_shard_multicore, memkvctl, memkvctl_add, start_memkv_multiserver,
+)
+from .ycsb import (
+    goycsb_args, start_goycsb, fields, parse_summary_line, ReportParser,
+    is_op, report_ops, report_time, report_count, report_thruput, read_reports, parse_reports, parse_ycsb_output,
+    parse_ycsb_output_totalops, goycsb_bench,
+)
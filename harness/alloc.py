@@ -0,0 +1,140 @@
+"""
+Hands out exclusive CPU sets and free ports, so clusters and clients started
+side by side on one host don't clobber each other.
+
+CPU sets are built from whole physical cores: a core's first hardware thread
+goes into the set and its SMT siblings are reserved along with it, so nothing
+else runs on the other half of a hyperthreaded core (pass smt=True to use every
+hardware thread). A set is taken from a single NUMA node when one has room,
+from the node with the least room that fits (to keep big nodes free for big
+requests). placement.py builds the other pinning policies on top of cpus_for. Ports are handed out in contiguous blocks (a memkv cluster uses
+coordinator port, then one port per shard) that nothing is listening on.
+"""
+from threading import Lock
+import itertools
+import socket
+
+from .topology import online_cpus, cpu_node, cpu_siblings, physical_core
+
+class AllocError(RuntimeError):
+    pass
+
+def port_free(port:int):
+    """
+    Returns True if nothing is bound to port on this host.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(('', port))
+        except OSError:
+            return False
+    return True
+
+class Allocator:
+    def __init__(self, cpus:list[int]=None, first_port:int=12200, last_port:int=32000, smt:bool=False):
+        self.lock = Lock()
+        self.smt = smt
+        self.cpus = sorted(online_cpus() if cpus is None else cpus)
+        self.taken = set()
+        # the cpus handed out, without the siblings reserved along with them
+        self.held = set()
+        self.first_port = first_port
+        self.last_port = last_port
+        self.ports_taken = set()
+
+    def _reserve(self, cpus):
+        for c in cpus:
+            self.taken.add(c)
+            self.held.add(c)
+            if not self.smt:
+                self.taken.update(cpu_siblings(c))
+
+    def _free(self):
+        return [c for c in self.cpus if c not in self.taken]
+
+    def claim(self, cpus:list[int]):
+        """
+        Reserves specific cpus (e.g. a literal core list from a spec). Raises
+        AllocError if any of them (or, without smt, a sibling) is taken.
+        """
+        with self.lock:
+            want = set(cpus)
+            if not self.smt:
+                for c in cpus:
+                    want.update(cpu_siblings(c))
+            clash = want & self.taken
+            if len(clash) > 0:
+                used = sorted(set(cpus) & self.held)
+                if len(used) > 0:
+                    raise AllocError("cpus {0} are already in use".format(used))
+                # without smt, a physical core is never shared
+                pairs = [(c, s) for c in cpus for s in cpu_siblings(c) if s != c and s in self.held]
+                raise AllocError("cpus {0} are SMT siblings of cpus {1}, which are in use; give cpus of other "
+                                 "physical cores, or a number of cores to allocate".format(
+                                     sorted(set([c for c, _ in pairs])), sorted(set([s for _, s in pairs]))))
+            self._reserve(cpus)
+            return list(cpus)
+
+    def cpus_for(self, n:int, node:int=None, nodes:list[int]=None, siblings:bool=False, spread:bool=False):
+        """
+        Returns n cpus from free physical cores, all on one NUMA node if
+        possible (on node, if given), and reserves them. nodes restricts the
+        set to those nodes, tried in that order when no single one fits.
+        With siblings, every hardware thread of a core goes into the set
+        (siblings next to each other) instead of only its first one; with
+        spread, the cpus are dealt round-robin over nodes instead of packed.
+        """
+        with self.lock:
+            free = self._free()
+            if not self.smt:
+                # hardware threads of physical cores that are entirely free
+                free = [c for c in free if len(set(cpu_siblings(c)) & self.taken) == 0]
+                if not siblings:
+                    online = set(free)
+                    free = [c for c in free if c == min(set(cpu_siblings(c)) & online)]
+            free.sort(key=lambda c: (physical_core(c), c))
+            if node is not None:
+                nodes = [node]
+            where = "" if nodes is None else " on node(s) {0}".format(",".join([str(i) for i in nodes]))
+            bynode = dict()
+            for c in free:
+                bynode.setdefault(cpu_node(c), []).append(c)
+            if nodes is None:
+                nodes = sorted(bynode.keys())
+            lists = [bynode.get(i, []) for i in nodes]
+            if spread:
+                pool = [c for row in itertools.zip_longest(*lists) for c in row if c is not None]
+            else:
+                fits = sorted([cs for cs in lists if len(cs) >= n], key=len)
+                pool = fits[0] if len(fits) > 0 else [c for cs in lists for c in cs]
+            got = pool[:n]
+            if len(got) < n:
+                raise AllocError("wanted {0} cpus{1}, only {2} free".format(n, where, len(got)))
+            self._reserve(got)
+            return got
+
+    def ports_for(self, n:int):
+        """
+        Returns a block of n consecutive free ports and reserves it.
+        """
+        with self.lock:
+            p = self.first_port
+            while p + n - 1 <= self.last_port:
+                block = range(p, p + n)
+                busy = [q for q in block if q in self.ports_taken or not port_free(q)]
+                if len(busy) == 0:
+                    self.ports_taken.update(block)
+                    return list(block)
+                p = busy[-1] + 1
+            raise AllocError("no block of {0} free ports in {1}-{2}".format(n, self.first_port, self.last_port))
+
+    def release(self, cpus:list[int]=(), ports:list[int]=()):
+        with self.lock:
+            for c in cpus:
+                self.taken.discard(c)
+                self.held.discard(c)
+                if not self.smt:
+                    for s in cpu_siblings(c):
+                        self.taken.discard(s)
+            for p in ports:
+                self.ports_taken.discard(p)
@@ -0,0 +1,76 @@
+"""
+Bringing up (local) memkv clusters: one coordinator plus a shard server per
+core list.
+"""
+from .proc import gokvdir, start_command, run_command, many_cores, corelist_str
+from .build import binary
+from .ready import wait_all_ready
+
+coord_port = 12200
+shard_base_port = 12300
+
+def coord_addr(host="127.0.0.1", port:int=coord_port):
+    return host + ":" + str(port)
+
+def start_memkv_coord(initsrv:str, port:int=coord_port):
+    p = start_command([binary("memkvcoord"), "-init", initsrv,
+                       "-port", str(port)], cwd=gokvdir)
+    print("[INFO] Started kv coordinator")
+    return p
+
+def start_shard_multicore(port:int, corelist:list[int], init:bool, membind:bool=False, wrap=None):
+    """
+    wrap, if given, maps the command line to the one to run instead (e.g. to
+    run it inside a network namespace).
+    """
+    args = many_cores([binary("memkvshard")] + init * ["-init"] + ["-port", str(port)], corelist_str(corelist), membind)
+    p = start_command(args if wrap is None else wrap(args), cwd=gokvdir)
+    print("[INFO] Started a shard server with {0} cores on port {1}".format(len(corelist), port))
+    return p
+
+def memkvctl(op:str, shard:str=None, coord:str=None):
+    """
+    Runs `memkvctl <op> [shard]` against the coordinator at coord, raising
+    RuntimeError if it fails.
+    """
+    if coord is None:
+        coord = coord_addr()
+    p = run_command([binary("memkvctl"), "-coord", coord, op] + ([shard] if shard is not None else []), cwd=gokvdir)
+    if p is not None and p.returncode != 0:
+        raise RuntimeError("memkvctl {0} {1} failed:\n{2}".format(op, shard or "", p.stderr))
+    return p
+
+def memkvctl_add(shard:str, coord:str=None):
+    return memkvctl("add", shard, coord)
+
+# Starts coordinator on port 12200 and shards on 12300, 12301, ... (by default)
+def start_memkv_multiserver(config:list[list[int]], register=True, coord_port:int=coord_port,
+                            base_port:int=shard_base_port, membind:bool=False, net=None):
+    """
+    Given a list of lists of cores for each shard server, this brings up the kv
+    system. If register is False, only the first shard is part of the initial
+    configuration and the rest are left for the caller to `memkvctl add`.
+    Clusters running side by side need their own coord_port and base_port.
+    With membind, each shard's memory is bound to the NUMA nodes of its cores.
+    With net (an up netns.EmulatedNet), every shard runs in its own network
+    namespace and is reached at its address there.
+    """
+    def host(i):
+        return "127.0.0.1" if net is None else net.host(i)
+    ps = [start_memkv_coord(host(0) + ":" + str(base_port), coord_port)]
+
+    # shards don't depend on each other, so start them all at once and wait for
+    # them together
+    for i, corelist in enumerate(config):
+        ps.append(start_shard_multicore(base_port + i, corelist, i == 0, membind,
+                                        None if net is None else lambda args, i=i: net.wrap(i, args)))
+    wait_all_ready([("127.0.0.1", coord_port, ps[0])] +
+                   [(host(i), base_port + i, ps[i + 1]) for i in range(len(config))])
+
+    # memkvctl adds one shard per invocation, and each add makes the
+    # coordinator move keys, so these stay back-to-back rather than concurrent
+    if register:
+        for i in range(1, len(config)):
+            memkvctl_add(host(i) + ":" + str(base_port + i), coord_addr(port=coord_port))
+    print("[INFO] Started kv service with {0} server(s)".format(len(config)))
+    return ps
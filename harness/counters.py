@@ -0,0 +1,154 @@
+"""
+Hardware performance counters of the server and client cores, from perf stat
+running alongside a benchmark, so that a placement's throughput can be
+explained by what the cores did per operation (IPC, LLC misses, context
+switches) rather than guessed at.
+
+A PerfStat counts `events` on each core set every `interval` seconds between
+start() and stop(); per_op() then divides the rates over the same steady
+window as the CPU utilization by the point's throughput. The per-op counters
+of a core set are recorded as
+    {'cycles_per_op', 'instructions_per_op', 'ipc', 'llc_misses_per_op',
+     'cs_per_op', 'migrations_per_op', 'rates': {event: per second}}
+with None for events the cpu (or VM) doesn't count. LLC misses are LLC loads
+and stores that missed, or the generic cache-misses event where there are
+no LLC events. perf scales the counts of multiplexed events to the whole
+interval.
+"""
+from os import path
+import os
+import signal
+import tempfile
+
+from .proc import start_command, stop_proc
+from .topology import cpulist_str
+
+events = ['cycles', 'instructions', 'cache-misses', 'LLC-load-misses', 'LLC-store-misses',
+          'context-switches', 'cpu-migrations']
+
+def parse_stat(text:str):
+    """
+    Parses `perf stat -I <ms> -x,` output into [(seconds since start,
+    {event: count, or None if not counted}), ...], one per interval.
+    """
+    ret = []
+    for line in text.splitlines():
+        if line.strip() == '' or line.startswith('#'):
+            continue
+        fs = line.strip().split(',')
+        if len(fs) < 4:
+            continue
+        try:
+            t = float(fs[0])
+        except ValueError:
+            continue
+        # hybrid cpus report cpu_core/cycles/ and cpu_atom/cycles/ separately
+        ev = fs[3].split(':')[0]
+        if ev.startswith('cpu_') and '/' in ev:
+            ev = ev.split('/')[1]
+        try:
+            v = float(fs[1])
+        except ValueError:
+            v = None
+        if len(ret) == 0 or ret[-1][0] != t:
+            ret.append((t, dict()))
+        counts = ret[-1][1]
+        counts[ev] = v if counts.get(ev) is None else counts[ev] + (v or 0)
+    return ret
+
+class PerfStat:
+    """
+    Runs perf stat on each of a few named core sets, e.g. {'server': [0, 1],
+    'client': [40, ..., 79]}, between start() and stop().
+    """
+    def __init__(self, cores:dict, interval:float=0.5):
+        self.cores = {t: list(cs) for t, cs in cores.items() if cs}
+        self.interval = interval
+        self.procs = dict()
+        self.files = dict()
+        self.samples = dict()
+
+    def start(self):
+        sudo = [] if os.geteuid() == 0 else ['sudo']
+        for t, cs in self.cores.items():
+            fd, f = tempfile.mkstemp(prefix='perfstat-{0}-'.format(t), suffix='.csv')
+            os.close(fd)
+            args = sudo + ['perf', 'stat', '-a', '-C', cpulist_str(cs), '-I', str(int(self.interval * 1000)),
+                           '-x', ',', '-e', ','.join(events), '-o', f]
+            try:
+                p = start_command(args)
+            except FileNotFoundError:
+                print("[WARNING] perf isn't installed; no hardware counters")
+                os.remove(f)
+                break
+            if p is None:
+                os.remove(f)
+                continue
+            self.procs[t] = p
+            self.files[t] = f
+        return self
+
+    def stop(self):
+        """
+        Stops perf stat (with SIGINT, so it writes out the last interval) and
+        reads what it counted.
+        """
+        for t, p in self.procs.items():
+            try:
+                os.killpg(os.getpgid(p.pid), signal.SIGINT)
+                p.wait(timeout=5)
+            except Exception:
+                pass
+            stop_proc(p)
+            f = self.files[t]
+            if path.exists(f):
+                with open(f, 'r') as inp:
+                    self.samples[t] = parse_stat(inp.read())
+                os.remove(f)
+            if len(self.samples.get(t, [])) == 0:
+                print("[WARNING] perf stat counted nothing on the {0} cores".format(t))
+        self.procs = dict()
+
+    def rates(self, target:str, last:float=None):
+        """
+        Returns {event: count per second} on target's cores over the counted
+        time, or only over the last `last` seconds of it.
+        """
+        samples = self.samples.get(target, [])
+        if len(samples) == 0:
+            return None
+        t1 = samples[-1][0]
+        # interval i covers (t_{i-1}, t_i]
+        window = [(t, c) for t, c in samples if last is None or t > t1 - last - 1e-9]
+        if len(window) == 0:
+            window = samples[-1:]
+        i0 = samples.index(window[0])
+        t0 = samples[i0 - 1][0] if i0 > 0 else 0
+        secs = t1 - t0
+        if secs <= 0:
+            return None
+        ret = dict()
+        for ev in events:
+            vs = [c.get(ev) for _, c in window]
+            ret[ev] = None if any([v is None for v in vs]) else sum(vs) / secs
+        return ret
+
+    def per_op(self, target:str, thruput:float, last:float=None):
+        """
+        The counters of target per operation, at thruput ops/sec (see the
+        module docstring), or None if nothing was counted.
+        """
+        r = self.rates(target, last)
+        if r is None or not thruput:
+            return None
+        def per(ev):
+            return r[ev] / thruput if r.get(ev) is not None else None
+        llc = None
+        if r.get('LLC-load-misses') is not None:
+            llc = (r['LLC-load-misses'] + (r.get('LLC-store-misses') or 0)) / thruput
+        elif r.get('cache-misses') is not None:
+            llc = per('cache-misses')
+        return {'cycles_per_op': per('cycles'), 'instructions_per_op': per('instructions'),
+                'ipc': r['instructions'] / r['cycles'] if r.get('instructions') is not None and r.get('cycles') else None,
+                'llc_misses_per_op': llc, 'cs_per_op': per('context-switches'),
+                'migrations_per_op': per('cpu-migrations'), 'rates': r}
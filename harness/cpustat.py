@@ -0,0 +1,114 @@
+"""
+Per-core CPU utilization from /proc/stat, sampled in the background while a
+benchmark runs, to tell client-bound measurements from server-bound ones.
+"""
+from threading import Thread, Event
+import time
+
+from . import proc
+from .topology import cpulist_str
+
+# a core set (or the cores of one of its processes) whose mean utilization is
+# at least this is considered saturated
+saturated_util = 0.9
+
+def read_stat():
+    """
+    Returns {cpu: (busy jiffies, total jiffies)} for every cpu in /proc/stat.
+    """
+    ret = dict()
+    with open('/proc/stat', 'r') as f:
+        for line in f:
+            if not line.startswith('cpu') or line.startswith('cpu '):
+                continue
+            fs = line.split()
+            # user nice system idle iowait irq softirq steal (guest time is
+            # already counted in user)
+            vs = [int(v) for v in fs[1:9]]
+            total = sum(vs)
+            ret[int(fs[0][3:])] = (total - vs[3] - vs[4], total)
+    return ret
+
+class CpuSampler:
+    """
+    Samples /proc/stat every `interval` seconds between start() and stop().
+    """
+    def __init__(self, interval:float=0.5):
+        self.interval = interval
+        self.samples = [] # (time, read_stat())
+        self.done = Event()
+        self.thread = None
+
+    def _run(self):
+        while True:
+            self.samples.append((time.time(), read_stat()))
+            if self.done.wait(self.interval):
+                break
+        self.samples.append((time.time(), read_stat()))
+
+    def start(self):
+        if proc.global_args.dry_run:
+            return self
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.done.set()
+            self.thread.join()
+            self.thread = None
+
+    def utilization(self, cores, last:float=None):
+        """
+        Returns {core: busy fraction} over the sampled time, or only over the
+        last `last` seconds of it (e.g. the steady part of the run).
+        """
+        if len(self.samples) < 2:
+            return {}
+        t1, s1 = self.samples[-1]
+        t0, s0 = self.samples[0]
+        if last is not None:
+            for t, s in self.samples:
+                if t >= t1 - last:
+                    t0, s0 = t, s
+                    break
+            if t0 == t1:
+                t0, s0 = self.samples[-2]
+        ret = dict()
+        for c in cores:
+            if c not in s0 or c not in s1:
+                continue
+            busy = s1[c][0] - s0[c][0]
+            total = s1[c][1] - s0[c][1]
+            ret[c] = busy / total if total > 0 else 0.0
+        return ret
+
+def util_summary(util:dict):
+    """
+    Summarizes a utilization(...) result as {'mean', 'max', 'per_core'}.
+    """
+    if len(util) == 0:
+        return None
+    return {'mean': sum(util.values()) / len(util), 'max': max(util.values()),
+            'per_core': {str(c): u for c, u in sorted(util.items())}}
+
+def saturation(summary:dict, groups:list[list[int]]=None):
+    """
+    Returns why the core set of a util_summary is saturated, or None if it
+    isn't: its mean utilization is at least saturated_util, or that of one of
+    groups (e.g. the cores of each go-ycsb process) is.
+    """
+    if summary is None:
+        return None
+    if summary['mean'] >= saturated_util:
+        return "mean utilization {0:.2f}".format(summary['mean'])
+    per = summary['per_core']
+    for i, g in enumerate(groups or []):
+        us = [per[str(c)] for c in g if str(c) in per]
+        if len(us) > 0 and sum(us) / len(us) >= saturated_util:
+            return "process {0} at {1:.2f} on cpus {2}".format(i, sum(us) / len(us), cpulist_str(g))
+    return None
+
+def is_saturated(summary:dict, groups:list[list[int]]=None):
+    return saturation(summary, groups) is not None
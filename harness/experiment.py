@@ -0,0 +1,590 @@
+"""
+Runs experiments described by specs (see spec.py).
+
+run_experiment() brings up the service (or waits for a remote one), runs the
+experiment's search strategy and tears everything down again. Results go to
+files named after the service in the output directory:
+    peak:      <service>_peak_raw.jsons (every point), <service>_peaks.jsons
+    lt:        <service>_lt.jsons (closed loop), <service>_open_lt.jsons
+    fixed:     <service>_fixed.jsons
+    migration: shard_migration.dat (timeline), shard_migration_events.jsons
+    profiled:  <service>_profiled.jsons (the result point, run again profiled;
+               see profile.py), with the profiles under profiles/
+A finished experiment is recorded in the index, so re-running a spec skips it
+(and an interrupted one resumes point by point).
+
+Before it runs, every experiment gets its cores and ports from an Allocator:
+literal core sets are claimed, core counts are allocated following the
+experiment's placement policy (see placement.py), and a local cluster gets a
+free block of ports. The resulting plan is recorded with every result. A spec with a "network"
+runs its local cluster as emulated nodes in network namespaces (see netns.py). With jobs > 1, run_specs packs experiments whose
+allocations succeed side by side into waves that run concurrently, and then
+checks for interference (shared caches, memory bandwidth, NICs) by measuring
+experiments of the wave again on their own; see check_interference.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+import json
+import threading
+import time
+
+from .proc import outpath, stop_proc
+from .topology import cpulist_str
+from .index import index, point_key
+from .ready import wait_ready, redis_ping
+from .cluster import start_memkv_multiserver, coord_addr, memkvctl
+from .alloc import Allocator, AllocError
+from .placement import server_cpus, client_cpus, describe
+from .netns import EmulatedNet
+from .profile import Profiler, defaults as profile_defaults
+from .point import bench_point, point_thruput
+from .search import find_peak
+from .spec import SpecError, load_spec, validate
+from . import timeline
+from .samples import sample_props, read_samples, op_names, op_points
+from .series import new_sample_path
+from .ycsb import start_goycsb, read_reports
+
+def allocate(exp:dict, alloc:Allocator):
+    """
+    Gives exp its cores and ports (in exp['alloc']), or raises AllocError with
+    nothing allocated.
+    """
+    a = {'srvs': [], 'clnts': [], 'ports': []}
+    exp['alloc'] = a
+    pl = exp['placement']
+    try:
+        if exp['hosts'] is None:
+            for i, cores in enumerate(exp['topology']['srvs']):
+                a['srvs'].append(server_cpus(alloc, cores, i, pl['policy']) if isinstance(cores, int)
+                                 else alloc.claim(cores))
+            a['ports'] = alloc.ports_for(1 + len(exp['topology']['srvs']))
+        if pprof_clients(exp):
+            a['pprof_ports'] = alloc.ports_for(exp['clients']['procs'])
+        if isinstance(exp['clnts'], int):
+            a['clnts'] = client_cpus(alloc, exp['clnts'], a['srvs'], pl['clients'])
+        else:
+            a['clnts'] = alloc.claim(exp['clnts'])
+    except AllocError:
+        release(exp, alloc)
+        raise
+    a['plan'] = describe(a['srvs'], a['clnts'], pl)
+    return a
+
+def release(exp:dict, alloc:Allocator):
+    a = exp.pop('alloc', None)
+    if a is not None:
+        alloc.release([c for cores in a['srvs'] + [a['clnts']] for c in cores], a['ports'] + a.get('pprof_ports', []))
+
+def identity(exp:dict):
+    """
+    exp without what changes from run to run (its allocation), for indexing.
+    """
+    return {k: v for k, v in exp.items() if k != 'alloc'}
+
+def clnt_cores(exp:dict):
+    return exp['alloc']['clnts']
+
+def srv_corelists(exp:dict):
+    return exp['alloc']['srvs']
+
+def ports(exp:dict):
+    """
+    Returns the coordinator port and first shard port of exp's local cluster.
+    """
+    block = exp['alloc']['ports']
+    return {'coord': block[0], 'shard_base': block[1]}
+
+def service_addr(exp:dict):
+    if exp['hosts'] is not None:
+        return exp['hosts'][exp['service']]
+    return coord_addr(port=ports(exp)['coord'])
+
+def kv_props(exp:dict):
+    if exp['service'] == 'rediskv':
+        props = {'rediskv.addr': service_addr(exp)}
+    else:
+        props = {'memkv.coord': service_addr(exp)}
+    if exp['workload']['recordcount'] is not None:
+        props['recordcount'] = int(exp['workload']['recordcount'])
+    return props
+
+def goycsb_kwargs(exp:dict):
+    """
+    go-ycsb arguments (for goycsb_args) that come from the experiment.
+    """
+    return {'kvname': exp['service'], 'props': kv_props(exp),
+            'warmup': exp['workload']['warmup'], 'distribution': exp['workload']['distribution']}
+
+def server_cores(exp:dict):
+    if exp['hosts'] is not None:
+        return None
+    return [c for srv in srv_corelists(exp) for c in srv]
+
+def config_name(exp:dict):
+    """
+    The topology's name (with the emulated RTT, e.g. 2s4c@0.5ms), or the
+    service's for a remote one.
+    """
+    if exp['topology'] is None:
+        return exp['service']
+    if exp['network'] is not None:
+        return '{0}@{1:g}ms'.format(exp['topology']['name'], exp['network']['rtt'])
+    return exp['topology']['name']
+
+def shard_addr(exp:dict, shard:int):
+    net = exp['alloc'].get('net')
+    return "{0}:{1}".format("127.0.0.1" if net is None else net.host(shard), ports(exp)['shard_base'] + shard)
+
+def pprof_clients(exp:dict):
+    """
+    Whether exp's go-ycsb processes need pprof ports of their own.
+    """
+    pr = exp['profile']
+    return pr is not None and 'pprof' in pr['kinds'] and 'client' in pr['targets']
+
+def profile_all(exp:dict):
+    return exp['profile'] is not None and exp['profile']['points'] == 'all'
+
+def profiler(exp:dict, threads:int):
+    """
+    A Profiler for one point of exp.
+    """
+    info = {'client': {'cpus': clnt_cores(exp),
+                       'pprof': ["127.0.0.1:{0}".format(p) for p in exp['alloc'].get('pprof_ports', [])]},
+            'server': {'cpus': server_cores(exp), 'pprof': exp['profile']['server_pprof']}}
+    return Profiler(exp['profile'], '{0}-{1}-{2}t'.format(exp['service'], config_name(exp), threads), info)
+
+def point(exp:dict, threads:int, outfilename:str, target:int=-1, extra:dict=None, profile:bool=False):
+    """
+    Measures one point of exp with bench_point; profiled if profile is set,
+    or if exp profiles all of its points.
+    """
+    w = exp['workload']
+    kwargs = goycsb_kwargs(exp)
+    props = kwargs.pop('props')
+    if target > 0:
+        props['measurement.intended'] = 'true'
+    extra = dict({'config': config_name(exp)}, **(extra or {}))
+    if exp['network'] is not None:
+        extra['network'] = exp['network']
+    key = {'experiment': identity(exp), 'threads': threads, 'target': target, 'extra': extra, 'file': outfilename}
+    return bench_point(exp['service'], threads, result_file(exp, outfilename), w['runtime'], w['valuesize'],
+                       w['read'], w['update'], clnt_cores(exp), target=target, extra=extra,
+                       clients=exp['clients']['procs'], numa=exp['clients']['numa'],
+                       server_cores=server_cores(exp), key=key, placement=exp['alloc']['plan'],
+                       membind=exp['placement']['membind'],
+                       profiler=profiler(exp, threads) if profile or profile_all(exp) else None,
+                       counters=exp['counters'],
+                       steady_tol=exp['search'].get('steady_tol', 0.02), batch=exp['search'].get('batch', 1.0),
+                       props=props, **kwargs)
+
+def result_file(exp:dict, suffix:str):
+    return exp['service'] + '_' + suffix
+
+def start_service(exp:dict):
+    """
+    Starts memkv on exp's topology (on an emulated network, if exp has one),
+    or waits for the remote service in hosts. Returns what stop_service needs
+    to take it down again.
+    """
+    if exp['hosts'] is None:
+        net = None
+        if exp['network'] is not None:
+            net = EmulatedNet(ports(exp)['coord'], len(srv_corelists(exp)), exp['network']).up()
+            exp['alloc']['net'] = net
+        try:
+            return start_memkv_multiserver(srv_corelists(exp), register=exp['strategy'] != 'migration',
+                                           coord_port=ports(exp)['coord'], base_port=ports(exp)['shard_base'],
+                                           membind=exp['placement']['membind'], net=net)
+        except Exception:
+            stop_service(exp, [])
+            raise
+    host, port = service_addr(exp).split(':')
+    wait_ready(host, int(port), ping=redis_ping if exp['service'] == 'rediskv' else None)
+    return []
+
+def stop_service(exp:dict, ps:list):
+    for p in ps:
+        stop_proc(p)
+    net = exp['alloc'].pop('net', None)
+    if net is not None:
+        net.down()
+
+def run_peak(exp:dict):
+    """
+    Searches for the number of client threads that maximizes throughput;
+    returns the result of find_peak, plus whether the client cores were
+    saturated in any run at the peak thread count.
+    """
+    saturated = dict()
+    counters = dict()
+    def measure(threads):
+        p = point(exp, threads, 'peak_raw.jsons')
+        if p['client_saturated']:
+            saturated[threads] = p['client_saturation']
+        if p.get('counters') is not None:
+            counters[threads] = p['counters']
+        return point_thruput(p)
+    s = exp['search']
+    r = find_peak(measure, s.get('start', 1), s.get('max_threads', 1 << 14),
+                  repeats=s.get('repeats', 3), resolution=s.get('resolution', 0.05))
+    r['client_saturated'] = r['threads'] in saturated
+    if r['client_saturated']:
+        print("[WARNING] client cores were saturated at the peak ({0}); the peak may be client-bound".format(saturated[r['threads']]))
+    rec = {'name': config_name(exp), 'thruput': r['thruput'], 'clntthreads': r['threads'],
+           'thruput_ci': r['thruput_ci'], 'clntthreads_range': r['threads_range'],
+           'runs': r['runs'], 'client_saturated': r['client_saturated'], 'placement': exp['alloc']['plan']}
+    if exp['network'] is not None:
+        rec['network'] = exp['network']
+    if r['threads'] in counters:
+        # of the last run at the peak thread count
+        rec['counters'] = counters[r['threads']]
+    with open(outpath(result_file(exp, 'peaks.jsons')), 'a+') as outfile:
+        outfile.write(json.dumps(rec) + '\n')
+    return rec
+
+def default_threads(i:int):
+    if i < 5:
+        return i + 1
+    else:
+        return (i - 3) * 5
+
+def closed_lt(exp:dict):
+    """
+    Closed-loop sweep over client threads (search.threads, or 1-5 and then
+    steps of 5), stopping once throughput hasn't improved for search.patience
+    points.
+    """
+    s = exp['search']
+    threads = s.get('threads')
+    patience = s.get('patience', 5)
+    data = []
+    i = 0
+    last_good_index = 0
+    peak_thruput = 0
+    while i <= last_good_index + patience:
+        if threads is not None and i >= len(threads):
+            break
+        p = point(exp, threads[i] if threads is not None else default_threads(i), 'lt.jsons',
+                  extra={'mode': 'closed'})
+        data.append(p)
+        thput = point_thruput(p)[0]
+        if thput > peak_thruput:
+            last_good_index = i
+            peak_thruput = thput
+        i += 1
+    return data
+
+def peak_point(data:list[dict]):
+    """
+    Returns the point with the highest throughput of a sweep.
+    """
+    return max(data, key=lambda p: point_thruput(p)[0])
+
+def open_lt(exp:dict, peak:dict):
+    """
+    Open-loop sweep: offers a fixed rate (--target) at each fraction of the
+    peak throughput in search.open_fractions and records the latencies at
+    that offered load, with 'ratelimit' set to the offered rate.
+
+    With a rate limit, go-ycsb schedules operations at fixed intervals; using
+    many more threads than the closed-loop peak needed keeps a slow operation
+    from holding back the ones scheduled after it, and measurement.intended
+    makes latencies count from the scheduled start, so queueing shows up in
+    the tail the way it would for open-loop clients. Stops after two offered
+    rates the service can't keep up with. Each point records the peak its
+    rate is a fraction of.
+    """
+    s = exp['search']
+    peak_thput = point_thruput(peak)[0]
+    threads = max(s.get('open_threads', 256), 4 * peak['num_threads'])
+    data = []
+    behind = 0
+    for f in s.get('open_fractions', []):
+        target = max(int(f * peak_thput), 1)
+        p = point(exp, threads, 'open_lt.jsons', target=target, extra={'mode': 'open', 'offered_fraction': f, 'peak_thruput': peak_thput})
+        data.append(p)
+        thput = point_thruput(p)[0]
+        if thput < 0.95 * target:
+            print("[INFO] {0} only kept up with {1:.0f} of {2} ops/sec offered".format(exp['service'], thput, target))
+            behind += 1
+            if behind >= 2:
+                break
+    return data
+
+def run_lt(exp:dict):
+    data = closed_lt(exp)
+    if len(data) > 0 and len(exp['search'].get('open_fractions', [])) > 0:
+        data += open_lt(exp, peak_point(data))
+    return {'points': len(data)}
+
+def run_fixed(exp:dict):
+    p = point(exp, exp['search']['threads'], 'fixed.jsons')
+    thput, hw = point_thruput(p)
+    return {'thruput': thput, 'thruput_ci': hw}
+
+def result_threads(exp:dict, r:dict):
+    """
+    The thread count of the strategy's result point (the peak, or the fixed
+    thread count), or None if it has no single one.
+    """
+    if exp['strategy'] == 'peak':
+        return r['clntthreads']
+    if exp['strategy'] == 'fixed':
+        return exp['search']['threads']
+    return None
+
+def profile_result(exp:dict, r:dict):
+    """
+    Measures exp's result point once more, profiled, and returns the record.
+    """
+    threads = result_threads(exp, r)
+    p = point(exp, threads, 'profiled.jsons', extra={'profiled': True}, profile=True)
+    if p.get('profile') is not None:
+        print("[INFO] Profiles of {0} at {1} threads are in {2}".format(config_name(exp), threads, p['profile']['dir']))
+    return p
+
+def reconfigure(exp:dict, e:dict):
+    """
+    Applies one schedule event (see timeline.py) to exp's running cluster.
+    """
+    memkvctl(e['op'], shard_addr(exp, e['shard']) if e['shard'] is not None else None, service_addr(exp))
+
+def event_str(e:dict):
+    return e['op'] if e['shard'] is None else "{0} shard {1}".format(e['op'], e['shard'])
+
+def run_migration(exp:dict):
+    """
+    Runs a load at fixed threads while the cluster is reconfigured on
+    search.schedule (shards added, removed, rebalanced; see timeline.py), with
+    every event and every go-ycsb report stamped on the same clock: seconds
+    since the load started. Writes the timeline to shard_migration.dat as
+    `time,ops/sec,errors/sec` lines and each event with what it cost (dip,
+    time to recover, errors) to shard_migration_events.jsons.
+    """
+    s = exp['search']
+    w = exp['workload']
+    interval = s.get('interval', 500)
+    schedule = timeline.expand_schedule(s.get('schedule', []))
+    kwargs = goycsb_kwargs(exp)
+    sample_file = None
+    if s.get('sample_interval') is not None:
+        sample_file = new_sample_path(config_name(exp))
+        kwargs['props'].update(sample_props(s['sample_interval'], sample_file))
+    events = []
+    reports = []
+    t0 = time.monotonic()
+    wall0 = time.time()
+    done = threading.Event()
+
+    def run_schedule():
+        for e in schedule:
+            # events the run didn't last long enough for are dropped
+            if done.wait(max(e['at'] - (time.monotonic() - t0), 0)):
+                return
+            ev = dict(e, start=time.monotonic() - t0)
+            try:
+                reconfigure(exp, e)
+                ev['ok'] = True
+            except RuntimeError as err:
+                print("[WARNING] {0} failed: {1}".format(event_str(e), err))
+                ev['ok'] = False
+                ev['error'] = str(err)
+            ev['end'] = time.monotonic() - t0
+            events.append(ev)
+    threading.Thread(target=run_schedule, daemon=True).start()
+
+    p = start_goycsb(clnt_cores(exp), s['threads'], w['valuesize'], w['read'], w['update'],
+                     interval=interval, membind=exp['placement']['membind'], **kwargs)
+    if p is not None:
+        def on_report(r):
+            reports.append((time.monotonic() - t0, r))
+        read_reports(p, w['runtime'], on_report)
+    done.set()
+    metrics = [s.get('baseline', 5), s.get('tolerance', 0.1), s.get('hold', 1)]
+    points = timeline.rates(reports)
+    costs = timeline.analyze(points, list(events), *metrics)
+    with open(outpath('shard_migration.dat'), 'a+') as outfile:
+        outfile.write('# {0}: time (s),ops/sec,errors/sec\n'.format(config_name(exp)))
+        for pt in points:
+            outfile.write('{0:.3f},{1},{2}\n'.format(pt['t'], pt['thruput'], pt['errors']))
+    if sample_file is not None and path.exists(sample_file):
+        # the same metrics per operation type, at the sampling resolution
+        smp = read_samples(sample_file)
+        names = op_names(smp)
+        per_op = {op: op_points(smp, op, wall0) for op in names}
+        for op in names:
+            for c, oc in zip(costs, timeline.analyze(per_op[op], list(events), *metrics)):
+                c.setdefault('ops', dict())[op] = {k: oc[k] for k in
+                    ['baseline', 'dip', 'dip_depth', 'time_to_recover', 'errors', 'stalls', 'longest_stall']}
+        with open(outpath('shard_migration_ops.dat'), 'a+') as outfile:
+            outfile.write('# {0}: time (s),{1}\n'.format(config_name(exp), ",".join([op + ' ops/sec' for op in names])))
+            for row in zip(*[per_op[op] for op in names]):
+                outfile.write('{0:.3f},{1}\n'.format(row[0]['t'], ",".join([str(pt['thruput']) for pt in row])))
+    with open(outpath('shard_migration_events.jsons'), 'a+') as outfile:
+        for c in costs:
+            c['config'] = config_name(exp)
+            outfile.write(json.dumps(c) + '\n')
+    for c in costs:
+        print("[INFO] {0} at {1:.1f}s: dip {2}, recovered {3}, {4} errors, {5} stalled intervals".format(
+            event_str(c), c['start'], "n/a" if c['dip_depth'] is None else "{0:.0%}".format(c['dip_depth']),
+            "never" if c['time_to_recover'] is None else "after {0:.1f}s".format(c['time_to_recover']),
+            c['errors'], c['stalls']))
+    return {'reports': len(reports), 'events': costs}
+
+runners = {'peak': run_peak, 'lt': run_lt, 'fixed': run_fixed, 'migration': run_migration}
+
+def plan_str(plan:dict):
+    def where(w):
+        return "{0} (node {1}{2})".format(cpulist_str(w['cpus']), ",".join([str(n) for n in w['nodes']]),
+                                         ", SMT" if w['smt'] else "")
+    return "servers {0}, clients {1}".format(" / ".join([where(w) for w in plan['srvs']]) or "remote",
+                                             where(plan['clnts']))
+
+def run_experiment(exp:dict):
+    """
+    Runs one concrete experiment unless the index says it has been run
+    already. Returns its summary.
+    """
+    idx = index()
+    key = point_key({'experiment': identity(exp)})
+    if idx is not None and idx.get(key) is not None:
+        print("[INFO] Skipping {0} ({1}), already in the index".format(exp['name'], config_name(exp)))
+        return idx.get(key)
+
+    print("[INFO] Running {0} ({1}) on {2}".format(exp['name'], config_name(exp), plan_str(exp['alloc']['plan'])))
+    ps = start_service(exp)
+    try:
+        r = runners[exp['strategy']](exp)
+        if exp['profile'] is not None and exp['profile']['points'] == 'result':
+            r['profile'] = profile_result(exp, r).get('profile')
+    finally:
+        stop_service(exp, ps)
+    if idx is not None:
+        idx.add(key, r, {'experiment': identity(exp)})
+    return r
+
+def next_wave(pending:list[dict], jobs:int, alloc:Allocator):
+    """
+    Removes up to jobs experiments from pending, in order, that can be
+    allocated side by side (and don't share a remote service), allocates them
+    and returns them.
+    """
+    wave = []
+    remote = set()
+    for exp in list(pending):
+        if len(wave) >= jobs:
+            break
+        if exp['hosts'] is not None and service_addr(exp) in remote:
+            continue
+        try:
+            allocate(exp, alloc)
+        except AllocError as e:
+            if len(wave) == 0:
+                raise AllocError("{0} ({1}) doesn't fit on this host: {2}".format(exp['name'], config_name(exp), e))
+            continue
+        if exp['hosts'] is not None:
+            remote.add(service_addr(exp))
+        wave.append(exp)
+        pending.remove(exp)
+    return wave
+
+# relative throughput difference beyond which a concurrent measurement counts
+# as disturbed (if the confidence intervals don't overlap either)
+interference_tolerance = 0.05
+
+def check_interference(exp:dict, r:dict, wave:list[dict]):
+    """
+    Measures exp's result point (the peak, or the fixed thread count) again
+    with nothing else running and compares it with the measurement taken
+    alongside the rest of wave. Appends the comparison to interference.jsons
+    and returns it, or None if the strategy has no single point to compare.
+    """
+    threads = result_threads(exp, r)
+    if threads is None:
+        return None
+    alone_exp = identity(exp)
+    alone_exp['alloc'] = exp['alloc']
+    ps = start_service(alone_exp)
+    try:
+        p = point(alone_exp, threads, 'interference.jsons', extra={'check': 'alone'})
+    finally:
+        stop_service(alone_exp, ps)
+    alone, alone_hw = point_thruput(p)
+    diff = (r['thruput'] - alone) / alone if alone > 0 else None
+    overlap = (r['thruput_ci'] is not None and alone_hw is not None and
+               abs(r['thruput'] - alone) <= r['thruput_ci'] + alone_hw)
+    c = {'config': config_name(exp), 'threads': threads, 'concurrent': r['thruput'], 'alone': alone,
+         'diff': diff, 'wave': [config_name(e) for e in wave],
+         'interfered': diff is not None and abs(diff) > interference_tolerance and not overlap}
+    if c['interfered']:
+        print("[WARNING] {0} measured {1:+.1%} alongside {2} than alone; results of that wave are suspect".format(
+            c['config'], diff, ", ".join([n for n in c['wave'] if n != c['config']])))
+    with open(outpath('interference.jsons'), 'a+') as outfile:
+        outfile.write(json.dumps(c) + '\n')
+    return c
+
+def run_specs(filenames:list[str], clients:int=None, numa:bool=None, only:list[str]=None,
+              jobs:int=1, check:str='one', placement:str=None, membind:bool=None, profile:str=None,
+              counters:bool=None, steady_tol:float=None):
+    """
+    Loads every spec file up front and checks it again with the overrides
+    below applied (so a bad spec or override fails before anything runs), then
+    runs their experiments in order. clients/numa override the specs' client
+    process settings and placement/membind their placement policy and memory
+    binding; only restricts the run to the named configs. profile (a backend,
+    see profile.py) profiles the result point of every peak and fixed
+    experiment without a profile spec, and overrides the backend of those
+    with one. counters turns on hardware counters (see counters.py), and
+    steady_tol overrides search.steady_tol.
+
+    With jobs > 1, up to jobs experiments that can be allocated side by side
+    run at once (see next_wave). After each wave of more than one experiment, check ('one',
+    'all' or 'none') says how many of its experiments to measure again alone
+    with check_interference.
+    """
+    exps = [exp for f in filenames for exp in load_spec(f)]
+    if only is not None:
+        exps = [exp for exp in exps if config_name(exp) in only]
+    for exp in exps:
+        if clients is not None:
+            exp['clients']['procs'] = clients
+        if numa is not None:
+            exp['clients']['numa'] = numa
+        if placement is not None:
+            exp['placement']['policy'] = placement
+        if membind is not None:
+            exp['placement']['membind'] = membind
+        if counters is not None:
+            exp['counters'] = counters
+        if steady_tol is not None:
+            exp['search']['steady_tol'] = steady_tol
+        if profile is not None:
+            if exp['profile'] is not None:
+                exp['profile']['backend'] = profile
+            elif exp['strategy'] in ['peak', 'fixed']:
+                exp['profile'] = dict(profile_defaults, backend=profile)
+        try:
+            validate(exp)
+        except SpecError as e:
+            raise SpecError("{0}: {1}".format(config_name(exp), e))
+    alloc = Allocator()
+    results = []
+    pending = list(exps)
+    while len(pending) > 0:
+        wave = next_wave(pending, max(jobs, 1), alloc)
+        if len(wave) > 1:
+            print("[INFO] Running {0} side by side".format(", ".join([config_name(e) for e in wave])))
+        try:
+            with ThreadPoolExecutor(max_workers=len(wave)) as pool:
+                rs = list(pool.map(run_experiment, wave))
+            if len(wave) > 1 and check != 'none':
+                checkable = [(exp, r) for exp, r in zip(wave, rs) if exp['strategy'] in ['peak', 'fixed']]
+                for exp, r in checkable[:1 if check == 'one' else len(checkable)]:
+                    check_interference(exp, r, wave)
+        finally:
+            for exp in wave:
+                release(exp, alloc)
+        results += rs
+    return results
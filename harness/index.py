@@ -0,0 +1,102 @@
+"""
+On-disk index of completed data points, so an interrupted sweep can be re-run
+and pick up where it stopped.
+
+Every point is keyed by everything that determines its result: the
+configuration, workload parameters and thread count, plus the source revision
+of go-ycsb and gokv (the same one the binary cache uses). The index is an
+append-only JSONL file, outdir/index.jsons, of
+    {'key': ..., 'params': {...}, 'record': {...}}
+lines. Re-running a driver replays recorded points instead of measuring them
+again; since the peak search is deterministic given its measurements, a
+replayed search retraces its steps and resumes measuring at the first point it
+hadn't reached. Points are only reused with the same source revision, so
+changing the code measures everything afresh.
+"""
+from os import path
+from threading import Lock
+import hashlib
+import json
+
+from . import proc
+from .build import cache_key
+
+_revision = None
+
+def revision():
+    global _revision
+    if _revision is None:
+        _revision = cache_key('go-ycsb')
+    return _revision
+
+def point_key(params:dict):
+    """
+    Returns the index key for a point with the given (JSON-able) parameters at
+    the current source revision.
+    """
+    s = json.dumps({'params': params, 'rev': revision()}, sort_keys=True, default=list)
+    return hashlib.sha256(s.encode()).hexdigest()[:24]
+
+class Index:
+    def __init__(self, filename:str):
+        self.filename = filename
+        # key -> [record, ...] in the order they were measured
+        self.records = dict()
+        # key -> how many of its records have been handed out by next()
+        self.used = dict()
+        self.lock = Lock()
+        if path.exists(filename):
+            with open(filename, 'r') as f:
+                for line in f:
+                    if line.strip() == '':
+                        continue
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        # a line cut short by the run dying; drop it
+                        continue
+                    self.records.setdefault(e['key'], []).append(e['record'])
+
+    def next(self, key:str):
+        """
+        Returns the next not yet replayed record for key, or None if it has to
+        be measured. Repeated measurements of the same point (e.g. resamples in
+        a peak search) are replayed in order.
+        """
+        with self.lock:
+            i = self.used.get(key, 0)
+            rs = self.records.get(key, [])
+            if i >= len(rs):
+                return None
+            self.used[key] = i + 1
+            return rs[i]
+
+    def get(self, key:str):
+        """
+        Returns the last record for key, or None.
+        """
+        rs = self.records.get(key, [])
+        return rs[-1] if len(rs) > 0 else None
+
+    def add(self, key:str, record:dict, params:dict=None):
+        with self.lock:
+            self.records.setdefault(key, []).append(record)
+            self.used[key] = self.used.get(key, 0) + 1
+            with open(self.filename, 'a+') as f:
+                f.write(json.dumps({'key': key, 'params': params, 'record': record}, default=list) + '\n')
+
+_index = None
+_index_lock = Lock()
+
+def index():
+    """
+    Returns the index of the output directory, or None if points shouldn't
+    be reused (dry runs and --rerun).
+    """
+    global _index
+    with _index_lock:
+        if proc.global_args.dry_run or getattr(proc.global_args, 'rerun', False):
+            return None
+        if _index is None or _index.filename != proc.outpath('index.jsons'):
+            _index = Index(proc.outpath('index.jsons'))
+        return _index
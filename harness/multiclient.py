@@ -0,0 +1,164 @@
+"""
+Load generation with several go-ycsb processes, so a single client process
+can't be what limits throughput.
+
+Each process gets its own slice of the client cores (optionally only cores of
+one NUMA node) and its share of the threads. Their outputs are read
+concurrently and merged interval by interval into one stream of reports that
+looks like a single go-ycsb's, so SteadyState and Series work unchanged.
+"""
+from queue import Queue
+from threading import Thread
+
+from .proc import goycsbdir, start_command, stop_proc, many_cores
+from .series import Series
+from .topology import cpu_node
+from .ycsb import goycsb_args, ReportParser, report_time, report_thruput
+
+def split_cores(cores, nprocs:int, numa:bool=False):
+    """
+    Splits cores into nprocs disjoint, contiguous core lists. With numa, each
+    list only has cores of one node and processes are spread evenly over the
+    nodes.
+    """
+    cores = list(cores)
+    if nprocs > len(cores):
+        raise ValueError("{0} client processes but only {1} client cores".format(nprocs, len(cores)))
+    if not numa:
+        groups = [cores]
+        counts = [nprocs]
+    else:
+        bynode = dict()
+        for c in cores:
+            bynode.setdefault(cpu_node(c), []).append(c)
+        groups = [bynode[n] for n in sorted(bynode)]
+        counts = [nprocs // len(groups) + (1 if i < nprocs % len(groups) else 0) for i in range(len(groups))]
+        for g, k in zip(groups, counts):
+            if k > len(g):
+                raise ValueError("{0} client processes don't fit on a node with {1} cores".format(k, len(g)))
+    ret = []
+    for g, k in zip(groups, counts):
+        for i in range(k):
+            ret.append(g[i * len(g) // k:(i + 1) * len(g) // k])
+    return ret
+
+def split_threads(threads:int, nprocs:int):
+    return [threads // nprocs + (1 if i < threads % nprocs else 0) for i in range(nprocs)]
+
+def merge_reports(reports:list[dict]):
+    """
+    Merges one report from each process into one. Counts and throughputs add
+    up, the average latency is weighted by count, min/max are the overall
+    min/max. Percentiles can't be merged exactly from go-ycsb's summaries, so
+    the merged pXX is the largest per-process pXX (an upper bound).
+    """
+    merged = dict()
+    for op in set([op for r in reports for op in r]):
+        recs = [r[op] for r in reports if op in r]
+        count = sum([rec.get('count', 0) for rec in recs])
+        m = dict()
+        for k in recs[0]:
+            vs = [rec[k] for rec in recs if k in rec]
+            if k == 'time':
+                m[k] = sum(vs) / len(vs)
+            elif k in ['count', 'thruput']:
+                m[k] = sum(vs)
+            elif k == 'avg_latency':
+                m[k] = sum([rec[k] * rec.get('count', 0) for rec in recs if k in rec]) / count if count > 0 else vs[0]
+            elif k == 'min_latency':
+                m[k] = min(vs)
+            else:
+                m[k] = max(vs)
+        merged[op] = m
+    return merged
+
+def client_skew(reports:list[dict]):
+    """
+    Summarizes how evenly the work was spread over the processes, from the
+    last report of each.
+    """
+    thputs = [report_thruput(r) for r in reports]
+    mean = sum(thputs) / len(thputs) if len(thputs) > 0 else 0
+    return {'thruput': thputs,
+            'skew': (max(thputs) - min(thputs)) / mean if mean > 0 else None}
+
+def _read(i, p, queue):
+    parser = ReportParser()
+    for line in iter(p.stdout.readline, ""):
+        for r in parser.feed(line):
+            queue.put((i, r))
+    for r in parser.flush():
+        queue.put((i, r))
+    queue.put((i, None))
+
+def goycsb_bench_multi(nprocs:int, threads:int, runtime:int, valuesize:int, readprop:float, updateprop:float,
+                       bench_cores:list[int], numa:bool=False, series_path:str=None, steady=None,
+                       membind:bool=False, proc_props:list[dict]=None, **kwargs):
+    """
+    Like goycsb_bench, but with threads spread over nprocs go-ycsb processes,
+    each pinned to its own part of bench_cores (see split_cores). Returns
+    (merged report, info) where info has each process's cores, threads and
+    throughput, and the relative spread ('skew') of those throughputs. Runs
+    with fewer threads than nprocs use one process per thread. membind binds
+    each process's memory to the NUMA nodes of its cores. proc_props, if
+    given, holds extra -p properties for each process, e.g. where it serves
+    pprof. A target rate is split over the processes by their threads.
+    """
+    nprocs = max(min(nprocs, threads), 1)
+    corelists = split_cores(bench_cores, nprocs, numa)
+    threadss = split_threads(threads, nprocs)
+    # a rate limit is for all processes together
+    target = kwargs.get('target', -1)
+    targets = [max(round(target * t / threads), 1) for t in threadss] if target > 0 else None
+    def proc_kwargs(i):
+        kw = kwargs if targets is None else dict(kwargs, target=targets[i])
+        if proc_props is None or len(proc_props[i]) == 0:
+            return kw
+        return dict(kw, props=dict(kw.get('props') or {}, **proc_props[i]))
+    ps = [start_command(many_cores(goycsb_args(t, valuesize, readprop, updateprop, **proc_kwargs(i)), c, membind),
+                        cwd=goycsbdir)
+          for i, (c, t) in enumerate(zip(corelists, threadss))]
+    info = {'procs': nprocs, 'cores': corelists, 'threads': threadss}
+    if any([p is None for p in ps]):
+        return {}, info
+
+    queue = Queue()
+    readers = [Thread(target=_read, args=(i, p, queue), daemon=True) for i, p in enumerate(ps)]
+    for t in readers:
+        t.start()
+
+    series = Series() if series_path is not None else None
+    # reports of every process, merged as soon as all processes have reported
+    # for an interval
+    pending = [[] for _ in ps]
+    last = [dict() for _ in ps]
+    ret = dict()
+    while True:
+        i, r = queue.get()
+        if r is None:
+            # one process ended early; nothing more can be merged
+            break
+        pending[i].append(r)
+        last[i] = r
+        if any([len(q) == 0 for q in pending]):
+            continue
+        ret = merge_reports([q.pop(0) for q in pending])
+        if series is not None:
+            series.add(ret)
+        if steady is not None and steady.add(ret):
+            break
+        if report_time(ret) >= runtime:
+            break
+    for p in ps:
+        stop_proc(p)
+    for t in readers:
+        t.join()
+    for p in ps:
+        p.stdout.close()
+
+    if series is not None:
+        series.save(series_path)
+    info.update(client_skew(last))
+    if steady is not None:
+        return steady.result(), info
+    return ret, info
@@ -0,0 +1,140 @@
+"""
+Emulated multi-node memkv clusters on one host.
+
+Every shard server runs in its own network namespace, connected by a veth
+pair to a bridge in the root namespace where the coordinator and go-ycsb
+run, so all RPCs between clients, coordinator and shards go over a (virtual)
+network link instead of loopback. Each link can be shaped with tc netem: a
+round-trip delay (split evenly over both directions) with optional jitter,
+a rate limit and packet loss, e.g.
+
+    {'rtt': 0.5, 'jitter': 0.05, 'rate': '10gbit', 'loss': 0,
+     'shards': [{'rtt': 2.0}]}
+
+where entries of 'shards' override the link of the shard with that index.
+Setting it up takes root and iproute2 (ip, tc).
+
+Names and addresses are derived from the cluster's coordinator port, so
+clusters allocated side by side (see alloc.py) get their own bridge and
+subnet: bridge gk<port>, namespaces gk<port>s<i>, subnet 10.<port/256>.<port%256>.0/24
+with the bridge on .1 and shard i on .i+2.
+"""
+from os import path
+import atexit
+import shutil
+
+from .proc import run_command
+
+# where `ip netns add` puts named namespaces
+netns_dir = '/run/netns'
+
+link_defaults = {'rtt': 0, 'jitter': 0, 'rate': None, 'loss': 0}
+link_fields = list(link_defaults.keys()) + ['shards']
+
+def link(network:dict, shard:int):
+    """
+    Returns the link parameters of shard: network's, with its per-shard
+    overrides applied.
+    """
+    ret = dict(link_defaults)
+    ret.update({k: v for k, v in network.items() if k in link_defaults})
+    shards = network.get('shards') or []
+    if shard < len(shards):
+        ret.update(shards[shard])
+    return ret
+
+def netem_args(l:dict):
+    """
+    tc netem parameters for one direction of link l, or [] if it isn't shaped.
+    """
+    args = []
+    if l['rtt'] > 0:
+        args += ['delay', '{0}ms'.format(l['rtt'] / 2)]
+        if l['jitter'] > 0:
+            args += ['{0}ms'.format(l['jitter'] / 2)]
+    if l['loss'] > 0:
+        args += ['loss', '{0}%'.format(l['loss'])]
+    if l['rate'] is not None:
+        args += ['rate', str(l['rate'])]
+    return args
+
+# networks that are up, so they can be taken down if the run dies
+_nets = []
+
+class EmulatedNet:
+    def __init__(self, port:int, nshards:int, network:dict):
+        self.port = port
+        self.nshards = nshards
+        self.network = network
+        self.bridge = 'gk{0}'.format(port)
+        self.subnet = '10.{0}.{1}'.format((port >> 8) & 0xff, port & 0xff)
+
+    def ns(self, shard:int):
+        return '{0}s{1}'.format(self.bridge, shard)
+
+    def host(self, shard:int=None):
+        """
+        Address of shard, or of the bridge (the root namespace) if shard is None.
+        """
+        return '{0}.{1}'.format(self.subnet, 1 if shard is None else shard + 2)
+
+    def wrap(self, shard:int, args:list[str]):
+        """
+        Returns the command line running args inside shard's namespace.
+        """
+        return ['ip', 'netns', 'exec', self.ns(shard)] + args
+
+    def _run(self, args:list[str]):
+        p = run_command(args)
+        if p is not None and p.returncode != 0:
+            raise RuntimeError("{0} failed:\n{1}".format(" ".join(args), p.stderr))
+
+    def up(self):
+        """
+        Creates the bridge and the shard namespaces and shapes their links.
+        """
+        for tool in ['ip', 'tc']:
+            if shutil.which(tool) is None:
+                raise RuntimeError("emulating a network needs {0} (iproute2)".format(tool))
+        # leftovers of a run that was killed before it could clean up
+        self.down(quiet=True)
+        _nets.append(self)
+        self._run(['ip', 'link', 'add', self.bridge, 'type', 'bridge'])
+        self._run(['ip', 'addr', 'add', self.host() + '/24', 'dev', self.bridge])
+        self._run(['ip', 'link', 'set', self.bridge, 'up'])
+        for i in range(self.nshards):
+            ns = self.ns(i)
+            # the root namespace end is named after the namespace, the other
+            # end is eth0 inside it
+            self._run(['ip', 'netns', 'add', ns])
+            self._run(['ip', 'link', 'add', ns, 'type', 'veth', 'peer', 'name', 'eth0', 'netns', ns])
+            self._run(['ip', 'link', 'set', ns, 'master', self.bridge, 'up'])
+            self._run(['ip', '-n', ns, 'addr', 'add', self.host(i) + '/24', 'dev', 'eth0'])
+            self._run(['ip', '-n', ns, 'link', 'set', 'eth0', 'up'])
+            self._run(['ip', '-n', ns, 'link', 'set', 'lo', 'up'])
+            shape = netem_args(link(self.network, i))
+            if len(shape) > 0:
+                self._run(['tc', 'qdisc', 'add', 'dev', ns, 'root', 'netem'] + shape)
+                self._run(['ip', 'netns', 'exec', ns, 'tc', 'qdisc', 'add', 'dev', 'eth0', 'root', 'netem'] + shape)
+        print("[INFO] Emulated network {0} with {1} shard node(s) is up".format(self.bridge, self.nshards))
+        return self
+
+    def down(self, quiet:bool=False):
+        """
+        Removes the namespaces (and with them their veth pairs) and the bridge.
+        """
+        for i in range(self.nshards):
+            if not path.exists(path.join(netns_dir, self.ns(i))):
+                continue
+            p = run_command(['ip', 'netns', 'del', self.ns(i)])
+            if not quiet and p is not None and p.returncode != 0:
+                print("[WARNING] Could not remove network namespace {0}: {1}".format(self.ns(i), p.stderr.strip()))
+        run_command(['ip', 'link', 'del', self.bridge])
+        if self in _nets:
+            _nets.remove(self)
+
+def cleanup_nets():
+    for net in list(_nets):
+        net.down()
+
+atexit.register(cleanup_nets)
@@ -0,0 +1,79 @@
+"""
+Pinning plans: which cpus a local memkv cluster's shards and its go-ycsb
+clients get, chosen by policy from the host's sockets, NUMA nodes and SMT
+siblings. Set per experiment in the spec's "placement" section:
+
+    policy   compact:  shards packed onto as few NUMA nodes as possible, using
+                       both hardware threads of a physical core before the next
+             physical: packed the same way, but one thread per physical core
+                       with its siblings left idle (what no_hyper.sh gets at by
+                       taking them offline)
+             spread:   each shard's cores dealt round-robin over the NUMA nodes,
+                       successive shards starting on successive nodes; one
+                       thread per physical core
+    clients  any:      wherever there is room
+             local:    on the NUMA nodes the servers run on
+             remote:   on a socket the servers don't use, so every request and
+                       reply crosses the socket interconnect
+    membind  bind each process's memory to the nodes of its own cpus
+             (numactl --membind) instead of leaving it to first touch
+
+Policies only apply to core counts; literal core sets in a spec are used as
+they are. Either way, describe() records what the plan came out as, and that
+record goes with every result of the experiment.
+"""
+from .alloc import AllocError, Allocator
+from .topology import cpu_node, cpu_package, cpu_siblings
+
+policies = ['compact', 'physical', 'spread']
+client_policies = ['any', 'local', 'remote']
+
+def nodes_of(cpus):
+    return sorted(set([cpu_node(c) for c in cpus]))
+
+def sockets_of(cpus):
+    return sorted(set([cpu_package(c) for c in cpus]))
+
+def smt_shared(cpus):
+    """
+    Returns True if two of cpus are hardware threads of the same physical core.
+    """
+    cpus = set(cpus)
+    return any([len(set(cpu_siblings(c)) & cpus) > 1 for c in cpus])
+
+def server_cpus(alloc:Allocator, n:int, shard:int, policy:str):
+    """
+    Allocates n cpus for the shard with index shard under policy.
+    """
+    if policy == 'spread':
+        nodes = nodes_of(alloc.cpus)
+        k = shard % len(nodes)
+        return alloc.cpus_for(n, nodes=nodes[k:] + nodes[:k], spread=True)
+    return alloc.cpus_for(n, siblings=policy == 'compact')
+
+def client_cpus(alloc:Allocator, n:int, srvs:list[list[int]], where:str):
+    """
+    Allocates n client cpus placed relative to the server cpus srvs.
+    """
+    srv = [c for cpus in srvs for c in cpus]
+    if where == 'any' or len(srv) == 0:
+        return alloc.cpus_for(n)
+    if where == 'local':
+        return alloc.cpus_for(n, nodes=nodes_of(srv))
+    used = sockets_of(srv)
+    nodes = [i for i in nodes_of(alloc.cpus)
+             if all([cpu_package(c) not in used for c in alloc.cpus if cpu_node(c) == i])]
+    if len(nodes) == 0:
+        raise AllocError("no socket without servers on it for remote clients (servers on socket(s) {0})".format(
+            ",".join([str(s) for s in used])))
+    return alloc.cpus_for(n, nodes=nodes)
+
+def describe(srvs:list[list[int]], clnts:list[int], placement:dict):
+    """
+    Returns a record of a plan: the policy and, for every shard and the
+    clients, the cpus with their NUMA nodes and sockets and whether SMT
+    siblings share the work.
+    """
+    def where(cpus):
+        return {'cpus': list(cpus), 'nodes': nodes_of(cpus), 'sockets': sockets_of(cpus), 'smt': smt_shared(cpus)}
+    return dict(placement, srvs=[where(cpus) for cpus in srvs], clnts=where(clnts))
@@ -0,0 +1,147 @@
+"""
+One data point of a sweep: a go-ycsb run whose result is appended to a JSONL
+file in the output directory.
+"""
+from os import path
+from threading import Lock
+import json
+import math
+
+from . import proc
+from .series import new_series_path
+from .steady import SteadyState
+from .ycsb import goycsb_bench, report_thruput
+from .multiclient import goycsb_bench_multi
+from .index import index, point_key
+from .cpustat import CpuSampler, util_summary, saturation
+from .counters import PerfStat
+
+# bench_points may run concurrently (see experiment.run_specs)
+_write_lock = Lock()
+
+def bench_point(service:str, threads:int, outfilename:str, runtime:int, valuesize:int,
+                readprop:float, updateprop:float, bench_cores, target:int=-1, extra:dict=None,
+                clients:int=1, numa:bool=False, server_cores=None, key:dict=None, placement:dict=None,
+                profiler=None, counters:bool=False, steady_tol:float=0.02, batch:float=1.0, **kwargs):
+    """
+    Runs go-ycsb until throughput converges (or for at most runtime seconds),
+    appends a record of the form
+    {'service': 'memkv', 'num_threads': 64, 'ratelimit': -1, 'lts': {...},
+     'series': 'series/memkv-64t-....json.gz', 'steady': {...}}
+    (plus anything in extra, e.g. {'config': '1s2c'}) to outfilename and
+    returns it. With clients > 1, the threads are spread over that many go-ycsb
+    processes (see goycsb_bench_multi) and the record gets a 'clients' entry
+    with the per-process split and skew. Extra keyword arguments are passed to
+    goycsb_bench.
+
+    CPU utilization of bench_cores (and server_cores, if given) over the steady
+    part of the run is recorded under 'cpu', and 'client_saturated' /
+    'server_saturated' mark points where that core set was (nearly) fully busy,
+    i.e. where the measurement says more about the client than the server;
+    'client_saturation' / 'server_saturation' then say which criterion of
+    cpustat.saturation fired.
+    placement, the pinning plan the cores came from (see placement.describe),
+    is recorded as is.
+
+    With counters, perf stat counts hardware events on the same cores, and
+    'counters' has them per operation over the same steady window (see
+    counters.py), e.g. {'server': {'cycles_per_op': ..., 'ipc': ...}, ...}.
+
+    steady_tol and batch are the SteadyState tolerance (relative half-width
+    of the throughput's confidence interval at which the run ends) and batch
+    length in seconds.
+
+    With a profiler (see profile.py), the point is profiled while it runs
+    (which keeps it running until the profile is done, however soon it
+    converges) and the record gets a 'profile' entry listing the files.
+
+    Points already in the output directory's index (same parameters and source
+    revision) are returned from there instead of being measured again. key,
+    if given, replaces the arguments as the parameters identifying the point,
+    e.g. to leave out ports that differ from run to run.
+    """
+    params = key if key is not None else {'service': service, 'threads': threads, 'runtime': runtime, 'valuesize': valuesize,
+              'readprop': readprop, 'updateprop': updateprop, 'bench_cores': list(bench_cores),
+              'target': target, 'clients': clients, 'numa': numa, 'extra': extra,
+              'server_cores': None if server_cores is None else list(server_cores), 'kwargs': kwargs}
+    if key is None and profiler is not None:
+        params['profile'] = profiler.spec
+    if key is None and counters:
+        params['counters'] = True
+    if key is None and (steady_tol, batch) != (0.02, 1.0):
+        params['steady'] = {'tolerance': steady_tol, 'batch': batch}
+    idx = index()
+    key = point_key(params)
+    if idx is not None:
+        p = idx.next(key)
+        if p is not None:
+            print("[INFO] Reusing indexed {0} point with {1} threads".format(service, threads))
+            return p
+
+    series = new_series_path(service, str(threads) + 't')
+    steady = SteadyState(tolerance=steady_tol, batch=batch)
+    if profiler is not None:
+        warmup = kwargs.get('warmup', 20)
+        need = profiler.min_runtime(warmup)
+        steady = SteadyState(tolerance=steady_tol, batch=batch,
+                             min_batches=max(steady.min_batches, int(math.ceil(need / batch))))
+        runtime = max(runtime, need)
+        procs = max(min(clients, threads), 1)
+        if clients > 1:
+            kwargs['proc_props'] = [profiler.client_props(i) for i in range(procs)]
+        else:
+            kwargs['props'] = dict(kwargs.get('props') or {}, **profiler.client_props())
+    sampler = CpuSampler().start()
+    stat = PerfStat({'client': bench_cores, 'server': server_cores}).start() if counters else None
+    if profiler is not None:
+        profiler.start(warmup, procs)
+    if clients > 1:
+        a, info = goycsb_bench_multi(clients, threads, runtime, valuesize, readprop, updateprop, bench_cores,
+                                     numa=numa, series_path=series, steady=steady, target=target, **kwargs)
+    else:
+        a = goycsb_bench(threads, runtime, valuesize, readprop, updateprop, bench_cores,
+                         series_path=series, steady=steady, target=target, **kwargs)
+    sampler.stop()
+    if stat is not None:
+        stat.stop()
+    p = {'service': service, 'num_threads': threads, 'ratelimit': target, 'lts': a,
+         'series': path.relpath(series, proc.global_args.outdir), 'steady': steady.info()}
+    if clients > 1:
+        p['clients'] = info
+    # utilization over (roughly) the same steady window as the throughput
+    last = p['steady']['steady_batches'] * steady.batch if p['steady']['batches'] > 0 else None
+    cpu = {'client': util_summary(sampler.utilization(bench_cores, last))}
+    if server_cores is not None:
+        cpu['server'] = util_summary(sampler.utilization(server_cores, last))
+    p['cpu'] = cpu
+    # a single go-ycsb process can be maxed out on its own cores
+    why = saturation(cpu['client'], info['cores'] if clients > 1 else None)
+    p['client_saturated'] = why is not None
+    if why is not None:
+        p['client_saturation'] = why
+    if server_cores is not None:
+        why = saturation(cpu['server'])
+        p['server_saturated'] = why is not None
+        if why is not None:
+            p['server_saturation'] = why
+    if stat is not None:
+        p['counters'] = {t: stat.per_op(t, report_thruput(a), last) for t in stat.cores}
+    if placement is not None:
+        p['placement'] = placement
+    if profiler is not None:
+        p['profile'] = profiler.finish()
+    p.update(extra or {})
+    with _write_lock:
+        with open(path.join(proc.global_args.outdir, outfilename), 'a+') as outfile:
+            outfile.write(json.dumps(p) + '\n')
+    if idx is not None and len(a) > 0:
+        idx.add(key, p, params)
+    return p
+
+def point_thruput(p:dict):
+    """
+    Returns (total thruput, half-width of its confidence interval) of a record.
+    """
+    thput = report_thruput(p['lts'])
+    rel_ci = p.get('steady', {}).get('rel_ci')
+    return thput, rel_ci * thput if rel_ci is not None else None
@@ -0,0 +1,143 @@
+"""
+Process supervisor shared by all of the benchmark drivers.
+
+Every process started through start_command is put in its own process group
+and remembered, so cleanup_procs (registered with atexit by init) can take down
+the whole tree, including children of `go run` and `numactl`.
+"""
+from os import path
+import argparse
+import subprocess
+import os
+import resource
+import atexit
+import signal
+
+from .topology import parse_cpulist, cpu_node
+
+goycsbdir = path.dirname(path.dirname(path.abspath(__file__)))
+gokvdir = path.join(path.dirname(goycsbdir), "gokv")
+
+global_args = argparse.Namespace(dry_run=False, verbose=False, errors=False, outdir=None, rerun=False)
+
+procs = []
+
+def add_common_args(parser:argparse.ArgumentParser, outdir=True):
+    """
+    Adds the -n/-v/-e (and optionally --outdir/--rerun) flags that every driver takes.
+    """
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        help="print commands without running them",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="print commands in addition to running them",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-e",
+        "--errors",
+        help="print stderr from commands being run",
+        action="store_true",
+    )
+    if outdir:
+        parser.add_argument(
+            "--outdir",
+            help="output directory for benchmark results",
+            required=True,
+            default=None,
+        )
+        parser.add_argument(
+            "--rerun",
+            help="measure every point again instead of reusing results already in the output directory's index",
+            action="store_true",
+        )
+    return parser
+
+def init(args):
+    """
+    Makes args the flags used by run_command/start_command, creates the output
+    directory, raises the fd limit and arranges for child processes to be killed
+    on exit.
+    """
+    global global_args
+    global_args = args
+    atexit.register(cleanup_procs)
+    if getattr(args, 'outdir', None):
+        os.makedirs(args.outdir, exist_ok=True)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (100000, 100000))
+    except ValueError:
+        hard = resource.getrlimit(resource.RLIMIT_NOFILE)[1]
+        print("[WARNING] Could not raise fd limit to 100000, using {0}".format(hard))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def outpath(filename:str):
+    return path.join(global_args.outdir, filename)
+
+def run_command(args, cwd=None, env=None):
+    if global_args.dry_run or global_args.verbose:
+        print("[RUNNING] " + " ".join(args))
+    if not global_args.dry_run:
+        return subprocess.run(args, capture_output=True, text=True, cwd=cwd, env=env)
+
+def start_command(args, cwd=None, env=None):
+    if global_args.dry_run or global_args.verbose:
+        print("[STARTING] " + " ".join(args))
+    if not global_args.dry_run:
+        e = subprocess.PIPE
+        if global_args.errors:
+            e = None
+        p = subprocess.Popen(args, text=True, stdout=subprocess.PIPE, stderr=e, cwd=cwd, env=env, preexec_fn=os.setsid)
+        procs.append(p)
+        return p
+
+def stop_proc(p):
+    """
+    Kills the process group of a single process started by start_command.
+    """
+    if p is None:
+        return
+    try:
+        os.killpg(os.getpgid(p.pid), signal.SIGKILL)
+        p.wait(timeout=10)
+    except Exception:
+        pass
+    if p in procs:
+        procs.remove(p)
+
+def cleanup_procs():
+    global procs
+    for p in procs:
+        try:
+            os.killpg(os.getpgid(p.pid), signal.SIGKILL)
+        except Exception:
+            continue
+    # reap them, so their ports are free for whatever gets started next
+    for p in procs:
+        try:
+            p.wait(timeout=10)
+        except Exception:
+            continue
+    procs = []
+
+def corelist_str(corelist):
+    return ",".join([str(j) for j in corelist])
+
+def many_cores(args, c, membind:bool=False):
+    """
+    Pins the command args to the cores c; with membind, its memory is bound to
+    the NUMA nodes of those cores too.
+    """
+    cores = parse_cpulist(c) if isinstance(c, str) else list(c)
+    ret = ["numactl", "-C", corelist_str(cores)]
+    if membind:
+        ret += ["--membind", ",".join([str(n) for n in sorted(set([cpu_node(x) for x in cores]))])]
+    return ret + args
+
+def one_core(args, c):
+    return ["numactl", "-C", str(c)] + args
@@ -0,0 +1,180 @@
+"""
+Per-op cost of functions across profiled points, e.g. 1 and 10 server cores.
+
+A profile's folded stacks say where time went over the profiled window;
+dividing by the operations go-ycsb completed in that window gives what each
+function costs per operation, in us/op of CPU (on-CPU, pprof cpu) or of
+waiting (off-CPU, pprof mutex/block). If a service scaled perfectly, the
+per-op cost of every function would stay flat as cores are added. Whatever
+grows is the bottleneck: time spent on lock handoffs, GC or syscalls that
+more cores add to each operation.
+
+Costs are charged to the leaf function of each stack (its self cost), to
+the deepest frame in the service's own code (its call site, so that time
+spent in sync or the runtime is charged to the code that called them), and to
+a category: lock, gc, syscall or sched. The category is that of the
+outermost frame matching one of `categories`, so a mallocgc under a Mutex.Lock
+counts as lock, and "other" if nothing matches.
+"""
+from collections import defaultdict
+from os import path
+import re
+
+from .series import load_series
+from .profile import read_folded
+from .ycsb import report_ops, report_thruput
+
+categories = [
+    ('lock', [r'^sync\.\(\*(RW)?Mutex\)\.', r'^sync\.runtime_Sem', r'^runtime\.(lock2?|unlock2?|semacquire\w*|semrelease\w*)$',
+              r'spin_lock', r'^futex_wait']),
+    ('gc', [r'^runtime\.(gc\w*|mallocgc|markroot\w*|scanobject|scanblock|scanstack|greyobject|bgsweep|bgscavenge|'
+            r'sweepone|wbBufFlush\w*|\(\*(gcWork|mheap|mcentral|mcache|gcControllerState)\)\..*)$']),
+    ('syscall', [r'^syscall\.', r'^internal/poll\.', r'^golang\.org/x/sys/unix\.',
+                 r'^runtime\.(netpoll\w*|entersyscall\w*|exitsyscall\w*)$',
+                 r'^(entry_SYSCALL\w*|do_syscall_64|__x64_sys_\w*|__sys_\w*)$']),
+    ('sched', [r'^runtime\.(schedule|findRunnable|findrunnable|park_m|mcall|gopark|goready|ready|runqgrab|stealWork|'
+               r'wakep|startm|stopm|notesleep|futexsleep|mPark)$', r'^(__)?schedule$']),
+]
+
+# frames that aren't the service's own code, for call sites
+_infra = re.compile(r'^(runtime|sync|syscall|internal/\w+|reflect|os|net|bufio|io|time|golang\.org/x/sys/\w+)[./(]')
+
+def function_name(frame:str):
+    """
+    A frame without annotations like ' (inline)' or an offset.
+    """
+    return re.sub(r'(\s+\(inline\)|\+0x[0-9a-f]+|_\[k\])$', '', frame.strip())
+
+def frames(stack:str):
+    """
+    The function names of a folded stack, root first, without the process
+    name and bcc's kernel/user delimiters.
+    """
+    return [function_name(f) for f in stack.split(';')[1:] if f not in ['-', '--', '']]
+
+def category(fs:list[str]):
+    for f in fs:
+        for name, pats in categories:
+            if any([re.search(p, f) for p in pats]):
+                return name
+    return 'other'
+
+def call_site(fs:list[str]):
+    """
+    The deepest frame of the service's own code ('(runtime)' if there is
+    none, e.g. for GC workers).
+    """
+    for f in reversed(fs):
+        # kernel and C frames have neither a package path nor a receiver
+        if _infra.match(f) is None and ('.' in f or '/' in f) and not f.startswith('['):
+            return f
+    return '(runtime)'
+
+def unit_us(kind:str, prof:dict):
+    """
+    us represented by one unit of a folded profile of kind: a sample for
+    on-CPU (perf and bcc sample at prof['freq'] Hz), otherwise us already.
+    """
+    return 1e6 / prof.get('freq', 99) if kind.endswith('.oncpu') else 1
+
+def _ops_at(series, t:float):
+    total = []
+    for i, wall in enumerate(series.wall):
+        n = sum([series.ops[op]['count'][i] or 0 for op in report_ops(series.ops) if 'count' in series.ops[op]])
+        total.append((wall, n))
+    if len(total) == 0:
+        return None
+    if t <= total[0][0]:
+        return total[0][1]
+    for (w0, n0), (w1, n1) in zip(total, total[1:]):
+        if w0 <= t <= w1:
+            return n0 + (n1 - n0) * (t - w0) / (w1 - w0) if w1 > w0 else n1
+    return total[-1][1]
+
+def window_ops(p:dict, outdir:str):
+    """
+    Operations go-ycsb completed during the profiled window of point p (a
+    bench_point record), from its series, or from its throughput if it has
+    none.
+    """
+    prof = p['profile']
+    w = prof.get('window')
+    if w is None:
+        return None
+    f = path.join(outdir, p.get('series', ''))
+    if p.get('series') and path.exists(f):
+        s = load_series(f)
+        a, b = _ops_at(s, w[0]), _ops_at(s, w[1])
+        if a is not None and b is not None and b > a:
+            return b - a
+    thput = report_thruput(p.get('lts', {}))
+    return thput * (w[1] - w[0]) if thput > 0 else None
+
+def per_op(folded:dict, ops:float, unit:float):
+    """
+    Returns the per-op costs (us/op) of a folded profile: {'total',
+    'functions': {leaf: ...}, 'sites': {call site: ...}, 'categories': {...}},
+    and under 'split' the functions' and sites' costs by category.
+    """
+    ret = {'total': 0, 'functions': defaultdict(float), 'sites': defaultdict(float), 'categories': defaultdict(float)}
+    split = {'functions': defaultdict(lambda: defaultdict(float)), 'sites': defaultdict(lambda: defaultdict(float))}
+    for stack, n in folded.items():
+        fs = frames(stack)
+        if len(fs) == 0:
+            continue
+        c = n * unit / ops
+        cat = category(fs)
+        ret['total'] += c
+        ret['categories'][cat] += c
+        for what, name in [('functions', fs[-1]), ('sites', call_site(fs))]:
+            ret[what][name] += c
+            split[what][name][cat] += c
+    for k in ['functions', 'sites', 'categories']:
+        ret[k] = dict(ret[k])
+    ret['split'] = {what: {name: dict(cs) for name, cs in d.items()} for what, d in split.items()}
+    return ret
+
+def load_costs(p:dict, kind:str, outdir:str):
+    """
+    per_op costs of point p's profile of kind (e.g. 'server.oncpu'), or None
+    if it has no such profile or no operations to divide by.
+    """
+    prof = p.get('profile') or {}
+    f = prof.get('files', {}).get(kind)
+    ops = window_ops(p, outdir) if f is not None else None
+    if f is None or not ops:
+        return None
+    return per_op(read_folded(path.join(outdir, f)), ops, unit_us(kind, prof))
+
+def _slope(xs:list[float], ys:list[float]):
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    var = sum([(x - mx) ** 2 for x in xs])
+    return sum([(x - mx) * (y - my) for x, y in zip(xs, ys)]) / var if var > 0 else None
+
+def rank(costs:list[dict], ns:list[float], what:str, min_share:float=0.005):
+    """
+    Ranks the entries of costs[i][what] (one per point, in order of ns, e.g.
+    core counts) by how much their per-op cost grew from the first point to
+    the last: [{'name', 'costs', 'growth' (last/first), 'delta' (us/op),
+    'slope' (us/op per n), 'share' (of the last point's total), 'category'
+    (where most of the growth went)}, ...]. Entries below min_share of the
+    total at every point are left out.
+    """
+    names = set([k for c in costs for k in c[what]])
+    rows = []
+    for name in names:
+        cs = [c[what].get(name, 0) for c in costs]
+        if all([c['total'] == 0 or v / c['total'] < min_share for v, c in zip(cs, costs)]):
+            continue
+        row = {'name': name, 'costs': cs, 'delta': cs[-1] - cs[0],
+               'growth': cs[-1] / cs[0] if cs[0] > 0 else None,
+               'slope': _slope(ns, cs) if len(ns) > 2 else None,
+               'share': cs[-1] / costs[-1]['total'] if costs[-1]['total'] > 0 else None}
+        if what in costs[-1].get('split', {}):
+            first = costs[0]['split'][what].get(name, {})
+            last = costs[-1]['split'][what].get(name, {})
+            grew = {cat: v - first.get(cat, 0) for cat, v in last.items()}
+            row['category'] = max(grew, key=grew.get) if len(grew) > 0 else None
+        rows.append(row)
+    return sorted(rows, key=lambda r: r['delta'], reverse=True)
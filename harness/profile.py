@@ -0,0 +1,417 @@
+"""
+Profiling a data point while it is measured.
+
+A Profiler is attached to one bench_point. Once the load has warmed up, it
+profiles the point for `duration` seconds and writes each profile to its own
+file under <outdir>/profiles/<name>-<ms>/. The kinds of profile are:
+
+    oncpu   sampled on-CPU stacks
+    offcpu  stacks of threads that were switched out, weighted by the us until
+            they ran again (blocking, lock waits, preemption)
+    pprof   Go profiles (cpu, mutex, block) fetched from processes serving
+            net/http/pprof: every go-ycsb process (debug.pprof), and the
+            servers at the addresses given, if they serve it
+
+oncpu and offcpu come from one of two backends. 'perf' needs nothing but
+perf: `perf record -F <freq> -g` for on-CPU, and sched:sched_switch events
+paired up by thread for off-CPU (a thread is charged from the switch that took
+it off a cpu to the one that put it back). Both only watch the cores of the
+targets. 'bcc' uses bcc's profile and offcputime tools, which have no
+per-core filter here and watch the whole host; with experiments running side
+by side, stacks of the other experiments' processes end up in the profile too.
+
+Stacks are told apart by process name: memkvshard for the servers, go-ycsb
+for the clients. Every (target, kind) becomes a folded file
+`<target>.<kind>.folded` with one `comm;root;...;leaf count` line per stack,
+the input of flamegraph.pl (rendered to .svg too if flamegraph.pl is on the
+PATH); Go profiles are also kept as fetched, `<target>.pprof-<kind>.pb.gz`.
+diff_profiles() compares the profiles of two points, e.g. one core against
+ten, as difffolded.pl does: `stack count_a count_b` lines, which flamegraph.pl
+draws as a differential flame graph.
+"""
+from collections import defaultdict
+from os import path
+import os
+import re
+import shutil
+import threading
+import time
+import urllib.request
+
+from . import proc
+from .proc import run_command
+from .topology import cpulist_str
+
+kinds = ['oncpu', 'offcpu', 'pprof']
+backends = ['perf', 'bcc']
+pprof_kinds = ['cpu', 'mutex', 'block']
+targets = ['server', 'client']
+
+# process names of the targets, as stacks are labeled with them
+comms = {'server': 'memkvshard', 'client': 'go-ycsb'}
+
+bcc_tools = '/usr/share/bcc/tools'
+
+# sampling of go-ycsb's mutex and block profiles (runtime.SetMutexProfileFraction,
+# runtime.SetBlockProfileRate in ns), only turned on while profiling
+mutex_fraction = 5
+block_rate = 10000
+
+defaults = {
+    'kinds': ['oncpu', 'offcpu', 'pprof'],
+    'backend': 'perf',
+    'targets': ['server', 'client'],
+    # seconds to profile for, and to wait before that (default: warm-up + 3)
+    'duration': 30,
+    'delay': None,
+    # on-CPU samples per second
+    'freq': 99,
+    'pprof': ['cpu', 'mutex', 'block'],
+    # pprof addresses of the servers, e.g. ['127.0.0.1:6061'], if they serve it
+    'server_pprof': [],
+    # 'result': profile the strategy's result point (the peak, or the fixed
+    # thread count) in one more run; 'all': profile every point
+    'points': 'result',
+}
+
+def _sudo():
+    return [] if os.geteuid() == 0 else ['sudo']
+
+class Profiler:
+    def __init__(self, spec:dict, name:str, target_info:dict):
+        """
+        spec is a profile spec (see defaults), name names the point (and its
+        directory), and target_info has, for each target, the cores it runs on
+        (None if unknown, e.g. a remote service) and the pprof addresses of
+        its processes: {'server': {'cpus': [...], 'pprof': [...]}, ...}.
+        """
+        self.spec = dict(defaults, **spec)
+        self.name = name
+        self.targets = {t: target_info[t] for t in self.spec['targets'] if t in target_info}
+        self.dir = None
+        self.thread = None
+        self.files = dict()
+        self.window = None
+
+    def client_props(self, i:int=0):
+        """
+        go-ycsb properties for the i'th client process: where it serves
+        pprof, and the mutex and block sampling rates.
+        """
+        addrs = self.targets.get('client', {}).get('pprof') or []
+        if 'pprof' not in self.spec['kinds'] or i >= len(addrs):
+            return {}
+        props = {'debug.pprof': addrs[i]}
+        if 'mutex' in self.spec['pprof']:
+            props['debug.pprof.mutex_fraction'] = mutex_fraction
+        if 'block' in self.spec['pprof']:
+            props['debug.pprof.block_rate'] = block_rate
+        return props
+
+    def delay(self, warmup:int):
+        return self.spec['delay'] if self.spec['delay'] is not None else warmup + 3
+
+    def min_runtime(self, warmup:int):
+        """
+        Seconds go-ycsb has to report for (after warmup) for the load to last
+        until the profile is done.
+        """
+        return max(self.delay(warmup) + self.spec['duration'] - warmup, 0) + 2
+
+    def start(self, warmup:int, procs:int=1):
+        """
+        Profiles in the background, starting delay seconds from now; procs
+        is the number of go-ycsb processes actually started.
+        """
+        self.dir = path.join(proc.global_args.outdir, 'profiles', '{0}-{1}'.format(self.name, int(time.time() * 1000)))
+        os.makedirs(self.dir, exist_ok=True)
+        self.procs = procs
+        self.thread = threading.Thread(target=self._run, args=(self.delay(warmup),), daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self, delay:float):
+        if not proc.global_args.dry_run:
+            time.sleep(delay)
+        jobs = []
+        for kind in ['oncpu', 'offcpu']:
+            if kind in self.spec['kinds']:
+                jobs.append(threading.Thread(target=self._stacks, args=(kind,)))
+        if 'pprof' in self.spec['kinds']:
+            for t, info in self.targets.items():
+                addrs = info.get('pprof') or []
+                if t == 'client':
+                    addrs = addrs[:self.procs]
+                for i, addr in enumerate(addrs):
+                    label = t if len(addrs) == 1 else t + str(i)
+                    for k in self.spec['pprof']:
+                        jobs.append(threading.Thread(target=self._pprof, args=(label, addr, k)))
+        start = time.time()
+        for j in jobs:
+            j.start()
+        for j in jobs:
+            j.join()
+        self.window = [start, time.time()]
+
+    def _stacks(self, kind:str):
+        try:
+            self._collect_stacks(kind)
+        except FileNotFoundError as e:
+            print("[WARNING] No {0} profile, {1} isn't installed".format(kind, e.filename))
+
+    def _collect_stacks(self, kind:str):
+        """
+        Runs the backend's profiler for kind and writes the folded stacks of
+        every target.
+        """
+        d = str(self.spec['duration'])
+        if self.spec['backend'] == 'perf':
+            cpus = [c for info in self.targets.values() for c in (info.get('cpus') or [])]
+            where = ['-C', cpulist_str(sorted(set(cpus)))] if all([info.get('cpus') for info in self.targets.values()]) else ['-a']
+            data = path.join(self.dir, kind + '.perf.data')
+            if kind == 'oncpu':
+                rec = ['-F', str(self.spec['freq']), '-g']
+                fields = 'comm,tid,time,event,ip,sym'
+            else:
+                rec = ['-e', 'sched:sched_switch', '-g']
+                fields = 'comm,tid,time,event,trace,ip,sym'
+            p = run_command(_sudo() + ['perf', 'record', '-q', '-o', data] + rec + where + ['--', 'sleep', d])
+            if p is None:
+                return
+            if p.returncode != 0:
+                print("[WARNING] perf record for {0} failed: {1}".format(kind, p.stderr.strip()))
+                return
+            p = run_command(_sudo() + ['perf', 'script', '-i', data, '-F', fields])
+            os.remove(data)
+            if p is None:
+                return
+            folded = fold_perf(p.stdout) if kind == 'oncpu' else fold_perf_offcpu(p.stdout)
+        else:
+            tool = 'profile' if kind == 'oncpu' else 'offcputime'
+            args = ['-F', str(self.spec['freq'])] if kind == 'oncpu' else []
+            p = run_command(_sudo() + [path.join(bcc_tools, tool)] + args + ['-df', '--stack-storage-size', '32768', d])
+            if p is None:
+                return
+            if p.returncode != 0:
+                print("[WARNING] bcc {0} failed: {1}".format(tool, p.stderr.strip()))
+                return
+            folded = parse_folded(p.stdout)
+        for t in self.targets:
+            mine = {s: n for s, n in folded.items() if s.split(';', 1)[0] == comms[t]}
+            self._write(t, kind, mine)
+
+    def _pprof(self, label:str, addr:str, kind:str):
+        d = self.spec['duration']
+        url = 'http://{0}/debug/pprof/{1}?seconds={2}'.format(addr, 'profile' if kind == 'cpu' else kind, d)
+        if proc.global_args.dry_run or proc.global_args.verbose:
+            print("[RUNNING] GET " + url)
+        if proc.global_args.dry_run:
+            return
+        raw = path.join(self.dir, '{0}.pprof-{1}.pb.gz'.format(label, kind))
+        try:
+            with urllib.request.urlopen(url, timeout=d + 30) as r, open(raw, 'wb') as f:
+                shutil.copyfileobj(r, f)
+        except OSError as e:
+            print("[WARNING] Could not fetch the {0} profile of {1} ({2}): {3}".format(kind, label, addr, e))
+            return
+        self.files[label + '.pprof-' + kind + '.raw'] = raw
+        try:
+            p = run_command(['go', 'tool', 'pprof', '-traces', raw])
+        except FileNotFoundError:
+            print("[WARNING] go isn't installed; {0} is kept, but not folded".format(raw))
+            return
+        if p is None or p.returncode != 0:
+            print("[WARNING] Could not read {0}: {1}".format(raw, p.stderr.strip() if p is not None else ''))
+            return
+        comm = comms['server' if label.startswith('server') else 'client']
+        self._write(label, 'pprof-' + kind, fold_pprof_traces(p.stdout, comm))
+
+    def _write(self, target:str, kind:str, folded:dict):
+        f = path.join(self.dir, '{0}.{1}.folded'.format(target, kind))
+        write_folded(f, folded)
+        self.files[target + '.' + kind] = f
+        flamegraph(f, "{0} {1} {2}".format(self.name, target, kind))
+
+    def finish(self):
+        """
+        Waits for the profiles and returns the record of them: the window
+        profiled (unix times), the number of cores of each target, and the
+        files by '<target>.<kind>', relative to the output directory.
+        """
+        if self.thread is None:
+            return None
+        self.thread.join()
+        rel = lambda f: path.relpath(f, proc.global_args.outdir)
+        ret = {'dir': rel(self.dir), 'backend': self.spec['backend'], 'freq': self.spec['freq'], 'window': self.window,
+               'cores': {t: len(info['cpus']) if info.get('cpus') else None for t, info in self.targets.items()},
+               'files': {k: rel(f) for k, f in sorted(self.files.items())}}
+        if len(self.files) == 0 and not proc.global_args.dry_run:
+            print("[WARNING] No profiles of {0} were written".format(self.name))
+        return ret
+
+_header = re.compile(r'^(\S.*?)\s+(\d+)\s+(\d+\.\d+):\s+(\S+):\s*(.*)$')
+_switch = re.compile(r'prev_comm=(.*?) prev_pid=(\d+) .*==> next_comm=(.*?) next_pid=(\d+)')
+
+def _frame(line:str):
+    parts = line.split(None, 1)
+    sym = parts[1].strip() if len(parts) > 1 else '[unknown]'
+    sym = re.sub(r'\s+\([^()]*\)$', '', sym)
+    sym = re.sub(r'\+0x[0-9a-f]+$', '', sym)
+    return sym.replace(';', ':') or '[unknown]'
+
+def perf_events(text:str):
+    """
+    Yields (comm, tid, time, trace, frames from the leaf up) for every
+    sample in `perf script -F comm,tid,time,event[,trace],ip,sym` output.
+    """
+    ev = None
+    for line in text.splitlines():
+        if line.strip() == '':
+            if ev is not None:
+                yield ev
+            ev = None
+        elif line[0].isspace():
+            if ev is not None:
+                ev[4].append(_frame(line))
+        else:
+            m = _header.match(line)
+            if ev is not None:
+                yield ev
+            ev = (m.group(1), int(m.group(2)), float(m.group(3)), m.group(5), []) if m else None
+    if ev is not None:
+        yield ev
+
+def _stack(comm:str, frames:list[str]):
+    return ';'.join([comm.replace(';', ':')] + frames[::-1])
+
+def fold_perf(text:str):
+    """
+    Folds perf script output into {stack: samples}.
+    """
+    ret = defaultdict(int)
+    for comm, _, _, _, frames in perf_events(text):
+        ret[_stack(comm, frames)] += 1
+    return dict(ret)
+
+def fold_perf_offcpu(text:str):
+    """
+    Folds perf script output of sched:sched_switch events into {stack: us
+    off-CPU}: the stack a thread was switched out with, charged until it is
+    switched back in. Threads still off-CPU when the recording ends aren't
+    counted.
+    """
+    ret = defaultdict(int)
+    out = dict()
+    for comm, _, t, trace, frames in perf_events(text):
+        m = _switch.search(trace)
+        if m is None:
+            continue
+        prev, nxt = int(m.group(2)), int(m.group(4))
+        if nxt in out:
+            t_out, c, fs = out.pop(nxt)
+            us = int(round((t - t_out) * 1e6))
+            if us > 0:
+                ret[_stack(c, fs)] += us
+        if prev != 0:
+            out[prev] = (t, m.group(1), frames)
+    return dict(ret)
+
+_units = {'ns': 1e-3, 'us': 1, 'ms': 1e3, 's': 1e6, 'min': 60e6, 'hrs': 3600e6}
+
+def _pprof_value(v:str):
+    m = re.match(r'^([0-9.]+)([a-z]*)$', v)
+    if m is None:
+        return None
+    return int(float(m.group(1)) * _units.get(m.group(2), 1))
+
+def fold_pprof_traces(text:str, comm:str):
+    """
+    Folds `go tool pprof -traces` output into {stack: value}, with durations
+    in us (counts stay counts), under the root frame comm.
+    """
+    ret = defaultdict(int)
+    blocks = re.split(r'^-+\+-+$', text, flags=re.M)
+    for b in blocks[1:]:
+        lines = [l for l in b.splitlines() if l.strip() != '']
+        if len(lines) == 0:
+            continue
+        first = lines[0].split(None, 1)
+        value = _pprof_value(first[0])
+        if value is None or len(first) < 2:
+            continue
+        frames = [first[1].strip()] + [l.strip() for l in lines[1:] if not re.match(r'^\s*\S+:', l)]
+        ret[_stack(comm, [f.replace(';', ':') for f in frames])] += value
+    return dict(ret)
+
+def parse_folded(text:str):
+    """
+    Returns {stack: count} of folded stacks (one `stack count` per line).
+    """
+    ret = defaultdict(int)
+    for line in text.splitlines():
+        stack, _, n = line.rstrip().rpartition(' ')
+        if stack == '':
+            continue
+        try:
+            ret[stack] += int(n)
+        except ValueError:
+            continue
+    return dict(ret)
+
+def read_folded(filename:str):
+    with open(filename, 'r') as f:
+        return parse_folded(f.read())
+
+def write_folded(filename:str, folded:dict):
+    with open(filename, 'w') as f:
+        for s in sorted(folded):
+            f.write('{0} {1}\n'.format(s, folded[s]))
+
+def flamegraph(folded_file:str, title:str, extra:list[str]=()):
+    """
+    Renders folded_file to an .svg next to it with flamegraph.pl, if it's on
+    the PATH.
+    """
+    if shutil.which('flamegraph.pl') is None:
+        return None
+    p = run_command(['flamegraph.pl', '--title', title] + list(extra) + [folded_file])
+    if p is None or p.returncode != 0:
+        return None
+    svg = re.sub(r'\.folded$', '', folded_file) + '.svg'
+    with open(svg, 'w') as f:
+        f.write(p.stdout)
+    return svg
+
+def diff_folded(a:dict, b:dict, normalize:bool=True):
+    """
+    Returns {stack: (count in a, count in b)} over the stacks of either. With
+    normalize, b's counts are scaled to a's total, so that the two compare by
+    share of the profile rather than by length.
+    """
+    scale = 1
+    if normalize and sum(b.values()) > 0:
+        scale = sum(a.values()) / sum(b.values())
+    return {s: (a.get(s, 0), int(round(b.get(s, 0) * scale))) for s in set(a) | set(b)}
+
+def diff_profiles(a:dict, b:dict, name:str, normalize:bool=True):
+    """
+    Diffs the profiles of two points (their bench_point records' 'profile'
+    entries) wherever both have the same target and kind, into
+    <outdir>/profiles/<name>/<target>.<kind>.diff.folded. Returns the files
+    written by '<target>.<kind>'.
+    """
+    d = path.join(proc.global_args.outdir, 'profiles', name)
+    os.makedirs(d, exist_ok=True)
+    ret = dict()
+    for k in sorted(set(a['files']) & set(b['files'])):
+        if k.endswith('.raw'):
+            continue
+        fa = read_folded(path.join(proc.global_args.outdir, a['files'][k]))
+        fb = read_folded(path.join(proc.global_args.outdir, b['files'][k]))
+        f = path.join(d, k + '.diff.folded')
+        with open(f, 'w') as out:
+            for s, (na, nb) in sorted(diff_folded(fa, fb, normalize).items()):
+                out.write('{0} {1} {2}\n'.format(s, na, nb))
+        flamegraph(f, "{0} {1}".format(name, k))
+        ret[k] = f
+    return ret
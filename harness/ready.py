@@ -0,0 +1,64 @@
+"""
+Readiness probing for cluster bring-up: instead of sleeping for a fixed time
+after starting a server, poll its port until it accepts connections (and
+optionally answers a protocol-level ping).
+"""
+from concurrent.futures import ThreadPoolExecutor
+import socket
+import time
+
+from . import proc
+
+def redis_ping(sock:socket.socket):
+    """
+    Protocol-level ping for redis-compatible servers.
+    """
+    sock.sendall(b"PING\r\n")
+    return sock.recv(64).startswith(b"+PONG")
+
+def probe(host:str, port:int, ping=None, timeout:float=1.0):
+    """
+    Returns True if host:port accepts a TCP connection and, if ping is given,
+    ping(sock) returns True.
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            if ping is not None:
+                sock.settimeout(timeout)
+                return ping(sock)
+            return True
+    except OSError:
+        return False
+
+def wait_ready(host:str, port:int, p=None, ping=None, timeout:float=30.0,
+               initial_delay:float=0.005, max_delay:float=0.5):
+    """
+    Polls host:port with exponential backoff until it is ready, raising
+    TimeoutError after timeout seconds. If p (the server's Popen) is given, this
+    also fails as soon as the server exits. Returns the time waited.
+    """
+    if proc.global_args.dry_run:
+        return 0.0
+    start = time.monotonic()
+    delay = initial_delay
+    while True:
+        if probe(host, port, ping):
+            return time.monotonic() - start
+        if p is not None and p.poll() is not None:
+            raise RuntimeError("server for {0}:{1} exited with status {2} before becoming ready".format(host, port, p.returncode))
+        waited = time.monotonic() - start
+        if waited > timeout:
+            raise TimeoutError("{0}:{1} not ready after {2:.1f}s".format(host, port, waited))
+        time.sleep(min(delay, max_delay, max(timeout - waited, 0)))
+        delay *= 2
+
+def wait_all_ready(targets, **kwargs):
+    """
+    Waits for every (host, port, p) in targets concurrently, so bring-up time
+    doesn't grow with the number of servers. Raises the first failure.
+    """
+    if len(targets) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = [pool.submit(wait_ready, host, port, p, **kwargs) for host, port, p in targets]
+        return [f.result() for f in futures]
@@ -0,0 +1,196 @@
+"""
+Running commands on the hosts of a multi-host setup.
+
+An executor runs shell commands on one host: SshExecutor over ssh, reusing a
+single multiplexed connection (ControlMaster) for every command so only the
+first one pays for the handshake, and LocalExecutor on this host, e.g. as a
+stand-in for remote hosts while trying out a setup. Both share:
+
+    run(cmd)         runs cmd to completion and returns the CompletedProcess
+    start(name, cmd) starts cmd in the background in its own session, with its
+                     output going to a log file on the host, and returns a
+                     RemoteProc holding its (remote) pid
+    stop(p)          kills the process group of a started process
+    fetch(src, dst)  copies a file from the host to this one
+    collect_logs()   fetches the logs of everything started into outdir/logs
+
+start() records each process's pid in a file named after it, and kills
+whatever an earlier run left running under the same name first, instead of
+going after every process with that binary's name. fan_out() runs a function
+for many executors in parallel.
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+import atexit
+import os
+import shlex
+import shutil
+import tempfile
+
+from . import proc
+from .proc import run_command
+
+# per-host directory for pid files and logs, relative to the login directory
+workdir = '.gokv-bench'
+
+class RemoteProc:
+    def __init__(self, executor, name:str, pid:int):
+        self.executor = executor
+        self.name = name
+        self.pid = pid
+
+    def log(self):
+        return '{0}/{1}.log'.format(workdir, self.name)
+
+    def __repr__(self):
+        return '{0}:{1}[{2}]'.format(self.executor.host, self.name, self.pid)
+
+# executors with processes that may still be running, stopped on exit
+_executors = []
+
+class Executor(ABC):
+    def __init__(self, host:str):
+        self.host = host
+        # RemoteProcs started on the host and not stopped yet
+        self.started = []
+
+    @abstractmethod
+    def argv(self, cmd:str):
+        """
+        The local command line running the shell command cmd on the host.
+        """
+        raise NotImplementedError
+
+    def run(self, cmd:str, check:bool=True):
+        """
+        Runs cmd on the host and returns the CompletedProcess (None in a dry
+        run). With check, a non-zero exit status raises RuntimeError.
+        """
+        p = run_command(self.argv(cmd))
+        if check and p is not None and p.returncode != 0:
+            raise RuntimeError("{0} on {1} failed:\n{2}".format(cmd, self.host, p.stderr))
+        return p
+
+    def start(self, name:str, cmd:str):
+        """
+        Starts cmd in the background and returns its RemoteProc. The pid is
+        None in a dry run.
+        """
+        pidfile = '{0}/{1}.pid'.format(workdir, name)
+        log = RemoteProc(self, name, None).log()
+        # setsid makes the pid the process group too, so stop() gets children
+        script = ('cd && mkdir -p {w} && '
+                  '{{ [ -f {pid} ] && kill -s KILL -- -$(cat {pid}) 2>/dev/null; '
+                  'setsid sh -c {cmd} > {log} 2>&1 < /dev/null & echo $! > {pid}; cat {pid}; }}').format(
+                      w=workdir, pid=pidfile, log=log, cmd=shlex.quote(cmd))
+        p = self.run(script)
+        pid = int(p.stdout.strip()) if p is not None else None
+        rp = RemoteProc(self, name, pid)
+        self.started = [q for q in self.started if q.name != name] + [rp]
+        if self not in _executors:
+            _executors.append(self)
+        return rp
+
+    def stop(self, rp:RemoteProc):
+        if rp.pid is not None:
+            self.run('kill -s KILL -- -{0} 2>/dev/null; rm -f {1}/{2}.pid'.format(rp.pid, workdir, rp.name),
+                     check=False)
+        if rp in self.started:
+            self.started.remove(rp)
+
+    def stop_all(self):
+        for rp in list(self.started):
+            self.stop(rp)
+
+    @abstractmethod
+    def fetch(self, src:str, dst:str):
+        """
+        Copies the file src on the host to the local path dst.
+        """
+        raise NotImplementedError
+
+    def collect_logs(self, rps:list[RemoteProc]=None):
+        """
+        Copies the logs of rps (default: everything started on the host that
+        is still tracked) to outdir/logs/<host>/.
+        """
+        d = proc.outpath(path.join('logs', self.host))
+        os.makedirs(d, exist_ok=True)
+        for rp in (self.started if rps is None else rps):
+            self.fetch(rp.log(), path.join(d, rp.name + '.log'))
+
+    def close(self):
+        pass
+
+class LocalExecutor(Executor):
+    def __init__(self, host:str='localhost'):
+        # host is only a label, e.g. the remote host this one stands in for
+        super().__init__(host)
+
+    def argv(self, cmd:str):
+        return ['sh', '-c', cmd]
+
+    def fetch(self, src:str, dst:str):
+        src = path.join(path.expanduser('~'), src)
+        if proc.global_args.dry_run or proc.global_args.verbose:
+            print("[RUNNING] cp {0} {1}".format(src, dst))
+        if not proc.global_args.dry_run and path.exists(src):
+            shutil.copyfile(src, dst)
+
+# ssh's control sockets; short, since unix socket paths are limited to ~100 bytes
+control_dir = path.join(tempfile.gettempdir(), 'gokv-ssh')
+
+class SshExecutor(Executor):
+    def __init__(self, host:str, persist:int=600, options:list[str]=()):
+        """
+        host is anything ssh takes, e.g. user@host. The master connection
+        outlives the executor by up to persist seconds of idleness, so a
+        following run reuses it too.
+        """
+        super().__init__(host)
+        os.makedirs(control_dir, mode=0o700, exist_ok=True)
+        self.options = ['-o', 'ControlMaster=auto', '-o', 'ControlPath={0}/%C'.format(control_dir),
+                        '-o', 'ControlPersist={0}'.format(persist), '-o', 'BatchMode=yes'] + list(options)
+
+    def argv(self, cmd:str):
+        return ['ssh'] + self.options + [self.host, cmd]
+
+    def fetch(self, src:str, dst:str):
+        p = run_command(['scp', '-q'] + self.options + ['{0}:{1}'.format(self.host, src), dst])
+        if p is not None and p.returncode != 0:
+            print("[WARNING] Could not fetch {0} from {1}: {2}".format(src, self.host, p.stderr.strip()))
+
+    def close(self):
+        """
+        Closes the master connection.
+        """
+        run_command(['ssh'] + self.options + ['-O', 'exit', self.host])
+
+def executor(host:str, kind:str='ssh'):
+    """
+    Returns an executor of kind 'ssh' or 'local' for host.
+    """
+    if kind == 'ssh':
+        return SshExecutor(host)
+    if kind == 'local':
+        return LocalExecutor(host)
+    raise ValueError("unknown executor {0}".format(kind))
+
+def fan_out(executors:list[Executor], fn, max_workers:int=32):
+    """
+    Calls fn(executor) for every executor in parallel and returns the results
+    in order. The first exception is raised once all calls have finished.
+    """
+    if len(executors) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(executors), max_workers)) as pool:
+        futures = [pool.submit(fn, e) for e in executors]
+    return [f.result() for f in futures]
+
+def cleanup_executors():
+    for e in list(_executors):
+        e.stop_all()
+        _executors.remove(e)
+
+atexit.register(cleanup_executors)
@@ -0,0 +1,92 @@
+"""
+Sub-second per-operation samples, as go-ycsb writes them with
+measurement.sample_interval/measurement.sample_file set (see
+pkg/measurement/sampler.go for the stream format).
+"""
+import struct
+
+from .ycsb import report_ops
+
+magic = b'YCSBSMP1'
+_entry = struct.Struct('<HIQI')
+
+def sample_props(interval:int, filename:str):
+    """
+    go-ycsb properties that make it sample every interval ms into filename.
+    """
+    return {'measurement.sample_interval': interval, 'measurement.sample_file': filename}
+
+def read_samples(filename:str):
+    """
+    Parses a sample stream into columns, one entry per interval:
+    {'interval': seconds, 't': [end of interval, unix seconds, ...],
+     'ops': {'READ': {'count': [...], 'avg_latency': [...], 'max_latency': [...]}, ...}}
+    Latencies are in us, and None for intervals without a completed
+    operation of that type. A record cut short at the end of the stream (the
+    process was killed while writing it) is dropped.
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if data[:len(magic)] != magic:
+        raise ValueError("{0} is not a go-ycsb sample stream".format(filename))
+    interval, = struct.unpack_from('<I', data, len(magic))
+    names = dict()
+    ts = []
+    ops = dict()
+    i = len(magic) + 4
+    try:
+        while i < len(data):
+            tag = data[i:i + 1]
+            if tag == b'O':
+                opid, n = struct.unpack_from('<HH', data, i + 1)
+                if i + 5 + n > len(data):
+                    break
+                names[opid] = data[i + 5:i + 5 + n].decode()
+                i += 5 + n
+            elif tag == b'S':
+                t, n = struct.unpack_from('<qH', data, i + 1)
+                end = i + 11 + n * _entry.size
+                if end > len(data):
+                    break
+                for col in ops.values():
+                    for c in col.values():
+                        c.append(None)
+                for opid, count, lat_sum, lat_max in _entry.iter_unpack(data[i + 11:end]):
+                    col = ops.setdefault(names[opid], {'count': [None] * (len(ts) + 1), 'avg_latency': [None] * (len(ts) + 1),
+                                                       'max_latency': [None] * (len(ts) + 1)})
+                    col['count'][-1] = count
+                    col['avg_latency'][-1] = lat_sum / count
+                    col['max_latency'][-1] = lat_max
+                ts.append(t / 1e6)
+                i = end
+            else:
+                raise ValueError("{0}: bad record tag {1!r} at offset {2}".format(filename, tag, i))
+    except struct.error:
+        # cut short
+        pass
+    for col in ops.values():
+        col['count'] = [c or 0 for c in col['count']]
+    return {'interval': interval / 1e6, 't': ts, 'ops': ops}
+
+def op_names(samples:dict):
+    """
+    The operation types sampled, without go-ycsb's TOTAL and error counts.
+    """
+    return sorted(report_ops(samples['ops']))
+
+def op_points(samples:dict, op:str, t0:float=0):
+    """
+    Returns op's samples as timeline points ({'t', 'dt', 'ok', 'failed',
+    'thruput', 'errors'}, see timeline.rates), with t in seconds since the
+    unix time t0.
+    """
+    ok = samples['ops'].get(op, {}).get('count', [0] * len(samples['t']))
+    failed = samples['ops'].get(op + '_ERROR', {}).get('count', [0] * len(samples['t']))
+    ret = []
+    for j, t in enumerate(samples['t']):
+        dt = t - samples['t'][j - 1] if j > 0 else samples['interval']
+        if dt <= 0:
+            continue
+        ret.append({'t': t - t0, 'dt': dt, 'ok': ok[j], 'failed': failed[j],
+                    'thruput': ok[j] / dt, 'errors': failed[j] / dt})
+    return ret
@@ -0,0 +1,134 @@
+"""
+Noise-aware search for the client thread count that maximizes throughput.
+
+measure(threads) runs one benchmark and returns (thruput, half-width of its
+confidence interval). The search first brackets the peak by doubling, then
+narrows the bracket with a golden-section search over integer thread counts.
+Two points are only considered different when their confidence intervals don't
+overlap; otherwise both are sampled again (up to `repeats` times), so a single
+noisy sample can't send the search the wrong way. Every thread count is
+measured at most `repeats` times and results are reused.
+"""
+import math
+
+invphi = (math.sqrt(5) - 1) / 2
+
+class PeakSearch:
+    def __init__(self, measure, repeats:int=3, resolution:float=0.05, min_resolution:int=2):
+        self.measure = measure
+        self.repeats = repeats
+        self.resolution = resolution
+        self.min_resolution = min_resolution
+        # threads -> [(thruput, half-width), ...]
+        self.samples = dict()
+
+    def sample(self, threads:int):
+        thput, hw = self.measure(threads)
+        if hw is None or not math.isfinite(hw):
+            hw = abs(thput)
+        self.samples.setdefault(threads, []).append((thput, hw))
+
+    def estimate(self, threads:int):
+        """
+        Returns (mean thruput, half-width) over all samples at threads, taking
+        one sample first if there are none.
+        """
+        if threads not in self.samples:
+            self.sample(threads)
+        s = self.samples[threads]
+        m = sum([x for x, _ in s]) / len(s)
+        hw = math.sqrt(sum([h**2 for _, h in s])) / len(s)
+        return m, hw
+
+    def compare(self, a:int, b:int):
+        """
+        Returns -1 if a is clearly worse than b, 1 if clearly better and 0 if
+        they are indistinguishable after resampling.
+        """
+        while True:
+            ma, ha = self.estimate(a)
+            mb, hb = self.estimate(b)
+            if ma + ha < mb - hb:
+                return -1
+            if mb + hb < ma - ha:
+                return 1
+            if len(self.samples[a]) >= self.repeats and len(self.samples[b]) >= self.repeats:
+                return 0
+            # resample whichever is less certain
+            if len(self.samples[a]) <= len(self.samples[b]) and len(self.samples[a]) < self.repeats:
+                self.sample(a)
+            elif len(self.samples[b]) < self.repeats:
+                self.sample(b)
+            else:
+                self.sample(a)
+
+    def bracket(self, start:int, max_threads:int):
+        """
+        Doubles the thread count until throughput clearly drops, or stops
+        improving for two doublings. Returns (lo, best, hi).
+        """
+        lo = start
+        best = start
+        self.estimate(best)
+        flat = 0
+        threads = start
+        while threads * 2 <= max_threads:
+            threads *= 2
+            c = self.compare(threads, best)
+            if c > 0:
+                lo = best
+                best = threads
+                flat = 0
+            elif c < 0:
+                return lo, best, threads
+            else:
+                if self.estimate(threads)[0] > self.estimate(best)[0]:
+                    lo = best
+                    best = threads
+                flat += 1
+                if flat >= 2:
+                    return lo, best, threads
+        return lo, best, threads
+
+    def golden(self, lo:int, hi:int):
+        """
+        Golden-section search for the peak in [lo, hi], assuming throughput is
+        unimodal in the thread count. Returns the final bracket; the search
+        stops early when the two interior points can't be told apart, since
+        the top of the curve is then flat to within the measurement noise.
+        """
+        while hi - lo > max(self.min_resolution, int(self.resolution * hi)):
+            x1 = hi - int(round(invphi * (hi - lo)))
+            x2 = lo + int(round(invphi * (hi - lo)))
+            if x1 >= x2:
+                # bracket too small for two distinct interior points
+                break
+            c = self.compare(x1, x2)
+            if c < 0:
+                lo = x1
+            elif c > 0:
+                hi = x2
+            else:
+                break
+        return lo, hi
+
+    def run(self, start:int=1, max_threads:int=1 << 14):
+        """
+        Returns a dictionary with the best thread count found, its throughput
+        and confidence half-width, the range of thread counts that are
+        statistically as good (the uncertainty in the peak's location) and the
+        number of benchmarks run.
+        """
+        lo, best, hi = self.bracket(start, max_threads)
+        lo, hi = self.golden(lo, hi)
+        candidates = [t for t in self.samples if lo <= t <= hi] or [best]
+        best = max(candidates, key=lambda t: self.estimate(t)[0])
+        m, hw = self.estimate(best)
+        # every measured thread count that is statistically as good as the best
+        ties = [t for t in self.samples if sum(self.estimate(t)) >= m - hw]
+        return {'threads': best, 'thruput': m, 'thruput_ci': hw,
+                'threads_range': [min(ties + [lo]), max(ties + [hi])],
+                'runs': sum([len(s) for s in self.samples.values()])}
+
+def find_peak(measure, start:int=1, max_threads:int=1 << 14, **kwargs):
+    return PeakSearch(measure, **kwargs).run(start, max_threads)
@@ -0,0 +1,101 @@
+"""
+Per-interval time series of a go-ycsb run.
+
+go-ycsb prints a report every reporting interval; goycsb_bench keeps only the
+last one, while a Series keeps all of them, column by column, so warm-up tails,
+pauses and oscillations can be looked at after the fact. Series are stored as
+gzipped JSON of the form
+    {'wall': [unix time of each report, ...],
+     'ops': {'READ': {'time': [...], 'count': [...], 'p99_latency': [...], ...}, ...}}
+"""
+from os import path
+import gzip
+import json
+import os
+import time
+
+from . import proc
+
+class Series:
+    def __init__(self):
+        self.wall = []
+        self.ops = dict()
+
+    def __len__(self):
+        return len(self.wall)
+
+    def add(self, report:dict, wall:float=None):
+        """
+        Appends a report; operations (or fields) missing from it get None.
+        """
+        n = len(self.wall)
+        self.wall.append(time.time() if wall is None else wall)
+        for op, rec in report.items():
+            cols = self.ops.setdefault(op, dict())
+            for k in rec:
+                if k not in cols:
+                    cols[k] = [None] * n
+        for op, cols in self.ops.items():
+            rec = report.get(op, {})
+            for k in cols:
+                cols[k].append(rec.get(k))
+
+    def interval_thruput(self, op:str=None):
+        """
+        Returns [(time, ops/sec over the interval ending at time), ...].
+        go-ycsb's counts and OPS are cumulative since the end of warmup, so this
+        differences consecutive counts. With op=None, counts of all operations
+        are summed (but not go-ycsb's TOTAL line, nor failed operations).
+        """
+        # ycsb imports this module
+        from .ycsb import report_ops
+        ops = [op] if op is not None else report_ops(self.ops)
+        ret = []
+        last_t = None
+        last_c = None
+        for i in range(len(self.wall)):
+            ts = [self.ops[o]['time'][i] for o in ops if self.ops[o]['time'][i] is not None]
+            if len(ts) == 0:
+                continue
+            t = max(ts)
+            c = sum([self.ops[o]['count'][i] or 0 for o in ops])
+            if last_t is not None and t > last_t:
+                ret.append((t, (c - last_c) / (t - last_t)))
+            last_t = t
+            last_c = c
+        return ret
+
+    def to_dict(self):
+        return {'wall': self.wall, 'ops': self.ops}
+
+    def save(self, filename:str):
+        with gzip.open(filename, 'wt') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+def load_series(filename:str):
+    with gzip.open(filename, 'rt') as f:
+        d = json.load(f)
+    s = Series()
+    s.wall = d['wall']
+    s.ops = d['ops']
+    return s
+
+def new_sample_path(*parts):
+    """
+    Like new_series_path, for a go-ycsb sample stream (see samples.py) under
+    <outdir>/samples.
+    """
+    d = path.join(proc.global_args.outdir, 'samples')
+    os.makedirs(d, exist_ok=True)
+    name = '-'.join([str(p) for p in parts] + [str(int(time.time() * 1000))])
+    return path.join(d, name + '.bin')
+
+def new_series_path(*parts):
+    """
+    Returns a fresh path under <outdir>/series for the series of one run, e.g.
+    new_series_path('memkv', '64t') -> <outdir>/series/memkv-64t-1666000000.json.gz
+    """
+    d = path.join(proc.global_args.outdir, 'series')
+    os.makedirs(d, exist_ok=True)
+    name = '-'.join([str(p) for p in parts] + [str(int(time.time() * 1000))])
+    return path.join(d, name + '.json.gz')
@@ -0,0 +1,288 @@
+"""
+Declarative experiment specs.
+
+An experiment is a JSON file describing what to run: the service and its
+server topology, the client cores, the workload mix and the search strategy,
+e.g.
+
+    {"name": "peaks", "strategy": "peak", "clnts": 12,
+     "workload": {"valuesize": 128, "read": 0.95, "update": 0.05},
+     "grid": {"topology": [{"name": "1s1c", "srvs": [1]},
+                           {"name": "2s2c", "srvs": ["0-1", "10-11"]}]}}
+
+Anything left out takes its value from `defaults`. "grid" maps fields (dotted
+paths for nested ones, e.g. "workload.valuesize") to lists of values;
+expand() returns one concrete experiment per element of their cartesian
+product. Core sets are lists of cores or strings like "0-3,8", or a number of
+cores for the harness to allocate when the experiment runs (see alloc.py), in
+which case "placement" says how to pick them (see placement.py). A literal set
+takes the SMT siblings of its cores along, so the literal sets of one
+experiment must be on different physical cores.
+"""
+import copy
+import itertools
+import json
+
+from . import placement
+from . import netns
+from . import timeline
+from . import profile
+
+strategies = ['peak', 'lt', 'fixed', 'migration']
+
+defaults = {
+    'name': None,
+    'strategy': 'peak',
+    # 'memkv' or 'rediskv'
+    'service': 'memkv',
+    # address of an already running service, e.g. {'memkv': '10.0.0.1:12200'};
+    # if null, the harness starts memkv locally on `topology`
+    'hosts': None,
+    # {'name': '2s2c', 'srvs': [cores of shard 0, cores of shard 1, ...]}; a
+    # number instead of a core set asks for that many cores from the allocator
+    'topology': None,
+    # client cores, or a number of cores to allocate
+    'clnts': None,
+    'workload': {
+        'valuesize': 128,
+        'read': 0.95,
+        'update': 0.05,
+        'recordcount': None,
+        'distribution': 'uniform',
+        'warmup': 20,
+        # cap on the length of each run, in seconds
+        'runtime': 60,
+    },
+    # go-ycsb processes to spread the client threads over
+    'clients': {'procs': 1, 'numa': False},
+    # how allocated cores are picked (see placement.py): policy 'compact',
+    # 'physical' or 'spread'; clients 'any', 'local' or 'remote' (relative to
+    # the servers' nodes); membind binds memory to each process's nodes
+    'placement': {'policy': 'physical', 'clients': 'any', 'membind': False},
+    # if not null, the local memkv runs as an emulated multi-node cluster with
+    # a network namespace per shard and links shaped as given (see netns.py):
+    # {'rtt': ms, 'jitter': ms, 'rate': e.g. '1gbit', 'loss': %, 'shards': [...]}
+    'network': None,
+    # if not null, points are profiled (see profile.py): {'kinds': ['oncpu',
+    # 'offcpu', 'pprof'], 'backend': 'perf' or 'bcc', 'duration': s, 'points':
+    # 'result' or 'all', ...}; profiles of a result point go to
+    # <service>_profiled.jsons
+    'profile': None,
+    # count hardware events (cycles, instructions, LLC misses, context
+    # switches) on the server and client cores with perf stat, recorded per
+    # op with every point (see counters.py)
+    'counters': False,
+    # strategy parameters; for every strategy but migration, steady_tol
+    # (relative half-width of the throughput's confidence interval at which a
+    # run ends, default 0.02) and batch (s, default 1), see steady.py, and
+    #  peak: start, max_threads, repeats, resolution
+    #  lt: threads (list; default 1-5 then steps of 5), patience, and for the
+    #      open-loop ladder open_fractions, open_threads
+    #  fixed: threads
+    #  migration: threads, interval (ms), schedule (see timeline.py), and for
+    #      the per-event metrics baseline (s), tolerance, hold (s); with
+    #      sample_interval (ms), also per operation type at that resolution
+    'search': {},
+    'grid': {},
+}
+
+distributions = ['uniform', 'zipfian', 'latest']
+
+class SpecError(ValueError):
+    pass
+
+def parse_cores(cores):
+    """
+    Returns a core set as a list of ints; accepts lists, ranges and strings like
+    "0-3,8". A number (of cores to allocate) is returned as is.
+    """
+    if isinstance(cores, int):
+        if cores < 1:
+            raise SpecError("need at least one core, not {0}".format(cores))
+        return cores
+    if isinstance(cores, str):
+        ret = []
+        for part in cores.split(','):
+            part = part.strip()
+            if part == '':
+                continue
+            lo, _, hi = part.partition('-')
+            try:
+                ret += list(range(int(lo), int(hi if hi != '' else lo) + 1))
+            except ValueError:
+                raise SpecError("bad core list {0!r}".format(cores))
+        return ret
+    try:
+        return [int(c) for c in cores]
+    except (TypeError, ValueError):
+        raise SpecError("bad core list {0!r}".format(cores))
+
+def ncores(cores):
+    """
+    Size of a parsed core set (a list, or a number of cores to allocate).
+    """
+    return cores if isinstance(cores, int) else len(cores)
+
+def _merge(base:dict, over:dict, where:str):
+    ret = copy.deepcopy(base)
+    for k, v in over.items():
+        if k not in base:
+            raise SpecError("unknown field {0}{1}".format(where, k))
+        if isinstance(base[k], dict) and k not in ['search', 'grid', 'hosts', 'network']:
+            if not isinstance(v, dict):
+                raise SpecError("{0}{1} must be an object".format(where, k))
+            ret[k] = _merge(base[k], v, where + k + '.')
+        else:
+            ret[k] = copy.deepcopy(v)
+    return ret
+
+def _set(spec:dict, dotted:str, value):
+    keys = dotted.split('.')
+    d = spec
+    for k in keys[:-1]:
+        if not isinstance(d.get(k), dict):
+            raise SpecError("grid field {0} doesn't exist".format(dotted))
+        d = d[k]
+    if keys[-1] not in d and d is not spec['search']:
+        raise SpecError("grid field {0} doesn't exist".format(dotted))
+    d[keys[-1]] = copy.deepcopy(value)
+
+def _network(network):
+    """
+    Returns network with the link defaults filled in. Raises SpecError.
+    """
+    if network is None:
+        return None
+    if not isinstance(network, dict):
+        raise SpecError("network must be an object or null")
+    for k in network:
+        if k not in netns.link_fields:
+            raise SpecError("unknown field network.{0}".format(k))
+    ret = dict(netns.link_defaults, **network)
+    shards = ret.get('shards') or []
+    if not isinstance(shards, list) or not all([isinstance(l, dict) for l in shards]):
+        raise SpecError("network.shards must be a list of objects")
+    for l in [ret] + shards:
+        for k, v in l.items():
+            if l is not ret and k not in netns.link_defaults:
+                raise SpecError("unknown field network.shards[].{0}".format(k))
+            if k in ['rtt', 'jitter', 'loss'] and not (isinstance(v, (int, float)) and v >= 0):
+                raise SpecError("network {0} must be a non-negative number".format(k))
+    return ret
+
+def _profile(spec):
+    """
+    Returns the profile spec with its defaults filled in. Raises SpecError.
+    """
+    if spec is None:
+        return None
+    if not isinstance(spec, dict):
+        raise SpecError("profile must be an object or null")
+    for k in spec:
+        if k not in profile.defaults:
+            raise SpecError("unknown field profile.{0}".format(k))
+    ret = dict(profile.defaults, **spec)
+    for k, allowed in [('kinds', profile.kinds), ('targets', profile.targets), ('pprof', profile.pprof_kinds)]:
+        if not isinstance(ret[k], list) or not all([v in allowed for v in ret[k]]):
+            raise SpecError("profile.{0} must be a list of {1}".format(k, ", ".join(allowed)))
+    if ret['backend'] not in profile.backends:
+        raise SpecError("profile.backend must be one of {0}".format(", ".join(profile.backends)))
+    if ret['points'] not in ['result', 'all']:
+        raise SpecError("profile.points must be result or all")
+    if not (isinstance(ret['duration'], (int, float)) and ret['duration'] > 0):
+        raise SpecError("profile.duration must be a positive number of seconds")
+    return ret
+
+def validate(exp:dict):
+    """
+    Checks a concrete (expanded) experiment and normalizes its core sets.
+    Raises SpecError.
+    """
+    if exp['strategy'] not in strategies:
+        raise SpecError("strategy must be one of {0}".format(", ".join(strategies)))
+    if exp['service'] not in ['memkv', 'rediskv']:
+        raise SpecError("unknown service {0}".format(exp['service']))
+    if exp['clnts'] is None:
+        raise SpecError("clnts (client cores) is required")
+    exp['clnts'] = parse_cores(exp['clnts'])
+    if exp['hosts'] is None:
+        if exp['service'] != 'memkv':
+            raise SpecError("only memkv can be started locally; give hosts for {0}".format(exp['service']))
+        t = exp['topology']
+        if not isinstance(t, dict) or 'srvs' not in t or len(t['srvs']) == 0:
+            raise SpecError("a local memkv needs a topology with at least one shard")
+        t['srvs'] = [parse_cores(s) for s in t['srvs']]
+        t.setdefault('name', '{0}s{1}c'.format(len(t['srvs']), ncores(t['srvs'][0])))
+    elif exp['service'] not in exp['hosts']:
+        raise SpecError("hosts has no address for {0}".format(exp['service']))
+    exp['network'] = _network(exp['network'])
+    if exp['network'] is not None and exp['hosts'] is not None:
+        raise SpecError("network emulation needs a local memkv, not hosts")
+    exp['profile'] = _profile(exp['profile'])
+    if exp['profile'] is not None:
+        if exp['strategy'] == 'migration':
+            raise SpecError("the migration strategy can't be profiled")
+        if exp['profile']['points'] == 'result' and exp['strategy'] not in ['peak', 'fixed']:
+            raise SpecError("the {0} strategy has no result point to profile; use profile.points all".format(exp['strategy']))
+    w = exp['workload']
+    if not (0 <= w['read'] <= 1 and 0 <= w['update'] <= 1 and w['read'] + w['update'] <= 1 + 1e-9):
+        raise SpecError("read and update proportions must be in [0, 1] and add up to at most 1")
+    if w['distribution'] not in distributions:
+        raise SpecError("distribution must be one of {0}".format(", ".join(distributions)))
+    if exp['clients']['procs'] < 1:
+        raise SpecError("clients.procs must be at least 1")
+    pl = exp['placement']
+    if pl['policy'] not in placement.policies:
+        raise SpecError("placement.policy must be one of {0}".format(", ".join(placement.policies)))
+    if pl['clients'] not in placement.client_policies:
+        raise SpecError("placement.clients must be one of {0}".format(", ".join(placement.client_policies)))
+    s = exp['search']
+    for k in ['steady_tol', 'batch']:
+        if k in s and not (isinstance(s[k], (int, float)) and s[k] > 0):
+            raise SpecError("search.{0} must be a positive number".format(k))
+    if exp['strategy'] in ['fixed', 'migration'] and 'threads' not in s:
+        raise SpecError("search.threads is required for the {0} strategy".format(exp['strategy']))
+    if exp['strategy'] == 'migration':
+        if exp['topology'] is None:
+            raise SpecError("the migration strategy needs a topology")
+        try:
+            events = timeline.expand_schedule(s.get('schedule', []))
+        except (ValueError, KeyError, TypeError) as e:
+            raise SpecError("bad schedule: {0}".format(e))
+        for e in events:
+            if e['shard'] is not None and not 0 <= e['shard'] < len(exp['topology']['srvs']):
+                raise SpecError("schedule entry {0} doesn't name a shard of the topology".format(e))
+    return exp
+
+def expand(spec:dict):
+    """
+    Returns the list of concrete, validated experiments described by spec.
+    """
+    base = _merge(defaults, spec, '')
+    # so that grid fields like network.rtt and profile.backend exist
+    base['network'] = _network(base['network'])
+    base['profile'] = _profile(base['profile'])
+    grid = base.pop('grid')
+    for k, vs in grid.items():
+        if not isinstance(vs, list) or len(vs) == 0:
+            raise SpecError("grid field {0} must be a non-empty list".format(k))
+    exps = []
+    for values in itertools.product(*grid.values()):
+        exp = copy.deepcopy(base)
+        for k, v in zip(grid.keys(), values):
+            _set(exp, k, v)
+        exps.append(validate(exp))
+    return exps
+
+def load_spec(filename:str):
+    """
+    Reads an experiment spec file and returns its expanded experiments.
+    """
+    with open(filename, 'r') as f:
+        try:
+            spec = json.load(f)
+        except ValueError as e:
+            raise SpecError("{0}: {1}".format(filename, e))
+    if spec.get('name') is None:
+        raise SpecError("{0}: experiment has no name".format(filename))
+    return expand(spec)
@@ -0,0 +1,125 @@
+"""
+Adaptive run length: end a measurement as soon as throughput has converged
+instead of always running for a fixed time.
+
+go-ycsb's reports are cumulative, so SteadyState differences consecutive
+reports into batches of `batch` seconds (batch means) and computes a confidence
+interval for the mean throughput over the last `window` batches, dropping
+leading batches that only widen the interval (MSER-style truncation of a
+warm-up transient). The run is done once the interval's half-width is within
+`tolerance` of the mean; the caller's runtime acts as the cap for runs that
+never converge.
+"""
+import math
+
+from .ycsb import report_time, report_ops
+
+# two-sided 95% Student t critical values, indexed by degrees of freedom
+_t95 = [None, 12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+        2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093,
+        2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045,
+        2.042]
+
+def t95(df:int):
+    if df < len(_t95):
+        return _t95[df]
+    return 1.96
+
+def mean_ci(xs:list[float]):
+    """
+    Returns (mean, half-width of the 95% confidence interval) of xs.
+    """
+    n = len(xs)
+    m = sum(xs) / n
+    if n < 2:
+        return m, math.inf
+    var = sum([(x - m)**2 for x in xs]) / (n - 1)
+    return m, t95(n - 1) * math.sqrt(var / n)
+
+class SteadyState:
+    def __init__(self, tolerance:float=0.02, batch:float=1.0, min_batches:int=5, window:int=30):
+        self.tolerance = tolerance
+        self.batch = batch
+        self.min_batches = min_batches
+        self.window = window
+        # (time, {op: count}) at every batch boundary
+        self.bounds = []
+        self.batches = []
+        self.last = None
+        self.converged = False
+
+    def add(self, report:dict):
+        """
+        Feeds one go-ycsb report; returns True once throughput has converged.
+        """
+        if len(report) == 0:
+            return self.converged
+        self.last = report
+        t = report_time(report)
+        counts = {op: report[op]['count'] for op in report_ops(report)}
+        if len(self.bounds) == 0:
+            self.bounds.append((t, counts))
+            return False
+        t0, c0 = self.bounds[-1]
+        if t - t0 < self.batch:
+            return self.converged
+        self.batches.append((sum(counts.values()) - sum(c0.values())) / (t - t0))
+        self.bounds.append((t, counts))
+        if len(self.batches) >= self.min_batches:
+            m, hw = self.ci()
+            self.converged = m > 0 and hw / m <= self.tolerance
+        return self.converged
+
+    def steady_batches(self):
+        """
+        Returns how many of the most recent batches make up the steady window.
+        """
+        xs = self.batches[-self.window:]
+        best_n = len(xs)
+        best_hw = None
+        for d in range(0, len(xs) // 2 + 1):
+            if len(xs) - d < self.min_batches:
+                break
+            m, hw = mean_ci(xs[d:])
+            if m > 0 and (best_hw is None or hw / m < best_hw):
+                best_n, best_hw = len(xs) - d, hw / m
+        return best_n
+
+    def ci(self):
+        return mean_ci(self.batches[-self.steady_batches():])
+
+    def result(self):
+        """
+        Returns the last report with each operation's thruput replaced by its
+        throughput over the steady window, so a warm-up transient doesn't drag
+        the number down. Latencies are
+        still go-ycsb's cumulative ones.
+        """
+        if self.last is None:
+            return dict()
+        if len(self.batches) == 0:
+            return self.last
+        n = self.steady_batches()
+        t0, c0 = self.bounds[-(n + 1)]
+        t1, c1 = self.bounds[-1]
+        a = dict()
+        for op, rec in self.last.items():
+            rec = dict(rec)
+            if op in c1:
+                rec['thruput'] = (c1[op] - c0.get(op, 0)) / (t1 - t0)
+            elif op == 'TOTAL':
+                rec['thruput'] = (sum(c1.values()) - sum(c0.values())) / (t1 - t0)
+            a[op] = rec
+        return a
+
+    def info(self):
+        """
+        Summary of the run length decision, for storing with the result.
+        """
+        if len(self.batches) == 0:
+            return {'converged': False, 'batches': 0}
+        m, hw = self.ci()
+        return {'converged': self.converged, 'batches': len(self.batches),
+                'steady_batches': self.steady_batches(),
+                'runtime': self.bounds[-1][0], 'mean': m,
+                'rel_ci': hw / m if m > 0 and math.isfinite(hw) else None}
@@ -0,0 +1,119 @@
+"""
+Throughput timelines around reconfigurations of a running cluster.
+
+A migration run yields go-ycsb reports and reconfiguration events, both
+stamped with seconds since the load started on the harness's clock. rates()
+turns the (cumulative) reports into per-interval rates of successful and
+failed operations, samples.op_points() does the same for one operation type
+from go-ycsb's sub-second samples; analyze() measures what each event cost:
+
+    baseline         mean ops/sec over the `baseline` seconds before the event
+    dip              lowest ops/sec from the event until the next one
+    dip_depth        1 - dip/baseline
+    time_to_recover  seconds from the event's start until throughput is back
+                     within `tolerance` of the baseline and stays there for
+                     `hold` seconds before the next event or the end of
+                     the run (None if it never is)
+    errors           failed operations (go-ycsb's <OP>_ERROR counts)
+    stalls           intervals without a single successful operation
+    longest_stall    seconds of the longest run of such intervals
+
+A schedule is a list of events, e.g.
+    [{'at': 40, 'op': 'add', 'shard': 1}, {'at': 70, 'op': 'remove', 'shard': 1},
+     {'at': 90, 'op': 'rebalance'},
+     {'churn': {'shard': 2, 'start': 100, 'every': 10, 'count': 4}}]
+where churn repeatedly adds and removes a shard, and {'at': 40, 'add': 1} is
+short for an add.
+"""
+
+from .ycsb import report_ops
+
+ops = ['add', 'remove', 'rebalance']
+
+def expand_schedule(schedule:list[dict]):
+    """
+    Returns the events of schedule as [{'at', 'op', 'shard'}, ...] sorted by
+    time, with churn expanded. Raises ValueError.
+    """
+    events = []
+    for e in schedule:
+        if 'churn' in e:
+            c = e['churn']
+            for i in range(c.get('count', 2)):
+                events.append({'at': c['start'] + i * c['every'], 'op': ['add', 'remove'][i % 2], 'shard': c['shard']})
+        elif 'add' in e:
+            events.append({'at': e['at'], 'op': 'add', 'shard': e['add']})
+        else:
+            if e.get('op') not in ops:
+                raise ValueError("schedule entry {0} has no op (one of {1})".format(e, ", ".join(ops)))
+            if e['op'] != 'rebalance' and 'shard' not in e:
+                raise ValueError("schedule entry {0} doesn't say which shard".format(e))
+            events.append({'at': e['at'], 'op': e['op'], 'shard': e.get('shard')})
+    return sorted(events, key=lambda e: e['at'])
+
+def rates(samples:list[tuple]):
+    """
+    Given [(t, report), ...] as go-ycsb printed them, returns one
+    {'t', 'dt', 'ok', 'failed', 'thruput', 'errors'} per interval: the
+    interval ending at t, its length by go-ycsb's clock, its successful and
+    failed operations and their rates in ops/sec. go-ycsb's TOTAL line (the
+    sum of the others) isn't counted.
+    """
+    ret = []
+    last = None
+    for t, r in samples:
+        took = max([r[op]['time'] for op in r])
+        ok = sum([r[op]['count'] for op in report_ops(r)])
+        failed = sum([r[op]['count'] for op in r if op.endswith('_ERROR')])
+        if last is not None and took > last[0]:
+            dt = took - last[0]
+            d_ok = max(ok - last[1], 0)
+            d_failed = max(failed - last[2], 0)
+            ret.append({'t': t, 'dt': dt, 'ok': d_ok, 'failed': d_failed,
+                        'thruput': d_ok / dt, 'errors': d_failed / dt})
+        last = (took, ok, failed)
+    return ret
+
+def analyze(points:list[dict], events:list[dict], baseline:float=5, tolerance:float=0.1, hold:float=1):
+    """
+    Returns a copy of every event (with its 'start' and, if it finished,
+    'end') with the metrics described above, computed from points (from
+    rates()).
+    """
+    ret = []
+    for i, e in enumerate(events):
+        start = e['start']
+        until = events[i + 1]['start'] if i + 1 < len(events) else float('inf')
+        before = [p['thruput'] for p in points if start - baseline <= p['t'] < start]
+        after = [p for p in points if start < p['t'] <= until]
+        m = dict(e)
+        m['baseline'] = sum(before) / len(before) if len(before) > 0 else None
+        m['dip'] = min([p['thruput'] for p in after]) if len(after) > 0 else None
+        m['dip_depth'] = None
+        m['time_to_recover'] = None
+        if m['baseline'] is not None and m['baseline'] > 0 and m['dip'] is not None:
+            m['dip_depth'] = max(1 - m['dip'] / m['baseline'], 0)
+            good = (1 - tolerance) * m['baseline']
+            for j, p in enumerate(after):
+                # back from the start of p's interval, if every interval
+                # after it is good until hold seconds have passed
+                begin = p['t'] - p['dt']
+                held = False
+                for q in after[j:]:
+                    if q['thruput'] < good:
+                        break
+                    if q['t'] - begin >= hold:
+                        held = True
+                        break
+                if held:
+                    m['time_to_recover'] = max(begin - start, 0)
+                    break
+        m['errors'] = sum([p['failed'] for p in after])
+        m['stalls'] = len([p for p in after if p['ok'] == 0])
+        m['longest_stall'] = 0
+        stall = 0
+        for p in after:
+            stall = stall + p['dt'] if p['ok'] == 0 else 0
+            m['longest_stall'] = max(m['longest_stall'], stall)
+        ret.append(m)
+    return ret
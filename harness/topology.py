@@ -0,0 +1,96 @@
+"""
+The host's CPU layout, as the kernel describes it under /sys/devices/system/cpu.
+"""
+import os
+import re
+
+cpudir = '/sys/devices/system/cpu'
+
+def _read(filename:str):
+    try:
+        with open(filename, 'r') as f:
+            return f.read().strip()
+    except (FileNotFoundError, PermissionError):
+        return None
+
+def parse_cpulist(s:str):
+    """
+    Parses the kernel's cpu list format, e.g. "0-3,8,10-11".
+    """
+    ret = []
+    for part in s.split(','):
+        if part == '':
+            continue
+        lo, _, hi = part.partition('-')
+        ret += list(range(int(lo), int(hi if hi != '' else lo) + 1))
+    return ret
+
+def cpulist_str(cpus):
+    """
+    Formats cpus the way the kernel does, e.g. "0-3,8,10-11".
+    """
+    parts = []
+    for c in sorted(set(cpus)):
+        if len(parts) > 0 and parts[-1][1] == c - 1:
+            parts[-1][1] = c
+        else:
+            parts.append([c, c])
+    return ",".join([str(lo) if lo == hi else "{0}-{1}".format(lo, hi) for lo, hi in parts])
+
+def cpu_node(cpu:int):
+    """
+    Returns the NUMA node of cpu (0 if the kernel doesn't say).
+    """
+    d = path_of(cpu)
+    try:
+        for f in os.listdir(d):
+            m = re.fullmatch(r'node(\d+)', f)
+            if m:
+                return int(m.group(1))
+    except FileNotFoundError:
+        pass
+    return 0
+
+def path_of(cpu:int):
+    return '{0}/cpu{1}'.format(cpudir, cpu)
+
+def cpu_siblings(cpu:int):
+    """
+    Returns the hardware threads sharing a physical core with cpu (including
+    cpu itself).
+    """
+    s = _read(path_of(cpu) + '/topology/thread_siblings_list')
+    if s is None:
+        return [cpu]
+    return parse_cpulist(s)
+
+def with_siblings(cores):
+    """
+    Returns cores plus every SMT sibling of them, as a set.
+    """
+    ret = set()
+    for c in cores:
+        ret.update(cpu_siblings(c))
+    return ret
+
+def online_cpus():
+    s = _read(cpudir + '/online')
+    if s is None:
+        return list(range(os.cpu_count() or 1))
+    return parse_cpulist(s)
+
+def physical_core(cpu:int):
+    """
+    Returns an id shared by all hardware threads of cpu's physical core (its
+    lowest-numbered sibling).
+    """
+    return min(cpu_siblings(cpu))
+
+def cpu_package(cpu:int):
+    """
+    Returns the socket (physical package) of cpu (0 if the kernel doesn't say).
+    """
+    s = _read(path_of(cpu) + '/topology/physical_package_id')
+    if s is None or int(s) < 0:
+        return 0
+    return int(s)
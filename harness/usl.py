@@ -0,0 +1,121 @@
+"""
+Universal Scalability Law fitting.
+
+    X(N) = lam * N / (1 + sigma * (N - 1) + kappa * N * (N - 1))
+
+sigma is the contention (serialization) coefficient and kappa the coherency
+(crosstalk) coefficient; kappa = 0 is Amdahl's law. For a fixed lam the model
+is linear in (sigma, kappa), so fit() solves that 2x2 least-squares problem and
+searches over lam in the outer loop. No numpy/scipy needed.
+"""
+import math
+
+class USL:
+    def __init__(self, lam:float, sigma:float, kappa:float):
+        self.lam = lam
+        self.sigma = sigma
+        self.kappa = kappa
+
+    def predict(self, n:float):
+        return self.lam * n / (1 + self.sigma * (n - 1) + self.kappa * n * (n - 1))
+
+    def peak(self):
+        """
+        Returns the N with the highest predicted throughput (inf if there is no
+        coherency penalty).
+        """
+        if self.kappa <= 0:
+            return math.inf
+        return math.sqrt(max(1 - self.sigma, 0) / self.kappa)
+
+    def to_dict(self):
+        peak = self.peak()
+        return {'lam': self.lam, 'sigma': self.sigma, 'kappa': self.kappa,
+                'peak_n': peak if math.isfinite(peak) else None}
+
+def _fit_coeffs(ns, xs, lam, amdahl):
+    # lam*N/X - 1 = sigma*(N-1) + kappa*N*(N-1)
+    ys = [lam * n / x - 1 for n, x in zip(ns, xs)]
+    us = [n - 1 for n in ns]
+    vs = [n * (n - 1) for n in ns]
+    suu = sum([u * u for u in us])
+    if amdahl or suu == 0:
+        sigma = sum([u * y for u, y in zip(us, ys)]) / suu if suu > 0 else 0.0
+        return max(sigma, 0.0), 0.0
+    svv = sum([v * v for v in vs])
+    suv = sum([u * v for u, v in zip(us, vs)])
+    suy = sum([u * y for u, y in zip(us, ys)])
+    svy = sum([v * y for v, y in zip(vs, ys)])
+    det = suu * svv - suv * suv
+    if det == 0:
+        return max(suy / suu, 0.0), 0.0
+    sigma = (suy * svv - svy * suv) / det
+    kappa = (svy * suu - suy * suv) / det
+    # keep the coefficients physical, refitting the other one alone
+    if kappa < 0:
+        return max(suy / suu, 0.0), 0.0
+    if sigma < 0:
+        return 0.0, max(svy / svv, 0.0)
+    return sigma, kappa
+
+def _sse(model, ns, xs):
+    # relative error, so high-N points don't dominate
+    return sum([((model.predict(n) - x) / x)**2 for n, x in zip(ns, xs)])
+
+def fit(ns:list[float], xs:list[float], amdahl:bool=False):
+    """
+    Fits a USL (or Amdahl, if amdahl) model to throughputs xs measured at
+    concurrencies ns. Needs at least two points (three for USL to be useful).
+    """
+    pts = [(n, x) for n, x in zip(ns, xs) if x > 0]
+    ns = [float(n) for n, _ in pts]
+    xs = [float(x) for _, x in pts]
+    if len(ns) == 0:
+        raise ValueError("no points with positive throughput to fit")
+
+    def model(lam):
+        sigma, kappa = _fit_coeffs(ns, xs, lam, amdahl)
+        return USL(lam, sigma, kappa)
+
+    # lam is at least the best per-unit throughput seen, and (with sigma >= 0)
+    # not more than a few times that
+    lo = math.log(max([x / n for n, x in zip(ns, xs)]))
+    hi = lo + math.log(8)
+    invphi = (math.sqrt(5) - 1) / 2
+    for _ in range(60):
+        a = hi - invphi * (hi - lo)
+        b = lo + invphi * (hi - lo)
+        if _sse(model(math.exp(a)), ns, xs) < _sse(model(math.exp(b)), ns, xs):
+            hi = b
+        else:
+            lo = a
+    return model(math.exp((lo + hi) / 2))
+
+def loo_errors(ns:list[float], xs:list[float], amdahl:bool=False):
+    """
+    Leave-one-out relative prediction error at every point: how far each
+    measurement is from what a fit to the other points predicts. Large values
+    mark points that are surprising (or badly measured).
+    """
+    errs = []
+    for i in range(len(ns)):
+        rest_n = ns[:i] + ns[i + 1:]
+        rest_x = xs[:i] + xs[i + 1:]
+        if len(rest_n) < 2:
+            errs.append(None)
+            continue
+        m = fit(rest_n, rest_x, amdahl)
+        errs.append((xs[i] - m.predict(ns[i])) / m.predict(ns[i]))
+    return errs
+
+def predict_range(ns:list[float], xs:list[float], n:float, amdahl:bool=False):
+    """
+    Returns (prediction, lowest, highest) at n over the full fit and every
+    leave-one-out fit; a wide range means the model is uncertain there and n
+    is worth measuring.
+    """
+    preds = [fit(ns, xs, amdahl).predict(n)]
+    for i in range(len(ns)):
+        if len(ns) - 1 >= 2:
+            preds.append(fit(ns[:i] + ns[i + 1:], xs[:i] + xs[i + 1:], amdahl).predict(n))
+    return preds[0], min(preds), max(preds)
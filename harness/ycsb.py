@@ -0,0 +1,245 @@
+"""
+Running go-ycsb as a load generator and parsing what it prints.
+"""
+from os import path
+
+from .proc import goycsbdir, gokvdir, start_command, stop_proc, many_cores
+from .build import binary
+from .series import Series
+
+def goycsb_args(threads:int, valuesize:int, readprop:float, updateprop:float,
+                kvname:str='memkv', target:int=-1, interval:int=100, warmup:int=20,
+                props:dict=None, distribution:str='uniform'):
+    """
+    Returns the go-ycsb command line for an unbounded `run` of kvname. props
+    holds any extra -p properties, e.g. {'memkv.coord': '127.0.0.1:12200'}.
+    distribution is the request (key) distribution. interval is how often
+    go-ycsb reports, in milliseconds.
+    """
+    args = [binary('go-ycsb'),
+            'run', kvname,
+            '-P', path.join(gokvdir, 'bench', kvname + '_workload'),
+            '--threads', str(threads),
+            '--target', str(target),
+            '--interval', str(interval),
+            '-p', 'operationcount=' + str(2**32 - 1),
+            '-p', 'fieldlength=' + str(valuesize),
+            '-p', 'requestdistribution=' + distribution,
+            '-p', 'readproportion=' + str(readprop),
+            '-p', 'updateproportion=' + str(updateprop),
+            '-p', 'warmuptime=' + str(warmup),
+            ]
+    for k, v in (props or {}).items():
+        args += ['-p', '{0}={1}'.format(k, v)]
+    return args
+
+def start_goycsb(bench_cores, *args, membind:bool=False, **kwargs):
+    """
+    Starts go-ycsb pinned to bench_cores (and with membind, its memory bound to
+    their NUMA nodes); the remaining arguments are passed to goycsb_args.
+    """
+    return start_command(many_cores(goycsb_args(*args, **kwargs), bench_cores, membind), cwd=goycsbdir)
+
+# go-ycsb summary field -> (record key, type). go-ycsb prints one line per
+# operation at every reporting interval (and once more when the run finishes):
+# UPDATE - Takes(s): 12.6, Count: 999999, OPS: 79654.6, Avg(us): 12434, Min(us): 28, Max(us): 54145, 50th(us): 11000, 90th(us): 20000, 95th(us): 24000, 99th(us): 29000, 99.9th(us): 41000, 99.99th(us): 49000
+fields = {
+    'Takes(s)': ('time', float),
+    'Count': ('count', int),
+    'OPS': ('thruput', float),
+    'Avg(us)': ('avg_latency', float),
+    'Min(us)': ('min_latency', float),
+    'Max(us)': ('max_latency', float),
+    '50th(us)': ('p50_latency', float),
+    '90th(us)': ('p90_latency', float),
+    '95th(us)': ('p95_latency', float),
+    '99th(us)': ('p99_latency', float),
+    '99.9th(us)': ('p999_latency', float),
+    '99.99th(us)': ('p9999_latency', float),
+}
+
+def parse_summary_line(line:str):
+    """
+    Returns (opname, record) for a go-ycsb summary line, or None if line isn't
+    one. Uses plain string splitting, since this runs on every line go-ycsb
+    prints.
+    """
+    i = line.find(' - Takes(s): ')
+    if i == -1:
+        return None
+    rec = dict()
+    for field in line[i + 3:].rstrip('\n').split(', '):
+        name, _, value = field.partition(': ')
+        f = fields.get(name)
+        if f is None:
+            continue
+        try:
+            rec[f[0]] = f[1](value)
+        except ValueError:
+            return None
+    return line[:i].strip(), rec
+
+class ReportParser:
+    """
+    Incremental parser for go-ycsb stdout. Feed it one line at a time; it
+    groups the per-operation summary lines of each reporting interval into
+    reports of the form {'READ': {...}, 'UPDATE': {...}}, and feed() returns
+    each report as soon as it is complete.
+    """
+    def __init__(self):
+        self.ops = set() # operations in the last complete report
+        self.cur = dict()
+
+    def _complete(self):
+        r = self.cur
+        self.cur = dict()
+        self.ops = set(r)
+        return r
+
+    def feed(self, line:str):
+        """
+        Returns the list of reports completed by line (usually empty or one).
+        """
+        s = parse_summary_line(line)
+        if s is None:
+            # anything else go-ycsb prints ends the current report
+            if len(self.cur) > 0:
+                return [self._complete()]
+            return []
+        opname, rec = s
+        done = []
+        if opname in self.cur:
+            done.append(self._complete())
+        self.cur[opname] = rec
+        if len(self.ops) > 0 and self.ops.issubset(self.cur):
+            done.append(self._complete())
+        return done
+
+    def flush(self):
+        """
+        Returns the partially-collected report (if any) at end of stream.
+        """
+        if len(self.cur) > 0:
+            return [self._complete()]
+        return []
+
+def is_op(name:str):
+    """
+    Whether name is an operation of its own: not go-ycsb's TOTAL line (the sum
+    of the others) nor an <OP>_ERROR line (the failed ones).
+    """
+    return name != 'TOTAL' and not name.endswith('_ERROR')
+
+def report_ops(report:dict):
+    """
+    The operations of a report (or of anything keyed by operation) that add
+    up to its total, i.e. without TOTAL and errors.
+    """
+    return [op for op in report if is_op(op)]
+
+def report_time(report:dict):
+    return max([report[op]['time'] for op in report])
+
+def report_count(report:dict):
+    return sum([report[op]['count'] for op in report_ops(report)])
+
+def report_thruput(report:dict):
+    """
+    Total thruput of a report (or a record's 'lts'), counting every operation
+    once.
+    """
+    return sum([report[op]['thruput'] for op in report_ops(report)])
+
+def read_reports(p, runtime:int, on_report=None, raw_path:str=None):
+    """
+    Reads p's stdout once, as it is produced, until go-ycsb has reported for
+    runtime seconds or on_report (called for every complete report) returns
+    True. Returns the last report, then stops p. If raw_path is given, the raw output is also
+    appended there.
+    """
+    parser = ReportParser()
+    raw = open(raw_path, 'a') if raw_path else None
+    ret = dict()
+    done = False
+    for stdout_line in iter(p.stdout.readline, ""):
+        if raw is not None:
+            raw.write(stdout_line)
+        for r in parser.feed(stdout_line):
+            ret = r
+            if on_report is not None and on_report(r):
+                done = True
+                break
+            if report_time(r) >= runtime:
+                done = True
+                break
+        if done:
+            break
+    else:
+        for r in parser.flush():
+            ret = r
+            if on_report is not None:
+                on_report(r)
+    if raw is not None:
+        raw.close()
+    p.stdout.close()
+    stop_proc(p)
+    return ret
+
+def parse_reports(output:str):
+    """
+    Returns every report in a complete go-ycsb output string.
+    """
+    parser = ReportParser()
+    reports = []
+    for line in output.splitlines():
+        reports += parser.feed(line)
+    return reports + parser.flush()
+
+def parse_ycsb_output(output:str):
+    """
+    Returns the last report in output, of the form
+    { 'UPDATE': {'thruput': 1000, 'avg_latency': 12345, 'p99_latency': 29000, ...},...}
+    """
+    reports = parse_reports(output)
+    if len(reports) == 0:
+        return dict()
+    return reports[-1]
+
+def parse_ycsb_output_totalops(output:str):
+    """
+    Returns (time, total count over all operations) for the last go-ycsb report
+    in output, or (None, 0) if output has no summary lines.
+    """
+    r = parse_ycsb_output(output)
+    if len(r) == 0:
+        return (None, 0)
+    return (report_time(r), report_count(r))
+
+def goycsb_bench(threads:int, runtime:int, valuesize:int, readprop:float, updateprop:float, bench_cores:list[int],
+                 raw_path:str=None, series_path:str=None, steady=None, **kwargs):
+    """
+    Runs go-ycsb for runtime seconds (after warmup) and returns its last report,
+    of the form
+    { 'UPDATE': {'thruput': 1000, 'avg_latency': 12345, 'p99_latency': 29000, ...},...}
+    If steady (a SteadyState) is given, the run ends as soon as throughput has
+    converged, with runtime only as the cap, and thruput is over the steady
+    window. The raw output is only kept if raw_path is given, and every report
+    (not just the last) is saved as a Series if series_path is given. Extra
+    keyword arguments are passed to goycsb_args.
+    """
+    p = start_goycsb(bench_cores, threads, valuesize, readprop, updateprop, **kwargs)
+    if p is None:
+        return {}
+    series = Series() if series_path is not None else None
+    def on_report(r):
+        if series is not None:
+            series.add(r)
+        if steady is not None:
+            return steady.add(r)
+        return False
+    ret = read_reports(p, runtime, on_report, raw_path=raw_path)
+    if series is not None:
+        series.save(series_path)
+    if steady is not None:
+        return steady.result()
+    return ret
@@ -39,6 +39,7 @@ type worker struct {
 	threadID        int
 	targetOpsTickNs int64
 	opsDone         int64
+	intended        bool
 }
 
 func newWorker(p *properties.Properties, threadID int, threadCount int, workload ycsb.Workload, db ycsb.DB) *worker {
@@ -89,6 +90,7 @@ func newWorker(p *properties.Properties, threadID int, threadCount int, workload
 	if targetPerThreadPerms > 0 {
 		w.targetOpsPerMs = targetPerThreadPerms
 		w.targetOpsTickNs = int64(1000000.0 / w.targetOpsPerMs)
+		w.intended = p.GetBool(prop.MeasurementIntended, prop.MeasurementIntendedDefault)
 	}
 
 	return w
@@ -118,9 +120,18 @@ func (w *worker) run(ctx context.Context) {
 
 	startTime := time.Now()
 
+	var intended *intendedStart
+	if w.intended {
+		intended = new(intendedStart)
+		ctx = context.WithValue(ctx, intendedStartKey{}, intended)
+	}
+
 	allOpsDone := int64(0)
 	for w.opCount == 0 || w.opsDone < w.opCount {
 		var err error
+		if intended != nil {
+			intended.t = startTime.Add(time.Duration(allOpsDone * w.targetOpsTickNs))
+		}
 		opsCount := 1
 		if w.doTransactions {
 			if w.doBatch {
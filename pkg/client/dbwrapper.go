@@ -27,6 +27,30 @@ type DbWrapper struct {
 	DB ycsb.DB
 }
 
+type intendedStartKey struct{}
+
+// intendedStart holds the time a throttled worker's next operation was
+// scheduled to start, see prop.MeasurementIntended.
+type intendedStart struct {
+	t time.Time
+}
+
+// opStart returns the time to measure an operation's latency from: the
+// scheduled start if the worker set one, otherwise now. The scheduled start is
+// consumed, so a transaction that issues several DB calls only charges the
+// queueing delay to the first one.
+func opStart(ctx context.Context) time.Time {
+	now := time.Now()
+	if s, ok := ctx.Value(intendedStartKey{}).(*intendedStart); ok && !s.t.IsZero() {
+		t := s.t
+		s.t = time.Time{}
+		if t.Before(now) {
+			return t
+		}
+	}
+	return now
+}
+
 func measure(start time.Time, op string, err error) {
 	lan := time.Now().Sub(start)
 	if err != nil {
@@ -51,7 +75,7 @@ func (db DbWrapper) CleanupThread(ctx context.Context) {
 }
 
 func (db DbWrapper) Read(ctx context.Context, table string, key string, fields []string) (_ map[string][]byte, err error) {
-	start := time.Now()
+	start := opStart(ctx)
 	defer func() {
 		measure(start, "READ", err)
 	}()
@@ -62,7 +86,7 @@ func (db DbWrapper) Read(ctx context.Context, table string, key string, fields [
 func (db DbWrapper) BatchRead(ctx context.Context, table string, keys []string, fields []string) (_ []map[string][]byte, err error) {
 	batchDB, ok := db.DB.(ycsb.BatchDB)
 	if ok {
-		start := time.Now()
+		start := opStart(ctx)
 		defer func() {
 			measure(start, "BATCH_READ", err)
 		}()
@@ -78,7 +102,7 @@ func (db DbWrapper) BatchRead(ctx context.Context, table string, keys []string,
 }
 
 func (db DbWrapper) Scan(ctx context.Context, table string, startKey string, count int, fields []string) (_ []map[string][]byte, err error) {
-	start := time.Now()
+	start := opStart(ctx)
 	defer func() {
 		measure(start, "SCAN", err)
 	}()
@@ -87,7 +111,7 @@ func (db DbWrapper) Scan(ctx context.Context, table string, startKey string, cou
 }
 
 func (db DbWrapper) Update(ctx context.Context, table string, key string, values map[string][]byte) (err error) {
-	start := time.Now()
+	start := opStart(ctx)
 	defer func() {
 		measure(start, "UPDATE", err)
 	}()
@@ -98,7 +122,7 @@ func (db DbWrapper) Update(ctx context.Context, table string, key string, values
 func (db DbWrapper) BatchUpdate(ctx context.Context, table string, keys []string, values []map[string][]byte) (err error) {
 	batchDB, ok := db.DB.(ycsb.BatchDB)
 	if ok {
-		start := time.Now()
+		start := opStart(ctx)
 		defer func() {
 			measure(start, "BATCH_UPDATE", err)
 		}()
@@ -114,7 +138,7 @@ func (db DbWrapper) BatchUpdate(ctx context.Context, table string, keys []string
 }
 
 func (db DbWrapper) Insert(ctx context.Context, table string, key string, values map[string][]byte) (err error) {
-	start := time.Now()
+	start := opStart(ctx)
 	defer func() {
 		measure(start, "INSERT", err)
 	}()
@@ -125,7 +149,7 @@ func (db DbWrapper) Insert(ctx context.Context, table string, key string, values
 func (db DbWrapper) BatchInsert(ctx context.Context, table string, keys []string, values []map[string][]byte) (err error) {
 	batchDB, ok := db.DB.(ycsb.BatchDB)
 	if ok {
-		start := time.Now()
+		start := opStart(ctx)
 		defer func() {
 			measure(start, "BATCH_INSERT", err)
 		}()
@@ -141,7 +165,7 @@ func (db DbWrapper) BatchInsert(ctx context.Context, table string, keys []string
 }
 
 func (db DbWrapper) Delete(ctx context.Context, table string, key string) (err error) {
-	start := time.Now()
+	start := opStart(ctx)
 	defer func() {
 		measure(start, "DELETE", err)
 	}()
@@ -152,7 +176,7 @@ func (db DbWrapper) Delete(ctx context.Context, table string, key string) (err e
 func (db DbWrapper) BatchDelete(ctx context.Context, table string, keys []string) (err error) {
 	batchDB, ok := db.DB.(ycsb.BatchDB)
 	if ok {
-		start := time.Now()
+		start := opStart(ctx)
 		defer func() {
 			measure(start, "BATCH_DELETE", err)
 		}()
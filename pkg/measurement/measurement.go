@@ -89,10 +89,14 @@ func InitMeasure(p *properties.Properties) {
 		panic("unsupported measurement type: " + measurementType)
 	}
 	EnableWarmUp(p.GetInt64(prop.WarmUpTime, 0) > 0)
+	globalSampler = newSampler(p)
 }
 
 // Output prints the complete measurements.
 func Output() {
+	if globalSampler != nil {
+		globalSampler.stop()
+	}
 	globalMeasure.measurer.GenerateExtendedOutputs()
 	globalMeasure.output()
 }
@@ -118,6 +122,9 @@ func IsWarmUpFinished() bool {
 
 // Measure measures the operation.
 func Measure(op string, start time.Time, lan time.Duration) {
+	if globalSampler != nil {
+		globalSampler.measure(op, lan)
+	}
 	if IsWarmUpFinished() {
 		globalMeasure.measure(op, start, lan)
 	}
@@ -125,3 +132,6 @@ func Measure(op string, start time.Time, lan time.Duration) {
 
 var globalMeasure *measurement
 var warmUp int32 // use as bool, 1 means in warmup progress, 0 means warmup finished.
+
+// nil unless measurement.sample_interval is set
+var globalSampler *sampler
@@ -0,0 +1,188 @@
+// Copyright 2018 PingCAP, Inc.
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+package measurement
+
+import (
+	"bufio"
+	"encoding/binary"
+	"os"
+	"sync"
+	"time"
+
+	"github.com/magiconair/properties"
+	"github.com/pingcap/go-ycsb/pkg/prop"
+)
+
+// The sampler records, for every measurement.sample_interval ms, how many
+// operations of each type completed and their summed and maximum latency,
+// and appends that to measurement.sample_file as a binary stream, so that
+// intervals down to a few ms stay cheap to write and to parse. Unlike the
+// histograms, samples are taken during warm-up too.
+//
+// All integers are little-endian. The stream starts with the magic
+// "YCSBSMP1" and the interval in microseconds (uint32), followed by records
+// that each start with a one-byte tag:
+//
+//	'O' op definition: uint16 op id, uint16 name length, name
+//	'S' sample: int64 end of the interval (unix us), uint16 number of ops n,
+//	    then n times: uint16 op id, uint32 count, uint64 latency sum (us),
+//	    uint32 max latency (us)
+//
+// An op is defined before the first sample that lists it, and a sample only
+// lists ops that completed at least once in its interval. Every record is
+// flushed as it is written, so a killed process loses at most one interval.
+
+const sampleMagic = "YCSBSMP1"
+
+type opSample struct {
+	sync.Mutex
+	id    uint16
+	count uint32
+	sum   uint64
+	max   uint32
+}
+
+type sampler struct {
+	mu      sync.RWMutex
+	ops     map[string]*opSample
+	names   []string
+	byID    []*opSample
+	defined int
+
+	interval time.Duration
+	f        *os.File
+	w        *bufio.Writer
+	done     chan struct{}
+	stopped  chan struct{}
+}
+
+func newSampler(p *properties.Properties) *sampler {
+	ms := p.GetInt64(prop.MeasurementSampleInterval, prop.MeasurementSampleIntervalDefault)
+	if ms <= 0 {
+		return nil
+	}
+	outFile := p.GetString(prop.MeasurementSampleFile, "")
+	if outFile == "" {
+		panic(prop.MeasurementSampleInterval + " needs " + prop.MeasurementSampleFile)
+	}
+	f, err := os.Create(outFile)
+	if err != nil {
+		panic("failed to create sample file: " + err.Error())
+	}
+	s := &sampler{
+		ops:      make(map[string]*opSample),
+		interval: time.Duration(ms) * time.Millisecond,
+		f:        f,
+		w:        bufio.NewWriter(f),
+		done:     make(chan struct{}),
+		stopped:  make(chan struct{}),
+	}
+	s.w.WriteString(sampleMagic)
+	binary.Write(s.w, binary.LittleEndian, uint32(s.interval.Microseconds()))
+	s.w.Flush()
+	go s.run()
+	return s
+}
+
+func (s *sampler) op(name string) *opSample {
+	s.mu.RLock()
+	o, ok := s.ops[name]
+	s.mu.RUnlock()
+	if ok {
+		return o
+	}
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	if o, ok = s.ops[name]; ok {
+		return o
+	}
+	o = &opSample{id: uint16(len(s.byID))}
+	s.ops[name] = o
+	s.names = append(s.names, name)
+	s.byID = append(s.byID, o)
+	return o
+}
+
+func (s *sampler) measure(op string, lan time.Duration) {
+	us := lan.Microseconds()
+	o := s.op(op)
+	o.Lock()
+	o.count++
+	o.sum += uint64(us)
+	if uint32(us) > o.max {
+		o.max = uint32(us)
+	}
+	o.Unlock()
+}
+
+// write appends the definitions of new ops and the sample of the interval
+// ending at now.
+func (s *sampler) write(now time.Time) {
+	s.mu.RLock()
+	names := s.names
+	byID := s.byID
+	s.mu.RUnlock()
+
+	for ; s.defined < len(names); s.defined++ {
+		s.w.WriteByte('O')
+		binary.Write(s.w, binary.LittleEndian, uint16(s.defined))
+		binary.Write(s.w, binary.LittleEndian, uint16(len(names[s.defined])))
+		s.w.WriteString(names[s.defined])
+	}
+
+	type entry struct {
+		ID    uint16
+		Count uint32
+		Sum   uint64
+		Max   uint32
+	}
+	entries := make([]entry, 0, len(byID))
+	for _, o := range byID {
+		o.Lock()
+		if o.count > 0 {
+			entries = append(entries, entry{o.id, o.count, o.sum, o.max})
+		}
+		o.count, o.sum, o.max = 0, 0, 0
+		o.Unlock()
+	}
+	s.w.WriteByte('S')
+	binary.Write(s.w, binary.LittleEndian, now.UnixMicro())
+	binary.Write(s.w, binary.LittleEndian, uint16(len(entries)))
+	binary.Write(s.w, binary.LittleEndian, entries)
+	if err := s.w.Flush(); err != nil {
+		panic("failed to write samples: " + err.Error())
+	}
+}
+
+func (s *sampler) run() {
+	defer close(s.stopped)
+	t := time.NewTicker(s.interval)
+	defer t.Stop()
+	for {
+		select {
+		case now := <-t.C:
+			s.write(now)
+		case <-s.done:
+			s.write(time.Now())
+			s.f.Close()
+			return
+		}
+	}
+}
+
+// stop writes the last (partial) interval and closes the file.
+func (s *sampler) stop() {
+	close(s.done)
+	<-s.stopped
+}
@@ -95,6 +95,12 @@ const (
 
 	DebugPprof        = "debug.pprof"
 	DebugPprofDefault = ":6060"
+	// sampling of the mutex and block profiles served on DebugPprof, off by
+	// default (see runtime.SetMutexProfileFraction, runtime.SetBlockProfileRate)
+	DebugPprofMutexFraction        = "debug.pprof.mutex_fraction"
+	DebugPprofMutexFractionDefault = 0
+	DebugPprofBlockRate            = "debug.pprof.block_rate"
+	DebugPprofBlockRateDefault     = 0
 
 	Verbose         = "verbose"
 	VerboseDefault  = false
@@ -112,6 +118,17 @@ const (
 	MeasurementType          = "measurementtype"
 	MeasurementTypeDefault   = "histogram"
 	MeasurementRawOutputFile = "measurement.output_file"
+	// With a target rate, measure latency from when each operation was
+	// scheduled to start rather than when it actually started, so time spent
+	// queued behind slow operations counts (no coordinated omission).
+	MeasurementIntended        = "measurement.intended"
+	MeasurementIntendedDefault = false
+	// Every measurement.sample_interval ms, write the count and latency of
+	// each operation completed in that interval to measurement.sample_file
+	// (a binary stream, see measurement/sampler.go); 0 turns sampling off.
+	MeasurementSampleInterval        = "measurement.sample_interval"
+	MeasurementSampleIntervalDefault = 0
+	MeasurementSampleFile            = "measurement.sample_file"
 
 	Command = "command"
 
@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 from os import path
 import argparse
-import subprocess
-import re
 import json
-import os
-import resource
-import itertools
+
+import harness
+
+# e.g. 'avg', 'p99', 'p9999'
+latency_stats = [f[0][:-len('_latency')] for f in harness.fields.values() if f[0].endswith('_latency')]
 
 parser = argparse.ArgumentParser(
 description="Generate latency-throughput graphs"
@@ -23,6 +23,12 @@ parser.add_argument(
     required=True,
     default=None,
 )
+parser.add_argument(
+    "--latency",
+    help="latency statistic to plot against throughput",
+    choices=latency_stats,
+    default="avg",
+)
 
 global_args = parser.parse_args()
 
@@ -33,37 +39,37 @@ def read_lt_data(infilename):
             data.append(json.loads(line))
     return data
 
-def plot_lt(datas):
+def plot_lt(datas, stat='avg'):
     """
     Assumes data is in format
-    [ (kvname, numthreads, { 'OPERATION_TYPE': (throughput in ops/sec, latency in us), ... } ),  ... ]
+    [ {'service': kvname, 'num_threads': n, 'lts': { 'OPERATION_TYPE': {'thruput': ops/sec, 'avg_latency': us, 'p99_latency': us, ...}, ... } },  ... ]
+
+    Writes one line per data point with the total throughput followed by the
+    `stat` latency (in ms) of each operation, e.g. for stat='p99'
+    # thruput, READ p99 (ms), UPDATE p99 (ms)
     """
+    key = stat + '_latency'
     # marker = itertools.cycle(('+', '.', 'o', '*'))
     # fig = plt.figure()
     for data in datas:
-        # rxs = []
-        # rys = []
-
-        # wxs = []
-        # wys = []
-
+        ops = sorted(set([op for d in data for op in harness.report_ops(d['lts'])]))
         xys = []
 
         for d in data:
-            # TODO: look for updates and reads; if any other operation is found, report an error
-            x = 0.0
-            y = 0.0
-            for k, v in d['lts'].items():
-                if k == 'READ':
-                    x = x + v['thruput']
-                    y = y + v['avg_latency'] / 1000
-                if k == 'UPDATE':
-                    throw("unimpl")
-            xys.append((x,y))
+            if any([key not in d['lts'][op] for op in harness.report_ops(d['lts'])]):
+                print("[WARNING] {0} point with {1} threads has no {2} latency, skipping".format(d['service'], d['num_threads'], stat))
+                continue
+            x = harness.report_thruput(d['lts'])
+            ys = [d['lts'][op][key] / 1000 if op in d['lts'] else float('nan') for op in ops]
+            xys.append((x, ys))
 
-        with open(data[0]['service'] + '.dat', 'w') as f:
+        # open-loop sweeps (a rate limit per point) get their own file
+        mode = '_open' if data[0].get('ratelimit', -1) > 0 else ''
+        fname = data[0]['service'] + mode + ('' if stat == 'avg' else '_' + stat) + '.dat'
+        with open(fname, 'w') as f:
+            print('# thruput, ' + ', '.join(['{0} {1} (ms)'.format(op, stat) for op in ops]), file=f)
             for xy in xys:
-                print('{0}, {1}'.format(xy[0], xy[1]), file=f)
+                print(', '.join([str(xy[0])] + [str(y) for y in xy[1]]), file=f)
 
         # if wxs != []:
             # plt.plot(wxs, wys, marker = next(marker), label=data[0]['service'] + " puts")
@@ -81,7 +87,10 @@ def main():
     # redis_write_data = read_lt_data(path.join(global_args.outdir, 'rediskv_update_closed_lt.jsons'))
     memkv_data = read_lt_data(path.join(global_args.outdir, 'memkv_lt.jsons'))
     # datas += [redis_write_data, memkv_write_data]
-    plot_lt([memkv_data])
+    datas = [memkv_data]
+    if path.exists(path.join(global_args.outdir, 'memkv_open_lt.jsons')):
+        datas.append(read_lt_data(path.join(global_args.outdir, 'memkv_open_lt.jsons')))
+    plot_lt(datas, global_args.latency)
 
 if __name__=='__main__':
     main()
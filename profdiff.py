@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+from os import path
+import argparse
+import json
+import re
+
+from harness import profdiff
+
+parser = argparse.ArgumentParser(
+description="Rank the functions whose per-op cost grows with server cores, from profiled points (profiles.py, or specs with a profile)"
+)
+parser.add_argument(
+    "--outdir",
+    help="directory with the profiled points and their profiles",
+    required=True,
+    default=None,
+)
+parser.add_argument(
+    "--files",
+    help="JSONL files of profiled points in outdir",
+    nargs="+",
+    default=['profiles.jsons', 'memkv_profiled.jsons'],
+)
+parser.add_argument(
+    "--configs",
+    help="configs to compare, in this order (default: every profiled config, by server cores)",
+    nargs="+",
+    default=None,
+)
+parser.add_argument(
+    "--kinds",
+    help="profiles to compare, as <target>.<kind>, e.g. server.oncpu (default: every one the points have in common)",
+    nargs="+",
+    default=None,
+)
+parser.add_argument(
+    "--top",
+    help="entries to print per table",
+    type=int,
+    default=15,
+)
+parser.add_argument(
+    "--min-share",
+    help="leave out entries below this share of a point's total at every point",
+    type=float,
+    default=0.005,
+)
+global_args = parser.parse_args()
+
+def read_jsons(infilename):
+    if not path.exists(infilename):
+        return []
+    with open(infilename, 'r') as f:
+        return [json.loads(line) for line in f if line.strip() != '']
+
+def server_cores(p:dict):
+    """
+    Number of server cores of a profiled point: as profiled, or from a config
+    name like 2s4c.
+    """
+    n = (p['profile'].get('cores') or {}).get('server')
+    if n is not None:
+        return n
+    m = re.fullmatch(r'(\d+)s(\d+)c', p['config'].partition('@')[0])
+    if m:
+        return int(m.group(1)) * int(m.group(2))
+    m = re.fullmatch(r'prof(\d+)c', p['config'])
+    return int(m.group(1)) if m else None
+
+def profiled_points():
+    """
+    The last profiled point of every config, in the order to compare them.
+    """
+    byconfig = dict()
+    for f in global_args.files:
+        for p in read_jsons(path.join(global_args.outdir, f)):
+            if p.get('profile') is not None and 'config' in p:
+                byconfig[p['config']] = p
+    if global_args.configs is not None:
+        missing = [c for c in global_args.configs if c not in byconfig]
+        if len(missing) > 0:
+            raise SystemExit("no profiled point of {0} in {1}".format(", ".join(missing), ", ".join(global_args.files)))
+        return [byconfig[c] for c in global_args.configs]
+    return sorted(byconfig.values(), key=lambda p: (server_cores(p) is None, server_cores(p) or 0, p['config']))
+
+def fmt(v):
+    return "-" if v is None else "{0:.3g}".format(v)
+
+def print_table(title:str, rows:list[dict], configs:list[str]):
+    print("  {0} (us/op)".format(title))
+    print("    {0:<60} {1}  {2:>8} {3:>8}  {4}".format("", " ".join(["{0:>10}".format(c) for c in configs]), "delta", "growth", "category"))
+    for r in rows[:global_args.top]:
+        name = r['name'] if len(r['name']) <= 60 else '...' + r['name'][-57:]
+        print("    {0:<60} {1}  {2:>+8.3g} {3:>8}  {4}".format(name, " ".join(["{0:>10}".format(fmt(c)) for c in r['costs']]),
+                                                               r['delta'], fmt(r['growth']) + ('x' if r['growth'] else ''),
+                                                               r.get('category', '')))
+
+def compare(points:list[dict], kind:str):
+    costs = [profdiff.load_costs(p, kind, global_args.outdir) for p in points]
+    have = [(p, c) for p, c in zip(points, costs) if c is not None]
+    if len(have) < 2:
+        print("[WARNING] {0}: fewer than two points have a usable profile".format(kind))
+        return None
+    ps = [p for p, _ in have]
+    cs = [c for _, c in have]
+    configs = [p['config'] for p in ps]
+    ns = [server_cores(p) or i + 1 for i, p in enumerate(ps)]
+    print("== {0}: {1}".format(kind, " -> ".join(["{0} ({1} cores, {2:.3g} us/op)".format(c, n, x['total'])
+                                                  for c, n, x in zip(configs, ns, cs)])))
+    cats = profdiff.rank(cs, ns, 'categories', 0)
+    funcs = profdiff.rank(cs, ns, 'functions', global_args.min_share)
+    sites = profdiff.rank(cs, ns, 'sites', global_args.min_share)
+    print_table("by category", cats, configs)
+    print_table("by function", funcs, configs)
+    print_table("by call site", sites, configs)
+    return {'kind': kind, 'configs': configs, 'cores': ns, 'total': [c['total'] for c in cs],
+            'categories': cats, 'functions': funcs, 'sites': sites}
+
+def main():
+    points = profiled_points()
+    if len(points) < 2:
+        raise SystemExit("need at least two profiled configs to compare, found {0}".format(len(points)))
+    kinds = global_args.kinds
+    if kinds is None:
+        common = set.intersection(*[set(p['profile']['files']) for p in points])
+        kinds = sorted([k for k in common if not k.endswith('.raw')])
+    out = [r for r in [compare(points, k) for k in kinds] if r is not None]
+    with open(path.join(global_args.outdir, 'profile_scaling.json'), 'w') as outfile:
+        json.dump(out, outfile, indent=1)
+
+if __name__=='__main__':
+    main()
@@ -1,219 +1,85 @@
 #!/usr/bin/env python3
-from os import path
 import argparse
-import subprocess
-import re
-import json
-import os
-import resource
-import itertools
 import time
-import atexit
-import signal
 
-import peak_config
+import harness
+from harness import start_memkv_multiserver, cleanup_procs, stop_proc
 
 parser = argparse.ArgumentParser(
-description="Find peak throughput of KV service for a varying number of shard servers"
+description="Profile the KV service and go-ycsb with 1 and with 10 server cores, and diff the two"
 )
+harness.add_common_args(parser)
 parser.add_argument(
-    "-n",
-    "--dry-run",
-    help="print commands without running them",
-    action="store_true",
+    "--backend",
+    help="on-/off-CPU profiler: perf (works anywhere perf does) or bcc's profile/offcputime",
+    choices=harness.profile.backends,
+    default="perf",
 )
 parser.add_argument(
-    "-v",
-    "--verbose",
-    help="print commands in addition to running them",
-    action="store_true",
+    "--kinds",
+    help="profiles to take",
+    nargs="+",
+    choices=harness.profile.kinds,
+    default=harness.profile.kinds,
 )
 parser.add_argument(
-    "--outdir",
-    help="output directory for benchmark results",
-    required=True,
-    default=None,
-)
-parser.add_argument(
-    "-e",
-    "--errors",
-    help="print stderr from commands being run",
-    action="store_true",
+    "--duration",
+    help="seconds to profile each config for",
+    type=int,
+    default=60,
 )
 global_args = parser.parse_args()
-gokvdir = ''
-goycsbdir = ''
-
-procs = []
-
-def run_command(args, cwd=None, stdout=None):
-    if global_args.dry_run or global_args.verbose:
-        print("[RUNNING] " + " ".join(args))
-    if not global_args.dry_run:
-        return subprocess.run(args, capture_output=True, text=True, cwd=cwd)
-
-def start_command(args, cwd=None):
-    if global_args.dry_run or global_args.verbose:
-        print("[STARTING] " + " ".join(args))
-    if not global_args.dry_run:
-        e = subprocess.PIPE
-        if global_args.errors:
-            e = None
-        p = subprocess.Popen(args, text=True, stdout=subprocess.PIPE, stderr=e, cwd=cwd, preexec_fn=os.setsid)
-        global procs
-        procs.append(p)
-        return p
-
-def cleanup_procs():
-    global procs
-    for p in procs:
-        try:
-            os.killpg(os.getpgid(p.pid), signal.SIGKILL)
-        except Exception:
-            continue
-    procs = []
-
-def many_cores(args, c):
-    return ["numactl", "-C", c] + args
-
-def one_core(args, c):
-    return ["numactl", "-C", str(c)] + args
-
-# Starts server on port 12345
-def start_memkv_multiserver(config:list[list[int]]):
-    """
-    Given a list of lists of cores for each shard server, this brings up the kv
-    system
-    """
-    start_command(["go", "run",
-                   "./cmd/memkvcoord", "-init",
-                   "127.0.0.1:12300", "-port", "12200"], cwd=gokvdir)
-
-    run_command(["go", "build", "./cmd/memkvshard"], cwd=gokvdir)
 
-    for i, corelist in enumerate(config):
-        start_shard_multicore(12300 + i, corelist, i == 0)
-        if i > 0:
-            time.sleep(1.0)
-            run_command(["go", "run", "./cmd/memkvctl", "-coord", "127.0.0.1:12200", "add", "127.0.0.1:" + str(12300 + i)], cwd=gokvdir)
-    print("[INFO] Started kv service with {0} server(s)".format(len(config)))
+clnt_cores = list(range(40, 80))
+pprof_addr = '127.0.0.1:6060'
 
-def start_shard_multicore(port:int, corelist:list[int], init:bool):
-    c = ",".join([str(j) for j in corelist])
-    if init:
-        start_command(many_cores(["./memkvshard", "-init", "-port", str(port)], c), cwd=gokvdir)
-    else:
-        start_command(many_cores(["./memkvshard", "-port", str(port)], c), cwd=gokvdir)
-    print("[INFO] Started a shard server with {0} cores on port {1}".format(len(corelist), port))
-
-def parse_ycsb_output(output):
-    # look for 'Run finished, takes...', then parse the lines for each of the operations
-    # output = output[re.search("Run finished, takes .*\n", output).end():] # strip off beginning of output
-
-    # NOTE: sample output from go-ycsb:
-    # UPDATE - Takes(s): 12.6, Count: 999999, OPS: 79654.6, Avg(us): 12434, Min(us): 28, Max(us): 54145, 99th(us): 29000, 99.9th(us): 41000, 99.99th(us): 49000
-    patrn = '(?P<opname>.*) - Takes\(s\): (?P<time>.*), Count: (?P<count>.*), OPS: (?P<ops>.*), Avg\(us\): (?P<avg_latency>.*), Min\(us\):.*\n' # Min(us): 28, Max(us): 54145, 99th(us): 29000, 99.9th(us): 41000, 99.99th(us): 49000'
-    ms = re.finditer(patrn, output, flags=re.MULTILINE)
-    a = dict()
-    for m in ms:
-        a[m.group('opname').strip()] = {'thruput': float(m.group('ops')), 'avg_latency': float(m.group('avg_latency')), 'raw': output}
-    return a
-
-def profile_goycsb_bench(prof_name:str, threads:int, runtime:int, valuesize:int, readprop:float, updateprop:float, bench_cores:list[int], srvcore:int):
+def profile_goycsb_bench(prof_name:str, threads:int, runtime:int, valuesize:int, readprop:float, updateprop:float, bench_cores:list[int], srvcores:list[int]):
     """
-    Returns a dictionary of the form
-    { 'UPDATE': {'thruput': 1000, 'avg_latency': 12345', 'raw': 'blah'},...}
+    Runs go-ycsb against the cluster and profiles the servers on srvcores and
+    go-ycsb while it is under load. Returns the point's record, with its
+    profiles under 'profile'.
     """
-
-    warmup_time = 10
-    c = ",".join([str(j) for j in bench_cores])
-    p = start_command(many_cores(['go', 'run',
-                                  path.join(goycsbdir, './cmd/go-ycsb'),
-                                  'run', 'memkv',
-                                  '-P', path.join('../gokv/bench/memkv_workload'),
-                                  '--threads', str(threads),
-                                  '--target', '-1',
-                                  '--interval', '1',
-                                  '-p', 'operationcount=' + str(2**32 - 1),
-                                  '-p', 'fieldlength=' + str(valuesize),
-                                  '-p', 'requestdistribution=uniform',
-                                  '-p', 'readproportion=' + str(readprop),
-                                  '-p', 'updateproportion=' + str(updateprop),
-                                  '-p', 'memkv.coord=127.0.0.1:12200',
-                                  '-p', 'warmup=' + str(warmup_time), # TODO: increase warmup
-                                  ], c), cwd=goycsbdir)
-    if p is None:
-        return ''
-
-    time.sleep(warmup_time + 3)
-    # c = ",".join([str(j) for j in srvcores])
-    c = str(srvcore)
-    profp = run_command(["sudo", "/usr/share/bcc/tools/profile", "-F", "99", "-C", c, "-df", "--stack-storage-size", "32768", str(runtime)])
-    with open(path.join(global_args.outdir, prof_name), 'w') as outfile:
-        print(profp.stderr)
-        outfile.write(profp.stdout)
-
-    p.stdout.close()
-    p.terminate()
-
-    c = str(srvcore)
-    profp = run_command(["sudo", "/usr/share/bcc/tools/offcputime", "-p", "", "-df", "--stack-storage-size", "32768", str(runtime)])
-    with open(path.join(global_args.outdir, prof_name), 'w') as outfile:
-        print(profp.stderr)
-        outfile.write(profp.stdout)
+    spec = {'kinds': global_args.kinds, 'backend': global_args.backend, 'duration': global_args.duration}
+    prof = harness.Profiler(spec, prof_name, {'server': {'cpus': list(srvcores), 'pprof': []},
+                                              'client': {'cpus': list(bench_cores), 'pprof': [pprof_addr]}})
+    return harness.bench_point('memkv', threads, 'profiles.jsons', runtime, valuesize, readprop, updateprop,
+                               bench_cores, extra={'config': prof_name}, server_cores=list(srvcores),
+                               profiler=prof, warmup=10, props={'memkv.coord': harness.coord_addr()})
 
 def forever_goycsb_bench(prof_name:str, threads:int, runtime:int, valuesize:int, readprop:float, updateprop:float, bench_cores:list[int]):
     """
-    Returns a dictionary of the form
-    { 'UPDATE': {'thruput': 1000, 'avg_latency': 12345', 'raw': 'blah'},...}
+    Keeps go-ycsb running against the cluster, e.g. for profiling by hand.
     """
 
     warmup_time = 10
-    c = ",".join([str(j) for j in bench_cores])
-    p = start_command(many_cores(['go', 'run',
-                                  path.join(goycsbdir, './cmd/go-ycsb'),
-                                  'run', 'memkv',
-                                  '-P', path.join('../gokv/bench/memkv_workload'),
-                                  '--threads', str(threads),
-                                  '--target', '-1',
-                                  '--interval', '1',
-                                  '-p', 'operationcount=' + str(2**32 - 1),
-                                  '-p', 'fieldlength=' + str(valuesize),
-                                  '-p', 'requestdistribution=uniform',
-                                  '-p', 'readproportion=' + str(readprop),
-                                  '-p', 'updateproportion=' + str(updateprop),
-                                  '-p', 'memkv.coord=127.0.0.1:12200',
-                                  '-p', 'warmup=' + str(warmup_time), # TODO: increase warmup
-                                  ], c), cwd=goycsbdir)
+    p = harness.start_goycsb(bench_cores, threads, valuesize, readprop, updateprop,
+                             warmup=warmup_time, props={'memkv.coord': harness.coord_addr()})
     if p is None:
         return ''
 
     time.sleep(1000000)
     p.stdout.close()
-    p.terminate()
+    stop_proc(p)
 
 def main():
-    atexit.register(cleanup_procs)
-    global gokvdir
-    global goycsbdir
-    goycsbdir = os.path.dirname(os.path.abspath(__file__))
-    gokvdir = os.path.join(os.path.dirname(goycsbdir), "gokv")
-    os.makedirs(global_args.outdir, exist_ok=True)
-    resource.setrlimit(resource.RLIMIT_NOFILE, (100000, 100000))
+    harness.init(global_args)
+    harness.prebuild()
 
     # Profile for 1 core
-    srvcore = range(1)
-    start_memkv_multiserver([srvcore])
-    time.sleep(1.0)
-    profile_goycsb_bench("prof1c.prof", 200, 60, 128, 0.95, 0.05, range(40,80), srvcore[0])
+    srvcores = range(1)
+    start_memkv_multiserver([srvcores])
+    p1 = profile_goycsb_bench("prof1c", 200, 60, 128, 0.95, 0.05, clnt_cores, srvcores)
     cleanup_procs()
 
     # Profile for 10 cores
-    srvcore = range(10)
-    start_memkv_multiserver([srvcore])
-    time.sleep(1.0)
-    profile_goycsb_bench("prof10c.prof", 2000, 60, 128, 0.95, 0.05, range(40,80), srvcore[0])
+    srvcores = range(10)
+    start_memkv_multiserver([srvcores])
+    p10 = profile_goycsb_bench("prof10c", 2000, 60, 128, 0.95, 0.05, clnt_cores, srvcores)
     cleanup_procs()
 
+    if p1.get('profile') is not None and p10.get('profile') is not None:
+        diffs = harness.diff_profiles(p1['profile'], p10['profile'], 'prof1c-vs-prof10c')
+        print("[INFO] Wrote {0} diff(s) of prof1c and prof10c; profdiff.py ranks what grew per op".format(len(diffs)))
+
 if __name__=='__main__':
     main()
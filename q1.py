@@ -1,61 +1,20 @@
 #!/usr/bin/env python3
-from os import path
 import argparse
-import subprocess
 import re
-import json
-import os
-import resource
-import itertools
-import time
-import atexit
+
+import harness
+from harness import start_command, binary, wait_ready, gokvdir, goycsbdir
 
 parser = argparse.ArgumentParser(
 description="(Why) is go-ycsb faster than the custom client program for rpcscale?"
 )
-parser.add_argument(
-    "-n",
-    "--dry-run",
-    help="print commands without running them",
-    action="store_true",
-)
-parser.add_argument(
-    "-v",
-    "--verbose",
-    help="print commands in addition to running them",
-    action="store_true",
-)
+harness.add_common_args(parser, outdir=False)
 global_args = parser.parse_args()
-gokvdir = ''
-goycsbdir = ''
-
-procs = []
-
-def run_command(args):
-    if global_args.dry_run or global_args.verbose:
-        print("[RUNNING] " + " ".join(args))
-    if not global_args.dry_run:
-        return subprocess.run(args, capture_output=True, text=True)
-
-def start_command(args, cwd=None):
-    if global_args.dry_run or global_args.verbose:
-        print("[STARTING] " + " ".join(args))
-    if not global_args.dry_run:
-        p = subprocess.Popen(args, text=True, stdout=subprocess.PIPE, cwd=cwd)
-        global procs
-        procs.append(p)
-        return p
-
-def cleanup_procs():
-    for p in procs:
-        p.kill()
 
 def start_memkv():
-    coord = start_command(["go", "run",
-                           "cmd/memkvcoord", "-init",
+    coord = start_command([binary("memkvcoord"), "-init",
                            "127.0.0.1:12300", "-port", "12200"])
-    shard = start_command(["go", "run",
-                           "github.com/mit-pdos/gokv/cmd/memkvshard", "-init",
+    shard = start_command([binary("memkvshard"), "-init",
                            "-port", "12300"])
 
 def one_core(args):
@@ -63,10 +22,11 @@ def one_core(args):
 
 # Starts server on port 12345
 def start_rpcscale():
-    coord = start_command(["go", "run",
-                           "./cmd/memkvcoord", "-init",
+    coord = start_command([binary("memkvcoord"), "-init",
                            "127.0.0.1:12345", "-port", "12200"], cwd=gokvdir)
-    rpcscale = start_command(one_core(["go", "run", "./cmd/rpcscale", "-port", "12345"]), cwd=gokvdir)
+    rpcscale = start_command(one_core([binary("rpcscale"), "-port", "12345"]), cwd=gokvdir)
+    wait_ready("127.0.0.1", 12345, rpcscale)
+    wait_ready("127.0.0.1", 12200, coord)
     print("[INFO] Started rpcscale (and coord) server")
 
 def custom_rpcscale():
@@ -84,7 +44,7 @@ def custom_rpcscale():
             print('\r' + str(int(ops/seconds)), end='', flush=True)
 
 def goycsb_rpcscale():
-    p = start_command(["go", "run", "./cmd/go-ycsb",
+    p = start_command([binary("go-ycsb"),
                        "run", "memkv", "-P", "../gokv/bench/memkv_workload",
                        "--threads", "64", "--target", "-1",
                        "--interval","1", "-p", "operationcount=4294967295", "-p",
@@ -94,21 +54,15 @@ def goycsb_rpcscale():
 
     print("Throughput of goycsb rpcscale benchmark")
     for stdout_line in iter(p.stdout.readline, ""):
-        patrn = "OPS: (?P<ops>.*), Avg"
-        r = re.compile(patrn)
-        m = r.search(stdout_line)
+        m = harness.parse_summary_line(stdout_line)
         if m:
-            print('\r' + m.group('ops'), end='', flush=True)
+            print('\r' + str(m[1]['thruput']), end='', flush=True)
 
 def main():
-    atexit.register(cleanup_procs)
-    global gokvdir
-    global goycsbdir
-    goycsbdir = os.path.dirname(os.path.abspath(__file__))
-    gokvdir = os.path.join(os.path.dirname(goycsbdir), "gokv")
+    harness.init(global_args)
+    harness.prebuild(['go-ycsb', 'memkvcoord', 'rpcscale'])
 
     start_rpcscale()
-    time.sleep(0.5)
     goycsb_rpcscale()
     custom_rpcscale()
 
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import argparse
+
+import harness
+
+parser = argparse.ArgumentParser(
+description="Run the experiments described by one or more experiment specs (see experiments/)"
+)
+harness.add_common_args(parser)
+parser.add_argument(
+    "specs",
+    help="experiment spec files",
+    nargs="+",
+)
+parser.add_argument(
+    "--clients",
+    help="number of go-ycsb processes to split the client cores and threads over (overrides the specs)",
+    type=int,
+    default=None,
+)
+parser.add_argument(
+    "--numa",
+    help="keep each go-ycsb process on the cores of a single NUMA node (overrides the specs)",
+    action="store_true",
+    default=None,
+)
+parser.add_argument(
+    "--only",
+    help="only run the configs with these names",
+    nargs="+",
+    default=None,
+)
+parser.add_argument(
+    "--placement",
+    help="how to pick allocated server cores: packed with SMT siblings, packed one per physical core, or spread over NUMA nodes (overrides the specs)",
+    choices=["compact", "physical", "spread"],
+    default=None,
+)
+parser.add_argument(
+    "--membind",
+    help="bind each process's memory to the NUMA nodes of its cores (overrides the specs)",
+    action="store_true",
+    default=None,
+)
+parser.add_argument(
+    "--profile",
+    help="profile the result point of every peak/fixed experiment with this backend (overrides the specs' profile backend)",
+    choices=["perf", "bcc"],
+    default=None,
+)
+parser.add_argument(
+    "--counters",
+    help="record hardware counters per op (cycles, instructions, LLC misses, context switches) of the server and client cores with perf stat",
+    action="store_true",
+    default=None,
+)
+parser.add_argument(
+    "--steady-tol",
+    help="end each run once the 95%% confidence interval of its throughput is within this fraction of the mean (overrides the specs' search.steady_tol)",
+    type=float,
+    default=None,
+)
+parser.add_argument(
+    "-j",
+    "--jobs",
+    help="run up to this many experiments with disjoint cores side by side",
+    type=int,
+    default=1,
+)
+parser.add_argument(
+    "--check",
+    help="how many experiments of each side-by-side wave to measure again alone, to check for interference",
+    choices=["one", "all", "none"],
+    default="one",
+)
+global_args = parser.parse_args()
+
+def main():
+    harness.init(global_args)
+    harness.prebuild()
+    harness.run_specs(global_args.specs, global_args.clients, global_args.numa, global_args.only,
+                      global_args.jobs, global_args.check, global_args.placement, global_args.membind,
+                      global_args.profile, global_args.counters, global_args.steady_tol)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+from os import path
+import argparse
+import json
+import re
+
+import harness
+from harness import usl
+
+parser = argparse.ArgumentParser(
+description="Fit the Universal Scalability Law to peak throughput results from peaks.py"
+)
+parser.add_argument(
+    "--outdir",
+    help="directory with memkv_peaks.jsons and memkv_peak_raw.jsons",
+    required=True,
+    default=None,
+)
+parser.add_argument(
+    "--spec",
+    help="experiment spec the peaks were measured with, for the shard/core layout of each config",
+    default=path.join(path.dirname(path.abspath(__file__)), 'experiments', 'peaks.json'),
+)
+parser.add_argument(
+    "--threshold",
+    help="flag measurements that are off from the fit to the other points by more than this fraction",
+    type=float,
+    default=0.1,
+)
+parser.add_argument(
+    "--amdahl",
+    help="fit Amdahl's law (no coherency term) instead of the USL",
+    action="store_true",
+)
+global_args = parser.parse_args()
+
+topologies = harness.load_spec(global_args.spec) if path.exists(global_args.spec) else []
+
+def read_jsons(infilename):
+    if not path.exists(infilename):
+        return []
+    with open(infilename, 'r') as f:
+        return [json.loads(line) for line in f if line.strip() != '']
+
+def layout(name:str):
+    """
+    Returns (number of shards, cores per shard) for a configuration name
+    (ignoring an emulated network's RTT, as in 2s4c@0.5ms).
+    """
+    name = name.partition('@')[0]
+    for exp in topologies:
+        if exp['topology'] is not None and exp['topology']['name'] == name:
+            return len(exp['topology']['srvs']), harness.spec.ncores(exp['topology']['srvs'][0])
+    m = re.fullmatch(r'(\d+)s(\d+)c', name)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    return None
+
+def groups(peaks):
+    """
+    Splits the per-configuration peaks into scaling series: one per shard count
+    (varying cores per shard) and one per cores-per-shard (varying shards),
+    separately for every emulated RTT. Returns {series name: [(N, thruput, config name), ...]}.
+    """
+    gs = dict()
+    for p in peaks:
+        l = layout(p['name'])
+        if l is None:
+            continue
+        shards, cores = l
+        rtt = p['name'].partition('@')[2]
+        at = ' @ ' + rtt if rtt != '' else ''
+        gs.setdefault('{0} shard(s), N = cores/shard{1}'.format(shards, at), []).append((cores, p['thruput'], p['name']))
+        gs.setdefault('{0} core(s)/shard, N = shards{1}'.format(cores, at), []).append((shards, p['thruput'], p['name']))
+    # a series needs at least three distinct N to say anything
+    return {k: sorted(v) for k, v in gs.items() if len(set([n for n, _, _ in v])) >= 3}
+
+def fit_series(name, pts):
+    ns = [n for n, _, _ in pts]
+    xs = [x for _, x, _ in pts]
+    m = usl.fit(ns, xs, global_args.amdahl)
+    errs = usl.loo_errors(ns, xs, global_args.amdahl)
+    print("== {0}: lam={1:.0f} sigma={2:.4f} kappa={3:.6f} peak at N={4:.1f}".format(name, m.lam, m.sigma, m.kappa, m.peak()))
+    flagged = []
+    for (n, x, cname), e in zip(pts, errs):
+        flag = e is not None and abs(e) > global_args.threshold
+        if flag:
+            flagged.append(cname)
+        print("  {0:>6} N={1:<3} measured {2:>10.0f} fit {3:>10.0f} loo-error {4}{5}".format(
+            cname, n, x, m.predict(n), "{0:+.1%}".format(e) if e is not None else "-", "  <-- deviates" if flag else ""))
+
+    # untested N up to twice the largest measured, most uncertain first
+    preds = []
+    for n in range(1, 2 * max(ns) + 1):
+        if n in ns:
+            continue
+        pred, lo, hi = usl.predict_range(ns, xs, n, global_args.amdahl)
+        preds.append({'n': n, 'thruput': pred, 'low': lo, 'high': hi})
+    for p in sorted(preds, key=lambda p: (p['high'] - p['low']) / p['thruput'], reverse=True)[:5]:
+        print("  predicted N={0:<3} {1:>10.0f} (range {2:.0f}..{3:.0f})".format(p['n'], p['thruput'], p['low'], p['high']))
+    return {'series': name, 'fit': m.to_dict(), 'points': [{'config': c, 'n': n, 'thruput': x, 'loo_error': e} for (n, x, c), e in zip(pts, errs)],
+            'deviating': flagged, 'predictions': preds}
+
+def fit_client_scaling(raw):
+    """
+    Fits throughput against client threads within each configuration, from the
+    individual points of the peak searches.
+    """
+    byconfig = dict()
+    for p in raw:
+        if 'config' not in p or len(p['lts']) == 0:
+            continue
+        x = harness.point_thruput(p)[0]
+        byconfig.setdefault(p['config'], dict()).setdefault(p['num_threads'], []).append(x)
+    fits = []
+    for cname, bythreads in byconfig.items():
+        if len(bythreads) < 3:
+            continue
+        ns = sorted(bythreads)
+        xs = [sum(bythreads[n]) / len(bythreads[n]) for n in ns]
+        m = usl.fit(ns, xs, global_args.amdahl)
+        print("== {0} client threads: sigma={1:.4f} kappa={2:.6f} peak at {3:.0f} threads".format(cname, m.sigma, m.kappa, m.peak()))
+        fits.append({'config': cname, 'fit': m.to_dict()})
+    return fits
+
+def main():
+    peaks = read_jsons(path.join(global_args.outdir, 'memkv_peaks.jsons'))
+    raw = read_jsons(path.join(global_args.outdir, 'memkv_peak_raw.jsons'))
+
+    out = {'server_scaling': [fit_series(name, pts) for name, pts in groups(peaks).items()],
+           'client_scaling': fit_client_scaling(raw)}
+    with open(path.join(global_args.outdir, 'usl_fits.json'), 'w') as outfile:
+        json.dump(out, outfile, indent=1)
+
+if __name__=='__main__':
+    main()
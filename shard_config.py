@@ -1,6 +0,0 @@
-#!/usr/bin/env python
-
-# Template: {name:'1s3c', clnts:[], srvs: []}
-
-# ben;
-config = {'clntthreads': 500, 'clntcores': range(40,80)}
@@ -0,0 +1,59 @@
+import pytest
+
+from harness import alloc
+from harness.alloc import Allocator, AllocError
+
+@pytest.fixture
+def ht_host(monkeypatch):
+    """
+    8 cpus on 2 nodes, where cpu c + 4 is the SMT sibling of cpu c (0-3),
+    and cpus 0, 1 (and 4, 5) are on node 0.
+    """
+    monkeypatch.setattr(alloc, 'cpu_siblings', lambda c: [c % 4, c % 4 + 4])
+    monkeypatch.setattr(alloc, 'physical_core', lambda c: c % 4)
+    monkeypatch.setattr(alloc, 'cpu_node', lambda c: (c % 4) // 2)
+    return Allocator(cpus=list(range(8)))
+
+def test_literal_sets_reserve_siblings(ht_host):
+    assert ht_host.claim([0]) == [0]
+    assert ht_host.taken == {0, 4}
+    # 4 is 0's sibling
+    with pytest.raises(AllocError, match=r"cpus \[4\] are SMT siblings of cpus \[0\]"):
+        ht_host.claim([4, 5])
+    assert ht_host.claim([1]) == [1]
+    with pytest.raises(AllocError, match=r"cpus \[1\] are already in use"):
+        ht_host.claim([1, 2])
+
+def test_picked_cpus_reserve_siblings(ht_host):
+    got = ht_host.cpus_for(2)
+    assert got == [0, 1]
+    assert ht_host.taken == {0, 1, 4, 5}
+    with pytest.raises(AllocError):
+        ht_host.claim([4])
+    ht_host.release(got)
+    assert ht_host.taken == set()
+
+def test_picks_from_one_node(ht_host):
+    ht_host.claim([0])
+    # node 0 has one whole core left, node 1 has two
+    assert ht_host.cpus_for(2) == [2, 3]
+    assert ht_host.cpus_for(1, node=0) == [1]
+    with pytest.raises(AllocError):
+        ht_host.cpus_for(1)
+
+def test_siblings_and_nodes(ht_host):
+    assert ht_host.cpus_for(2, siblings=True) == [0, 4]
+    assert ht_host.cpus_for(1, node=1) == [2]
+    assert ht_host.cpus_for(2, spread=True) == [1, 3]
+    with pytest.raises(AllocError):
+        ht_host.cpus_for(1)
+
+def test_smt_uses_every_thread(monkeypatch):
+    monkeypatch.setattr(alloc, 'cpu_siblings', lambda c: [c % 4, c % 4 + 4])
+    monkeypatch.setattr(alloc, 'physical_core', lambda c: c % 4)
+    monkeypatch.setattr(alloc, 'cpu_node', lambda c: 0)
+    a = Allocator(cpus=list(range(8)), smt=True)
+    assert a.claim([0]) == [0]
+    assert a.claim([4]) == [4]
+    # siblings next to each other
+    assert a.cpus_for(6) == [1, 5, 2, 6, 3, 7]
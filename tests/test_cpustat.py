@@ -0,0 +1,25 @@
+from harness.cpustat import util_summary, saturation, is_saturated
+
+def test_util_summary():
+    s = util_summary({1: 0.5, 0: 0.25})
+    assert s['mean'] == 0.375 and s['max'] == 0.5
+    assert list(s['per_core']) == ['0', '1']
+    assert util_summary({}) is None
+
+def test_mean_saturation():
+    assert saturation(util_summary({0: 0.95, 1: 0.92})) == "mean utilization 0.94"
+    assert is_saturated(util_summary({0: 0.95, 1: 0.92}))
+    assert not is_saturated(util_summary({0: 0.5, 1: 0.5}))
+    assert not is_saturated(None)
+
+def test_one_process_saturated():
+    util = {c: (0.95 if c < 44 else 0.1) for c in range(40, 80)}
+    procs = [list(range(40, 44)), list(range(44, 80))]
+    assert saturation(util_summary(util), procs) == "process 0 at 0.95 on cpus 40-43"
+    assert saturation(util_summary(util)) is None
+
+def test_one_busy_core_is_not_saturation():
+    util = {c: 0.1 for c in range(40, 80)}
+    util[41] = 0.99
+    assert saturation(util_summary(util)) is None
+    assert saturation(util_summary(util), [list(range(40, 60)), list(range(60, 80))]) is None
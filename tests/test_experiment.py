@@ -0,0 +1,68 @@
+from os import path
+import glob
+
+import pytest
+
+from harness import alloc
+from harness.alloc import Allocator, AllocError
+from harness.experiment import allocate, next_wave, release
+from harness.spec import load_spec
+
+specdir = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'experiments')
+
+@pytest.fixture
+def host(monkeypatch):
+    """
+    40 cpus on one node, without SMT.
+    """
+    monkeypatch.setattr(alloc, 'cpu_siblings', lambda c: [c])
+    monkeypatch.setattr(alloc, 'physical_core', lambda c: c)
+    monkeypatch.setattr(alloc, 'cpu_node', lambda c: 0)
+    return Allocator(cpus=list(range(40)))
+
+def waves(exps, jobs, a):
+    pending = list(exps)
+    ret = []
+    while len(pending) > 0:
+        wave = next_wave(pending, jobs, a)
+        ret.append([e['topology']['name'] for e in wave])
+        used = [c for e in wave for cores in e['alloc']['srvs'] + [e['alloc']['clnts']] for c in cores]
+        assert len(used) == len(set(used))
+        for e in wave:
+            release(e, a)
+    return ret
+
+def test_peaks_pack_in_pairs(host):
+    ws = waves(load_spec(path.join(specdir, 'peaks.json')), 2, host)
+    assert ws[:4] == [['1s1c', '1s2c'], ['1s3c', '1s4c'], ['1s5c', '1s6c'], ['1s7c', '1s8c']]
+    assert sum([len(w) for w in ws]) == 13
+    assert len(ws) == 7
+
+def test_one_job_runs_alone(host):
+    ws = waves(load_spec(path.join(specdir, 'peaks.json')), 1, host)
+    assert all([len(w) == 1 for w in ws])
+
+def test_literal_sets_only_pack_when_disjoint(host):
+    exps = load_spec(path.join(specdir, 'peaks.json'))[:3]
+    for e, (srvs, clnts) in zip(exps, [([[0]], list(range(20, 30))), ([[0, 1]], list(range(30, 40))),
+                                      ([[10]], list(range(30, 40)))]):
+        e['topology']['srvs'] = srvs
+        e['clnts'] = clnts
+    assert waves(exps, 3, host) == [['1s1c', '1s3c'], ['1s2c']]
+
+def test_too_big_for_the_host(host):
+    exp = load_spec(path.join(specdir, 'peaks.json'))[0]
+    exp['clnts'] = 40
+    with pytest.raises(AllocError):
+        next_wave([exp], 2, host)
+
+def test_shipped_specs_fit_a_smt_host(monkeypatch):
+    # 40 physical cores with two hardware threads each, c and c + 40
+    monkeypatch.setattr(alloc, 'cpu_siblings', lambda c: [c % 40, c % 40 + 40])
+    monkeypatch.setattr(alloc, 'physical_core', lambda c: c % 40)
+    monkeypatch.setattr(alloc, 'cpu_node', lambda c: 0)
+    a = Allocator(cpus=list(range(80)))
+    for f in sorted(glob.glob(path.join(specdir, '*.json'))):
+        for exp in load_spec(f):
+            allocate(exp, a)
+            release(exp, a)
@@ -0,0 +1,21 @@
+import pytest
+
+from harness.multiclient import merge_reports, client_skew, split_threads, split_cores
+
+def test_merge_reports_and_skew():
+    a = {'READ': {'time': 1.0, 'count': 10, 'thruput': 10.0, 'avg_latency': 100, 'min_latency': 5, 'p99_latency': 300},
+         'TOTAL': {'time': 1.0, 'count': 10, 'thruput': 10.0}}
+    b = {'READ': {'time': 3.0, 'count': 30, 'thruput': 30.0, 'avg_latency': 200, 'min_latency': 7, 'p99_latency': 400},
+         'TOTAL': {'time': 3.0, 'count': 30, 'thruput': 30.0}}
+    m = merge_reports([a, b])
+    assert m['READ'] == {'time': 2.0, 'count': 40, 'thruput': 40.0, 'avg_latency': 175, 'min_latency': 5, 'p99_latency': 400}
+    assert client_skew([a, b]) == {'thruput': [10.0, 30.0], 'skew': 1.0}
+
+def test_split_threads():
+    assert split_threads(10, 3) == [4, 3, 3]
+    assert sum(split_threads(7, 7)) == 7
+
+def test_split_cores():
+    assert split_cores(range(8), 3) == [[0, 1], [2, 3, 4], [5, 6, 7]]
+    with pytest.raises(ValueError):
+        split_cores([0, 1], 3)
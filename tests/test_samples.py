@@ -0,0 +1,61 @@
+import struct
+
+import pytest
+
+from harness import samples
+
+def op_record(opid:int, name:str):
+    return b'O' + struct.pack('<HH', opid, len(name)) + name.encode()
+
+def sample_record(t_us:int, entries:list[tuple]):
+    # entries: (op id, count, latency sum us, max latency us)
+    return (b'S' + struct.pack('<qH', t_us, len(entries)) +
+            b''.join([struct.pack('<HIQI', *e) for e in entries]))
+
+def stream(interval_us:int, records:list[bytes]):
+    return samples.magic + struct.pack('<I', interval_us) + b''.join(records)
+
+@pytest.fixture
+def sample_file(tmp_path):
+    f = tmp_path / 'samples.bin'
+    f.write_bytes(stream(100000, [
+        op_record(0, 'READ'), op_record(1, 'TOTAL'),
+        sample_record(1000100000, [(0, 10, 1000, 300), (1, 10, 1000, 300)]),
+        op_record(2, 'READ_ERROR'),
+        sample_record(1000200000, [(2, 2, 40, 30), (1, 2, 40, 30)]),
+        sample_record(1000300000, [(0, 5, 250, 90), (1, 5, 250, 90)]),
+    ]))
+    return str(f)
+
+def test_read_samples(sample_file):
+    s = samples.read_samples(sample_file)
+    assert s['interval'] == 0.1
+    assert s['t'] == [1000.1, 1000.2, 1000.3]
+    assert s['ops']['READ'] == {'count': [10, 0, 5], 'avg_latency': [100, None, 50], 'max_latency': [300, None, 90]}
+    # an op first seen later is filled in for the intervals before
+    assert s['ops']['READ_ERROR']['count'] == [0, 2, 0]
+    assert samples.op_names(s) == ['READ']
+
+def test_op_points(sample_file):
+    s = samples.read_samples(sample_file)
+    pts = samples.op_points(s, 'READ', t0=1000)
+    assert [p['ok'] for p in pts] == [10, 0, 5]
+    assert [p['failed'] for p in pts] == [0, 2, 0]
+    assert pts[0]['thruput'] == pytest.approx(100.0)
+    assert pts[1]['errors'] == pytest.approx(20.0)
+    assert pts[2]['t'] == pytest.approx(0.3)
+
+def test_truncated_record_is_dropped(tmp_path):
+    full = stream(1000, [op_record(0, 'READ'), sample_record(1000, [(0, 1, 10, 10)]),
+                         sample_record(2000, [(0, 2, 20, 10)])])
+    f = tmp_path / 'cut.bin'
+    f.write_bytes(full[:-3])
+    s = samples.read_samples(str(f))
+    assert s['t'] == [0.001]
+    assert s['ops']['READ']['count'] == [1]
+
+def test_not_a_sample_stream(tmp_path):
+    f = tmp_path / 'other.bin'
+    f.write_bytes(b'READ - Takes(s): 1.0')
+    with pytest.raises(ValueError):
+        samples.read_samples(str(f))
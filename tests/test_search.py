@@ -0,0 +1,46 @@
+from harness.search import PeakSearch, find_peak
+from harness.point import point_thruput
+
+def curve(peak:int):
+    # unimodal in the thread count, exact (zero-width confidence intervals)
+    def measure(threads):
+        return 1000 - (threads - peak) ** 2 / 10, 0.0
+    return measure
+
+def test_finds_peak():
+    r = find_peak(curve(37), max_threads=1024, resolution=0.01, min_resolution=1)
+    assert abs(r['threads'] - 37) <= 1
+    assert r['threads_range'][0] <= r['threads'] <= r['threads_range'][1]
+
+def test_reuses_measurements():
+    calls = []
+    measure = curve(100)
+    def counted(threads):
+        calls.append(threads)
+        return measure(threads)
+    r = find_peak(counted, repeats=3, max_threads=1024)
+    assert r['runs'] == len(calls)
+    # exact measurements are never repeated
+    assert len(calls) == len(set(calls))
+
+def test_noise_is_resampled_not_trusted():
+    # 2 and 4 threads are indistinguishable within their intervals
+    s = PeakSearch(lambda t: (100.0 + t, 50.0), repeats=3)
+    assert s.compare(2, 4) == 0
+    assert len(s.samples[2]) == 3 and len(s.samples[4]) == 3
+
+def test_clear_difference():
+    s = PeakSearch(lambda t: (100.0 * t, 1.0))
+    assert s.compare(1, 2) == -1
+    assert s.compare(2, 1) == 1
+
+def test_stops_at_max_threads():
+    r = find_peak(lambda t: (float(t), 0.0), max_threads=64)
+    assert r['threads'] == 64
+
+def test_point_thruput_counts_every_op_once():
+    p = {'lts': {'READ': {'thruput': 10.0}, 'UPDATE': {'thruput': 10.0}, 'TOTAL': {'thruput': 20.0},
+                 'READ_ERROR': {'thruput': 1.0}},
+         'steady': {'rel_ci': 0.1}}
+    assert point_thruput(p) == (20.0, 2.0)
+    assert point_thruput({'lts': {}}) == (0, None)
@@ -0,0 +1,44 @@
+import math
+
+from harness.steady import SteadyState, mean_ci
+
+def report(t:float, reads:int, updates:int):
+    return {'READ': {'time': t, 'count': reads, 'thruput': reads / t},
+            'UPDATE': {'time': t, 'count': updates, 'thruput': updates / t},
+            'TOTAL': {'time': t, 'count': reads + updates, 'thruput': (reads + updates) / t}}
+
+def test_mean_ci():
+    assert mean_ci([5.0]) == (5.0, math.inf)
+    m, hw = mean_ci([1.0, 2.0, 3.0])
+    assert m == 2.0
+    assert hw == 4.303 * math.sqrt(1 / 3)
+
+def test_converges_on_constant_rate():
+    s = SteadyState(min_batches=5)
+    done = False
+    t = 0
+    while not done:
+        t += 1
+        done = s.add(report(t, 100 * t, 100 * t))
+    assert t == 6
+    assert s.batches == [200.0] * 5
+    info = s.info()
+    assert info['converged'] and info['rel_ci'] == 0
+
+def test_result_drops_warmup():
+    s = SteadyState(min_batches=3, tolerance=0.01)
+    counts = [0, 10, 20, 120, 220, 320, 420, 520]
+    for t, c in enumerate(counts):
+        s.add(report(t + 1, c, c))
+    r = s.result()
+    assert r['READ']['thruput'] == 100.0
+    assert r['UPDATE']['thruput'] == 100.0
+    # TOTAL stays the sum of the others, not part of it
+    assert r['TOTAL']['thruput'] == 200.0
+
+def test_never_converges_on_noise():
+    s = SteadyState(min_batches=3, tolerance=0.01)
+    c = 0
+    for t in range(1, 12):
+        c += 100 if t % 2 else 300
+        assert not s.add(report(t, c, 0))
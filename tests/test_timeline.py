@@ -0,0 +1,65 @@
+import pytest
+
+from harness import timeline
+
+def report(t:float, ok:int, failed:int=0):
+    r = {'READ': {'time': t, 'count': ok}, 'TOTAL': {'time': t, 'count': ok + failed}}
+    if failed > 0:
+        r['READ_ERROR'] = {'time': t, 'count': failed}
+    return r
+
+def points(thputs:list[float], dt:float=1.0):
+    return [{'t': (i + 1) * dt, 'dt': dt, 'ok': x * dt, 'failed': 0, 'thruput': x, 'errors': 0}
+            for i, x in enumerate(thputs)]
+
+def test_rates_skip_total():
+    samples = [(1.0, report(1.0, 100)), (2.0, report(2.0, 300, 5)), (3.0, report(3.0, 400, 5))]
+    rs = timeline.rates(samples)
+    assert [(r['t'], r['ok'], r['failed']) for r in rs] == [(2.0, 200, 5), (3.0, 100, 0)]
+    assert rs[0]['thruput'] == 200.0
+
+def test_dip_and_recovery():
+    # steady at 100, an event at t=5 halves throughput for two seconds
+    pts = points([100] * 5 + [50, 50, 95, 100, 100, 100])
+    m, = timeline.analyze(pts, [{'op': 'add', 'shard': 1, 'start': 5.0}])
+    assert m['baseline'] == 100
+    assert m['dip'] == 50
+    assert m['dip_depth'] == 0.5
+    assert m['time_to_recover'] == 2.0
+    assert m['stalls'] == 0 and m['errors'] == 0
+
+def test_stall_without_recovery():
+    pts = points([100] * 5 + [0, 0, 0, 40])
+    m, = timeline.analyze(pts, [{'op': 'remove', 'shard': 1, 'start': 5.0}])
+    assert m['dip_depth'] == 1
+    assert m['time_to_recover'] is None
+    assert m['stalls'] == 3 and m['longest_stall'] == 3.0
+
+def test_recovery_must_hold():
+    # back to 100 only for the last second of the run
+    pts = points([100] * 5 + [50, 50, 50, 100])
+    m, = timeline.analyze(pts, [{'op': 'add', 'start': 5.0}], hold=2)
+    assert m['time_to_recover'] is None
+    # and for two seconds
+    pts = points([100] * 5 + [50, 50, 50, 100, 100])
+    m, = timeline.analyze(pts, [{'op': 'add', 'start': 5.0}], hold=2)
+    assert m['time_to_recover'] == 3.0
+
+def test_recovery_before_the_next_event():
+    pts = points([100] * 5 + [50, 100] + [50] * 4)
+    a, _ = timeline.analyze(pts, [{'op': 'add', 'start': 5.0}, {'op': 'remove', 'start': 7.0}], hold=2)
+    assert a['time_to_recover'] is None
+
+def test_events_are_measured_until_the_next():
+    pts = points([100] * 5 + [50] + [100] * 4 + [20] + [100] * 3)
+    a, b = timeline.analyze(pts, [{'op': 'add', 'start': 5.0}, {'op': 'remove', 'start': 10.0}])
+    assert a['dip'] == 50 and b['dip'] == 20
+
+def test_expand_schedule():
+    es = timeline.expand_schedule([{'at': 40, 'add': 1}, {'at': 30, 'op': 'rebalance'},
+                                   {'churn': {'shard': 2, 'start': 100, 'every': 10, 'count': 3}}])
+    assert es == [{'at': 30, 'op': 'rebalance', 'shard': None}, {'at': 40, 'op': 'add', 'shard': 1},
+                  {'at': 100, 'op': 'add', 'shard': 2}, {'at': 110, 'op': 'remove', 'shard': 2},
+                  {'at': 120, 'op': 'add', 'shard': 2}]
+    with pytest.raises(ValueError):
+        timeline.expand_schedule([{'at': 1, 'op': 'remove'}])
@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+from harness import usl
+
+def test_fit_recovers_parameters():
+    truth = usl.USL(1000.0, 0.05, 0.001)
+    ns = [1, 2, 4, 8, 16, 32, 64]
+    m = usl.fit(ns, [truth.predict(n) for n in ns])
+    assert math.isclose(m.lam, 1000.0, rel_tol=1e-3)
+    assert math.isclose(m.sigma, 0.05, rel_tol=1e-2)
+    assert math.isclose(m.kappa, 0.001, rel_tol=1e-2)
+    assert math.isclose(m.peak(), math.sqrt(0.95 / 0.001), rel_tol=1e-2)
+
+def test_amdahl_has_no_peak():
+    truth = usl.USL(500.0, 0.1, 0.0)
+    ns = [1, 2, 4, 8, 16]
+    m = usl.fit(ns, [truth.predict(n) for n in ns], amdahl=True)
+    assert m.kappa == 0.0
+    assert math.isclose(m.sigma, 0.1, rel_tol=1e-2)
+    assert m.peak() == math.inf
+    assert m.to_dict()['peak_n'] is None
+
+def test_coefficients_stay_physical():
+    # superlinear points would need a negative sigma
+    m = usl.fit([1, 2, 4], [100.0, 250.0, 600.0])
+    assert m.sigma >= 0 and m.kappa >= 0
+
+def test_loo_flags_outlier():
+    truth = usl.USL(1000.0, 0.05, 0.001)
+    ns = [1, 2, 4, 8, 16, 32]
+    xs = [truth.predict(n) for n in ns]
+    xs[3] *= 0.5
+    errs = usl.loo_errors(ns, xs)
+    assert max(range(len(errs)), key=lambda i: abs(errs[i])) == 3
+
+def test_no_points():
+    with pytest.raises(ValueError):
+        usl.fit([1, 2], [0, 0])
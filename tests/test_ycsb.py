@@ -0,0 +1,37 @@
+from harness import ycsb
+
+out = """Using request distribution 'uniform' a keyrange of [0 99999]
+READ   - Takes(s): 1.0, Count: 10, OPS: 10.0, Avg(us): 100, Min(us): 10, Max(us): 900, 99th(us): 800
+UPDATE - Takes(s): 1.0, Count: 10, OPS: 10.0, Avg(us): 300, Min(us): 20, Max(us): 950, 99th(us): 900
+TOTAL  - Takes(s): 1.0, Count: 20, OPS: 20.0, Avg(us): 200, Min(us): 10, Max(us): 950, 99th(us): 900
+READ   - Takes(s): 2.0, Count: 30, OPS: 15.0, Avg(us): 100, Min(us): 10, Max(us): 900, 99th(us): 800
+UPDATE - Takes(s): 2.0, Count: 30, OPS: 15.0, Avg(us): 300, Min(us): 20, Max(us): 950, 99th(us): 900
+UPDATE_ERROR - Takes(s): 2.0, Count: 4, OPS: 2.0, Avg(us): 50, Min(us): 5, Max(us): 90, 99th(us): 90
+TOTAL  - Takes(s): 2.0, Count: 64, OPS: 32.0, Avg(us): 200, Min(us): 10, Max(us): 950, 99th(us): 900
+Run finished, takes 2.1s
+"""
+
+def test_parse_summary_line():
+    op, rec = ycsb.parse_summary_line("READ   - Takes(s): 1.5, Count: 10, OPS: 6.7, Avg(us): 100, 99.9th(us): 700\n")
+    assert op == 'READ'
+    assert rec == {'time': 1.5, 'count': 10, 'thruput': 6.7, 'avg_latency': 100, 'p999_latency': 700}
+    assert ycsb.parse_summary_line("Run finished, takes 2.1s") is None
+
+def test_reports_keep_total_separate_from_ops():
+    reports = ycsb.parse_reports(out)
+    assert len(reports) == 2
+    assert set(reports[0]) == {'READ', 'UPDATE', 'TOTAL'}
+    r = reports[-1]
+    assert ycsb.report_ops(r) == ['READ', 'UPDATE']
+    assert ycsb.report_thruput(r) == 30.0
+    assert ycsb.report_count(r) == 60
+    assert ycsb.report_time(r) == 2.0
+    assert ycsb.parse_ycsb_output_totalops(out) == (2.0, 60)
+
+def test_report_parser_incremental():
+    parser = ycsb.ReportParser()
+    done = []
+    for line in out.splitlines():
+        done += parser.feed(line)
+    done += parser.flush()
+    assert [ycsb.report_time(r) for r in done] == [1.0, 2.0]